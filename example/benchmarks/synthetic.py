@@ -0,0 +1,37 @@
+"""
+Deterministic synthetic input for the transform benchmark. Replace with files shaped like what the extractor writes,
+the benchmark only needs `generate(out_dir, rows, seed)` to put them in `out_dir`.
+
+    uv run python benchmarks/synthetic.py --rows 100000 --out_dir /tmp/example_in
+"""
+
+import argparse
+import gzip
+import json
+import random
+from pathlib import Path
+
+START = 1_704_067_200
+
+
+def generate(out_dir: Path, rows: int, seed: int = 0) -> Path:
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / "example.jsonl.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for i in range(max(1, rows)):
+            f.write(json.dumps({"id": i, "timestamp": START + i * 60, "value": rng.randint(0, 100)}) + "\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000, help="Input rows")
+    parser.add_argument("--out_dir", required=True, type=Path)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(generate(args.out_dir, args.rows, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 import shutil
 import uuid
+from collections.abc import Iterator
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
@@ -18,24 +19,31 @@ def run_extract(params: ExtractionParams):
     extract_start = datetime.now(timezone.utc)
 
     # Example: read all files in a folder and copy them as they are to the out_dir
-    for path in Path(params.in_dir).rglob("*"):
-        if not path.is_file():
-            continue
+    for path in source_files(params.in_dir):
+        copy_file(path, params.out_dir, extract_start)
+        print(f"Copied file {path}")
 
-        suffix = "".join(path.suffixes)
-        base = path.name.removesuffix(suffix)
 
-        file_name = f"{base}_{str(uuid.uuid4()).split('-')[0]}"
-        raw_file_name = f"{file_name}{suffix}"
-        dest_path = params.out_dir / raw_file_name
+def source_files(in_dir: Path) -> Iterator[Path]:
+    for path in Path(in_dir).rglob("*"):
+        if path.is_file():
+            yield path
 
-        shutil.copy2(path, dest_path)
 
-        write_meta_file(
-            out_dir=params.out_dir,
-            source_path=path,
-            file_name=file_name,
-            extract_start=extract_start,
-        )
+def copy_file(path: Path, out_dir: Path, extract_start: datetime) -> Path:
+    suffix = "".join(path.suffixes)
+    base = path.name.removesuffix(suffix)
 
-        print(f"Copied file {path}")
+    file_name = f"{base}_{str(uuid.uuid4()).split('-')[0]}"
+    raw_file_name = f"{file_name}{suffix}"
+    dest_path = out_dir / raw_file_name
+
+    shutil.copy2(path, dest_path)
+
+    write_meta_file(
+        out_dir=out_dir,
+        source_path=path,
+        file_name=file_name,
+        extract_start=extract_start,
+    )
+    return dest_path
@@ -0,0 +1,47 @@
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Optional
+
+from hares.extract.run import ExtractionParams, copy_file, source_files
+from hares.pipeline.raw import RawWriter
+from hares.transform.canon_writer import CanonOptions, RecordSink
+from hares.transform.memory import MemoryOptions
+from hares.transform.meta import TransformRunMetadata
+from hares.transform.run import run_transform
+from hares.transform.schemas import Schemas
+
+
+# Extract and transform in one go: the files are transformed from where they are while the copies the extract would
+# have made are written next to it
+def run_pipeline(
+    params: ExtractionParams,
+    out_dir: Path,
+    schemas: Schemas,
+    canon: Optional[CanonOptions] = None,
+    memory: Optional[MemoryOptions] = None,
+    dedup: bool = False,
+):
+    run_transform(
+        out_dir=str(out_dir),
+        in_dir=str(params.out_dir),
+        schemas=schemas,
+        canon=canon,
+        memory=memory,
+        dedup=dedup,
+        source=partial(transform_sources, params),
+    )
+
+
+def transform_sources(
+    params: ExtractionParams, writer: RecordSink, metadata: TransformRunMetadata, schemas: Schemas
+) -> None:
+    extract_start = datetime.now(timezone.utc)
+    with RawWriter() as raw:
+        for path in sorted(source_files(params.in_dir)):
+            raw.submit(copy_file, path, params.out_dir, extract_start)
+            print("Here", path)
+            # Example bellow of transforming the file the same way run_transform does
+            # metadata.add_files_processed(path)
+            # for row in get_rows(path, metadata):
+            #     writer.write(transform_location(TransformerParams(schemas=schemas, metadata=metadata, data=row)))
@@ -1,47 +1,96 @@
-import gzip
 import json
 import os
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
-
-from dotenv import load_dotenv
+from typing import Callable, Optional
 
 from hares.config import PLUGIN_NAME
+from hares.transform.canon_writer import CanonOptions, RecordSink, canon_writer, remove_outputs
+from hares.transform.checkpoints import CheckpointStore
+from hares.transform.dedup import RecordIndex
+from hares.transform.memory import MemoryMonitor, MemoryOptions
 from hares.transform.meta import TransformRunMetadata
 from hares.transform.schemas import Schemas
 
-load_dotenv()
+# Writes records from somewhere other than in_dir, the run command streams them from the extract
+Source = Callable[[RecordSink, TransformRunMetadata, Schemas], None]
 
 
-def run_transform(out_dir: str, in_dir: str, schemas: Schemas):
+def run_transform(
+    out_dir: str,
+    in_dir: str,
+    schemas: Schemas,
+    canon: Optional[CanonOptions] = None,
+    memory: Optional[MemoryOptions] = None,
+    incremental: bool = False,
+    dedup: bool = False,
+    source: Optional[Source] = None,
+):
+    canon = canon or CanonOptions()
     file_name = f"{PLUGIN_NAME}_canon_{timestamp(datetime.now(timezone.utc))}_{str(uuid.uuid4()).split('-')[0]}"
     file_path = os.path.join(out_dir, file_name)
-    canon_file = f"{file_path}.jsonl.gz"
     metadata_file = f"{file_path}.meta.json"
 
     metadata = TransformRunMetadata()
     metadata.start()
+    metadata.validation = schemas.validation
+    metadata.timers = schemas.validation.timers
+    metadata.schema_load_timings = schemas.load_timings
+    metadata.codec = canon.to_dict()
+    metadata.memory = MemoryMonitor(memory)
+    checkpoints = CheckpointStore(out_dir, incremental)
+    index = RecordIndex(out_dir, dedup)
+    # location_timer = metadata.timers.per_record("map", entity="location")
     # log_every = 10000
     # row_count = 0
 
-    with gzip.open(canon_file, "wt", encoding="utf-8") as gz:
-        # writer = jsonlines.Writer(gz)
-        print("Here", gz)
-        # Example bellow of iterating over a file and writting results and logging progress
-        # for row in get_rows(Path(in_dir), metadata):
-        #     row_count += 1
-        #     params = TransformerParams(device=device, schemas=schemas, metadata=metadata, data=row)
-        #
-        #     writer.write(transform_location(params))
-        #     writer.write(transform_device_status(params))
-        #     if row_count % log_every == 0:
-        #       print(
-        #          f"Processed {row_count} rows (locations={metadata.counts.get('location')}, device_status={metadata.counts.get('device_status')})"
-        #       )
+    try:
+        with (
+            metadata.memory,
+            canon_writer(file_path, canon, timers=metadata.timers) as writer,
+            index.writer(writer) as indexed,
+            metadata.memory.writer(indexed) as sink,
+        ):
+            if source is not None:
+                source(sink, metadata, schemas)
+            # Example bellow of iterating over a file and writting results and logging progress
+            # for row in get_rows(Path(in_dir), metadata):
+            #     row_count += 1
+            #     params = TransformerParams(device=device, schemas=schemas, metadata=metadata, data=row)
+            #
+            #     with location_timer():
+            #         transformed = transform_location(params)
+            #     sink.write(transformed)
+            #     if row_count % log_every == 0:
+            #       print(
+            #          f"Processed {row_count} rows (locations={metadata.counts.get('location')}, device_status={metadata.counts.get('device_status')})"
+            #       )
+
+        metadata.shards = writer.manifest()
+        metadata.writer = writer.stats()
+        if schemas.validation_pool is not None:
+            schemas.validation_pool.finish()
+    except BaseException:
+        # Whatever stopped the run, don't leave a complete looking canon file behind
+        remove_outputs(out_dir, file_name)
+        index.close()
+        if schemas.validation_pool is not None:
+            schemas.validation_pool.close()
+        raise
 
+    metadata.checkpoints = checkpoints.to_dict()
+    metadata.dedup = index.to_dict()
+    index.remove_suppressed(metadata.counts)
     with Path(metadata_file).open("w", encoding="utf-8") as f:
         json.dump(metadata.to_dict(), f, indent=2)
+    checkpoints.commit(file_name)
+    index.commit()
+
+
+# The files --watch looks at, everything the extractor copied
+def input_files(in_dir: Path) -> list[Path]:
+    return sorted(path for path in in_dir.iterdir() if path.is_file() and not path.name.endswith(".meta.json"))
 
 
 def timestamp(time: datetime) -> str:
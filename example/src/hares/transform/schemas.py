@@ -1,13 +1,23 @@
 import json
 import os
-from dataclasses import dataclass
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from functools import cache, partial
 from pathlib import Path
-from typing import Any, NamedTuple, Optional
+from typing import TYPE_CHECKING, Any, Callable, NamedTuple, Optional
 
-import httpx
-from dotenv import load_dotenv
+import jsonschema
+from jsonschema.exceptions import best_match
 
-load_dotenv()
+from hares.transform.fast_validator import build_validator
+from hares.transform.schema_cache import DEFAULT_TTL_SECONDS, SchemaCache
+from hares.transform.validation import ValidationReport
+from hares.transform.validation_pool import ValidationPool
+
+if TYPE_CHECKING:
+    import httpx
 
 LOCATION_SCHEMA_URL = (
     "https://raw.githubusercontent.com/lorenzopicoli/lomnia/refs/heads/main/backend/schemas/location.schema.json"
@@ -20,42 +30,136 @@ DEVICE_SCHEMA_URL = (
 )
 
 
+# Read when created rather than at import, so a .env loaded by the entry point is picked up
 @dataclass
 class SchemaEnvVars:
-    local_loc_schema: Optional[str] = os.getenv("LOCATION_SCHEMA_LOCAL")
-    local_dev_schema: Optional[str] = os.getenv("DEVICE_SCHEMA_LOCAL")
-    local_dev_status_schema: Optional[str] = os.getenv("DEVICE_STATUS_SCHEMA_LOCAL")
-    skip_schema_check: bool = os.environ.get("SKIP_SCHEMA_CHECK", "").lower() in ("1", "true", "yes", "on")
+    local_loc_schema: Optional[str] = field(default_factory=lambda: os.getenv("LOCATION_SCHEMA_LOCAL"))
+    local_dev_schema: Optional[str] = field(default_factory=lambda: os.getenv("DEVICE_SCHEMA_LOCAL"))
+    local_dev_status_schema: Optional[str] = field(default_factory=lambda: os.getenv("DEVICE_STATUS_SCHEMA_LOCAL"))
+    skip_schema_check: bool = field(
+        default_factory=lambda: os.environ.get("SKIP_SCHEMA_CHECK", "").lower() in ("1", "true", "yes", "on")
+    )
+    schema_cache_ttl: float = field(
+        default_factory=lambda: float(os.environ.get("SCHEMA_CACHE_TTL", DEFAULT_TTL_SECONDS))
+    )
+    schema_offline: bool = field(
+        default_factory=lambda: os.environ.get("SCHEMA_OFFLINE", "").lower() in ("1", "true", "yes", "on")
+    )
+    validation_mode: str = field(default_factory=lambda: os.environ.get("VALIDATION_MODE", "full").lower())
+    validation_sample_first: int = field(default_factory=lambda: int(os.environ.get("VALIDATION_SAMPLE_FIRST", "1000")))
+    validation_sample_every: int = field(default_factory=lambda: int(os.environ.get("VALIDATION_SAMPLE_EVERY", "100")))
+    validation_workers: int = field(default_factory=lambda: int(os.environ.get("VALIDATION_WORKERS", "0")))
+
+
+class CompiledSchema(NamedTuple):
+    schema: dict[str, Any]
+    validate: Callable[[Any], None]
 
 
 class Schemas(NamedTuple):
-    location: Any
-    device: Any
-    device_status: Any
+    location: Optional[CompiledSchema]
+    device: Optional[CompiledSchema]
+    device_status: Optional[CompiledSchema]
     skip_schema_check: bool
+    validation: ValidationReport
+    load_timings: dict[str, float]
+    validation_pool: Optional[ValidationPool]
 
 
-def load_schema(local: str | None, default_url: str):
+def load_schema(local: str | None, default_url: str, cache: SchemaCache, client: Optional["httpx.Client"] = None):
     if local:
         file_path = Path(local)
         if file_path.exists():
             return json.loads(file_path.read_text())
 
-    return httpx.get(default_url).json()
+    return cache.load(default_url, client)
+
+
+def load_schemas(
+    sources: dict[str, tuple[Optional[str], str]], cache: SchemaCache
+) -> tuple[dict[str, Any], dict[str, float]]:
+    # All schemas at once over one pooled client instead of a new connection per schema, one after the other
+    timings: dict[str, float] = {}
+
+    def timed_load(name: str, local: Optional[str], url: str, client: Optional["httpx.Client"]) -> Any:
+        started = time.perf_counter()
+        schema = load_schema(local, url, cache, client)
+        timings[name] = round(time.perf_counter() - started, 4)
+        return schema
+
+    # httpx (~100ms to import) and the client are only needed when a schema isn't local and the cached copy is stale
+    client_context: Any = nullcontext()
+    if any(cache.needs_request(url) for local, url in sources.values() if not (local and Path(local).exists())):
+        import httpx
+
+        client_context = httpx.Client()
+
+    with client_context as client, ThreadPoolExecutor(max_workers=len(sources)) as pool:
+        futures = {name: pool.submit(timed_load, name, local, url, client) for name, (local, url) in sources.items()}
+        schemas = {name: future.result() for name, future in futures.items()}
+
+    return schemas, timings
+
+
+# jsonschema.validate() checks the schema and builds a new validator on every call, so do it once per schema. Kept for
+# the life of the process, so a --watch run that loads the same schemas again doesn't compile them again
+@cache
+def schema_validator(schema_json: str) -> Callable[[Any], None]:
+    schema = json.loads(schema_json)
+    validator_cls = jsonschema.validators.validator_for(schema)
+    validator_cls.check_schema(schema)
+    validator = validator_cls(schema)
+    # Generated for this exact schema, only walk the schema with jsonschema when the fast check fails to get the error
+    is_valid = build_validator(schema)
+
+    def validate(instance: Any) -> None:
+        if is_valid is not None and is_valid(instance):
+            return
+        error = best_match(validator.iter_errors(instance))
+        if error is not None:
+            raise error
+
+    return validate
+
+
+def compile_schema(
+    schema: dict[str, Any] | None, entity: str, report: ValidationReport, pool: Optional[ValidationPool] = None
+) -> CompiledSchema | None:
+    if schema is None:
+        return None
+
+    validate = schema_validator(json.dumps(schema, sort_keys=True))
+    if pool is not None:
+        # Checked by the pool workers while mapping goes on, errors are raised by pool.finish()
+        return CompiledSchema(schema, report.validator(entity, schema, partial(pool.submit, entity)))
+
+    return CompiledSchema(schema, report.validator(entity, schema, validate))
 
 
 def get_schemas():
     env = SchemaEnvVars()
-    location_schema = (
-        load_schema(local=env.local_loc_schema, default_url=LOCATION_SCHEMA_URL) if not env.skip_schema_check else None
+    cache = SchemaCache(ttl=env.schema_cache_ttl, offline=env.schema_offline)
+    report = ValidationReport(
+        env.validation_mode, env.validation_sample_first, env.validation_sample_every, env.validation_workers
     )
-    device_schema = (
-        load_schema(local=env.local_dev_schema, default_url=DEVICE_SCHEMA_URL) if not env.skip_schema_check else None
-    )
-    device_status_schema = (
-        load_schema(local=env.local_dev_status_schema, default_url=DEVICE_STATUS_SCHEMA_URL)
-        if not env.skip_schema_check
+    sources = {
+        "location": (env.local_loc_schema, LOCATION_SCHEMA_URL),
+        "device": (env.local_dev_schema, DEVICE_SCHEMA_URL),
+        "deviceStatus": (env.local_dev_status_schema, DEVICE_STATUS_SCHEMA_URL),
+    }
+    loaded, timings = load_schemas(sources, cache) if not env.skip_schema_check else ({}, {})
+    pool = (
+        ValidationPool({name: schema for name, schema in loaded.items() if schema is not None}, env.validation_workers)
+        if loaded and env.validation_workers > 0
         else None
     )
 
-    return Schemas(location_schema, device_schema, device_status_schema, env.skip_schema_check)
+    return Schemas(
+        compile_schema(loaded.get("location"), "location", report, pool),
+        compile_schema(loaded.get("device"), "device", report, pool),
+        compile_schema(loaded.get("deviceStatus"), "deviceStatus", report, pool),
+        env.skip_schema_check,
+        report,
+        timings,
+        pool,
+    )
@@ -0,0 +1,104 @@
+"""
+Benchmark regression gate. Runs the transform benchmark (transform.py) at the sizes of the committed baseline, or
+takes the results of an earlier run, and exits with 1 when rows/s dropped or peak RSS grew past the thresholds.
+
+    uv run python benchmarks/compare.py
+    uv run python benchmarks/compare.py --current /tmp/results.json --max_slowdown 0.1
+
+Refresh the baseline on purpose, on the same kind of machine: `transform.py --out benchmarks/baseline.json`.
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any
+
+from transform import run_benchmarks
+
+BASELINE = Path(__file__).parent / "baseline.json"
+# Compared only when both sides ran with the same ones, otherwise the gate is comparing different things
+ENVIRONMENT = ("python", "machine", "cpus", "settings")
+# Metric and whether a higher value is the worse one
+METRICS = (("rows_per_second", False), ("peak_rss_bytes", True))
+
+
+def compare(
+    baseline: dict[str, Any], current: dict[str, Any], max_slowdown: float, max_memory_growth: float
+) -> list[dict[str, Any]]:
+    thresholds = {"rows_per_second": max_slowdown, "peak_rss_bytes": max_memory_growth}
+    rows = []
+    for size, base in baseline["results"].items():
+        result = current["results"].get(size)
+        if result is None:
+            continue
+        for metric, higher_is_worse in METRICS:
+            before, after = base[metric] or 0, result[metric] or 0
+            change = (after - before) / before if before else 0.0
+            worse = change if higher_is_worse else -change
+            rows.append({
+                "size": size,
+                "metric": metric,
+                "baseline": base[metric],
+                "current": result[metric],
+                "change": change,
+                "regression": worse > thresholds[metric],
+            })
+    return rows
+
+
+def format_value(metric: str, value: float | None) -> str:
+    if value is None:
+        return "-"
+    return f"{value / 2**20:.1f} MiB" if metric == "peak_rss_bytes" else f"{value:,.0f}/s"
+
+
+def format_table(rows: list[dict[str, Any]]) -> str:
+    lines = [f"{'size':>8}  {'metric':<16} {'baseline':>14} {'current':>14} {'change':>8}"]
+    for row in rows:
+        lines.append(
+            f"{row['size']:>8}  {row['metric']:<16} {format_value(row['metric'], row['baseline']):>14} "
+            f"{format_value(row['metric'], row['current']):>14} {row['change']:>+8.1%}"
+            f"{'  REGRESSION' if row['regression'] else ''}"
+        )
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument(
+        "--current", type=Path, help="Results of an earlier transform.py --out run instead of a new run"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size, the best one is kept")
+    parser.add_argument("--max_slowdown", type=float, default=0.2, help="Allowed drop in rows/s, 0.2 = 20%%")
+    parser.add_argument("--max_memory_growth", type=float, default=0.2, help="Allowed growth in peak RSS, 0.2 = 20%%")
+    args = parser.parse_args()
+
+    if not args.baseline.exists():
+        sys.exit(f"BASELINE_NOT_FOUND: {args.baseline}, record one with transform.py --out")
+    baseline = json.loads(args.baseline.read_text())
+    if args.current:
+        current = json.loads(args.current.read_text())
+    else:
+        sizes = [int(size) for size in baseline["results"]]
+        current = run_benchmarks(sizes, baseline.get("seed", 0), args.repeat)
+
+    differs = [key for key in ENVIRONMENT if baseline.get(key) != current.get(key)]
+    for key in differs:
+        print(f"{key} differs from the baseline ({baseline.get(key)} vs {current.get(key)})")
+
+    rows = compare(baseline, current, args.max_slowdown, args.max_memory_growth)
+    print(format_table(rows))
+    if differs:
+        print(f"Not gated, refresh {args.baseline} on this environment to compare against it")
+        return
+    regressions = [row for row in rows if row["regression"]]
+    if regressions:
+        print(f"{len(regressions)} regression(s) against {args.baseline}")
+        sys.exit(1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
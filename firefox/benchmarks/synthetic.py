@@ -0,0 +1,102 @@
+"""
+Deterministic synthetic Firefox history (a gzipped places.sqlite SQL dump, like the extractor writes) for the
+transform benchmark. One website per place and one websiteVisit per visit, four visits per place.
+
+    uv run python benchmarks/synthetic.py --rows 100000 --out_dir /tmp/firefox_in
+"""
+
+import argparse
+import gzip
+import random
+import sqlite3
+import string
+from pathlib import Path
+
+START_US = 1_704_067_200_000_000
+VISITS_PER_PLACE = 4
+HOSTS = ("example.com", "news.example.org", "docs.python.org", "github.com", "en.wikipedia.org")
+
+SCHEMA = """
+CREATE TABLE moz_places (
+    id INTEGER PRIMARY KEY, url TEXT, title TEXT, rev_host TEXT, visit_count INTEGER DEFAULT 0,
+    hidden INTEGER DEFAULT 0 NOT NULL, typed INTEGER DEFAULT 0 NOT NULL, frecency INTEGER DEFAULT -1 NOT NULL,
+    last_visit_date INTEGER, guid TEXT, foreign_count INTEGER DEFAULT 0 NOT NULL, url_hash INTEGER DEFAULT 0 NOT NULL,
+    description TEXT, preview_image_url TEXT, site_name TEXT, origin_id INTEGER,
+    recalc_frecency INTEGER NOT NULL DEFAULT 0, alt_frecency INTEGER, recalc_alt_frecency INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE moz_historyvisits (
+    id INTEGER PRIMARY KEY, from_visit INTEGER, place_id INTEGER, visit_date INTEGER, visit_type INTEGER,
+    session INTEGER, source INTEGER DEFAULT 0 NOT NULL, triggeringPlaceId INTEGER
+);
+CREATE TABLE moz_annos (id INTEGER PRIMARY KEY, place_id INTEGER NOT NULL, anno_attribute_id INTEGER, content TEXT);
+"""
+
+
+def guid(rng: random.Random) -> str:
+    return "".join(rng.choices(string.ascii_letters + string.digits + "-_", k=12))
+
+
+def generate(out_dir: Path, rows: int, seed: int = 0) -> Path:
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    places = max(1, rows // (VISITS_PER_PLACE + 1))
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(SCHEMA)
+    conn.executemany(
+        "INSERT INTO moz_places (id, url, title, rev_host, visit_count, last_visit_date, guid, url_hash, description) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (
+                i,
+                f"https://{host}/page/{i}",
+                f"Page {i}",
+                f"{host[::-1]}.",
+                VISITS_PER_PLACE,
+                START_US + i * 1_000_000,
+                guid(rng),
+                rng.getrandbits(47),
+                "A synthetic page" if i % 3 == 0 else None,
+            )
+            for i in range(1, places + 1)
+            for host in (rng.choice(HOSTS),)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO moz_historyvisits (id, from_visit, place_id, visit_date, visit_type, session, source) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (
+            (
+                i,
+                i - 1 if i > 1 and i % 2 == 0 else None,
+                rng.randint(1, places),
+                START_US + i * 10_000_000 + rng.randint(0, 999_999),
+                rng.choice((1, 1, 1, 2, 5, 6)),
+                0,
+                0,
+            )
+            for i in range(1, places * VISITS_PER_PLACE + 1)
+        ),
+    )
+    conn.executemany(
+        "INSERT INTO moz_annos (place_id, anno_attribute_id, content) VALUES (?, 1, ?)",
+        ((i, f"file:///home/user/Downloads/file_{i}.pdf") for i in range(1, places + 1, 50)),
+    )
+    path = out_dir / "places.sql.gz"
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for line in conn.iterdump():
+            f.write(line + "\n")
+    conn.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000, help="Approximate canon records the dump turns into")
+    parser.add_argument("--out_dir", required=True, type=Path)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(generate(args.out_dir, args.rows, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,14 +6,15 @@ from typing import NamedTuple
 from dotenv import load_dotenv
 
 from firefox.extract.run import ExtractionParams, run_extract
-
-load_dotenv()
+from firefox.profiling import add_profile_args, profiled
 
 
 class ExtractorArgs(NamedTuple):
     start_date: datetime
     out_dir: Path
     in_dir: Path
+    profile: bool
+    profile_top: int
 
 
 def parse_extract_args() -> ExtractorArgs:
@@ -40,9 +41,16 @@ def parse_extract_args() -> ExtractorArgs:
         help="Input directory path",
     )
 
+    add_profile_args(parser)
     args = parser.parse_args()
 
-    return ExtractorArgs(start_date=args.start_date, out_dir=args.out_dir, in_dir=args.in_dir)
+    return ExtractorArgs(
+        start_date=args.start_date,
+        out_dir=args.out_dir,
+        in_dir=args.in_dir,
+        profile=args.profile,
+        profile_top=args.profile_top,
+    )
 
 
 def extract():
@@ -53,10 +61,12 @@ def extract():
     print("Output dir:", args.out_dir)
 
     params = ExtractionParams(start_date=args.start_date, out_dir=args.out_dir, in_dir=args.in_dir)
-    run_extract(params)
+    with profiled(args.profile, args.out_dir, "extract", args.profile_top):
+        run_extract(params)
 
 
 def main():
+    load_dotenv()
     extract()
 
 
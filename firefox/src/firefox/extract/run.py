@@ -3,6 +3,7 @@ import shutil
 import sqlite3
 import tempfile
 import uuid
+from collections.abc import Iterator
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
@@ -21,14 +22,8 @@ def run_extract(params: ExtractionParams):
     extract_start = datetime.now(timezone.utc)
 
     # Example: read all files in a folder and copy them as they are to the out_dir
-    for path in Path(params.in_dir).rglob("*"):
-        if not path.is_file():
-            continue
-
-        suffix = "".join(path.suffixes)
-        base = path.name.removesuffix(suffix)
-
-        file_name = f"{base}_{str(uuid.uuid4()).split('-')[0]}"
+    for path in source_files(params.in_dir):
+        file_name = raw_file_name(path)
         dest_path = params.out_dir / f"{file_name}.sql.gz"
         #     "~/.mozilla/firefox/",
         #     "~/.var/app/org.mozilla.firefox/.mozilla/firefox/",
@@ -49,6 +44,18 @@ def run_extract(params: ExtractionParams):
         print(f"Copied file {path}")
 
 
+def source_files(in_dir: Path) -> Iterator[Path]:
+    for path in Path(in_dir).rglob("*"):
+        if path.is_file():
+            yield path
+
+
+def raw_file_name(path: Path) -> str:
+    suffix = "".join(path.suffixes)
+    base = path.name.removesuffix(suffix)
+    return f"{base}_{str(uuid.uuid4()).split('-')[0]}"
+
+
 def _moz_timestamp_to_iso(ts: int | None) -> str | None:
     if ts is None:
         return None
@@ -67,39 +74,47 @@ def gzip_sqlite_dump(sqlite_path: Path, output_path: Path | None = None) -> tupl
     output_path = Path(output_path).resolve()
 
     with tempfile.TemporaryDirectory() as tmpdir:
-        tmpdir = Path(tmpdir)
-        tmp_db = tmpdir / sqlite_path.name
-
-        shutil.copy2(sqlite_path, tmp_db)
-
-        conn = sqlite3.connect(tmp_db)
-        try:
-            conn.execute("VACUUM;")
-            row = conn.execute(
-                """
-                SELECT
-                    MIN(visit_date) AS earliest,
-                    MAX(visit_date) AS latest
-                FROM moz_historyvisits
-                """
-            ).fetchone()
-
-            earliest, latest = row
-            earliest = _moz_timestamp_to_iso(earliest)
-            latest = _moz_timestamp_to_iso(latest)
-            print("Firefox history range:")
-            print("  earliest:", earliest)
-            print("  latest:  ", latest)
-        finally:
-            conn.close()
-
-        conn = sqlite3.connect(tmp_db)
-        try:
-            with gzip.open(output_path, "wt", encoding="utf-8") as gz:
-                for line in conn.iterdump():
-                    gz.write(line)
-                    gz.write("\n")
-        finally:
-            conn.close()
+        tmp_db = Path(tmpdir) / sqlite_path.name
+        earliest, latest = snapshot_sqlite(sqlite_path, tmp_db)
+        write_sqlite_dump(tmp_db, output_path)
 
     return earliest, latest
+
+
+# A vacuumed copy, so the browser can keep using the database while it's read
+def snapshot_sqlite(sqlite_path: Path, snapshot_path: Path) -> tuple[str | None, str | None]:
+    shutil.copy2(sqlite_path, snapshot_path)
+
+    conn = sqlite3.connect(snapshot_path)
+    try:
+        conn.execute("VACUUM;")
+        row = conn.execute(
+            """
+            SELECT
+                MIN(visit_date) AS earliest,
+                MAX(visit_date) AS latest
+            FROM moz_historyvisits
+            """
+        ).fetchone()
+
+        earliest, latest = row
+        earliest = _moz_timestamp_to_iso(earliest)
+        latest = _moz_timestamp_to_iso(latest)
+        print("Firefox history range:")
+        print("  earliest:", earliest)
+        print("  latest:  ", latest)
+    finally:
+        conn.close()
+
+    return earliest, latest
+
+
+def write_sqlite_dump(db_path: Path, output_path: Path) -> None:
+    conn = sqlite3.connect(db_path)
+    try:
+        with gzip.open(output_path, "wt", encoding="utf-8") as gz:
+            for line in conn.iterdump():
+                gz.write(line)
+                gz.write("\n")
+    finally:
+        conn.close()
@@ -0,0 +1,74 @@
+import tempfile
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Optional
+
+from firefox.extract.meta import write_meta_file
+from firefox.extract.run import ExtractionParams, raw_file_name, snapshot_sqlite, source_files, write_sqlite_dump
+from firefox.pipeline.raw import RawWriter
+from firefox.transform.canon_writer import CanonOptions, RecordSink
+from firefox.transform.memory import MemoryOptions
+from firefox.transform.meta import TransformRunMetadata
+from firefox.transform.run import run_transform, transform_database
+from firefox.transform.schemas import Schemas
+
+
+# Extract and transform in one go: every snapshot is mapped as it is while the dump the extract would have written is
+# written from it next to it, so nothing is restored from the dump again
+def run_pipeline(
+    params: ExtractionParams,
+    out_dir: Path,
+    schemas: Schemas,
+    canon: Optional[CanonOptions] = None,
+    memory: Optional[MemoryOptions] = None,
+    dedup: bool = False,
+):
+    run_transform(
+        out_dir=str(out_dir),
+        in_dir=str(params.out_dir),
+        schemas=schemas,
+        canon=canon,
+        memory=memory,
+        dedup=dedup,
+        source=partial(transform_snapshots, params),
+    )
+
+
+def transform_snapshots(
+    params: ExtractionParams, writer: RecordSink, metadata: TransformRunMetadata, schemas: Schemas
+) -> None:
+    extract_start = datetime.now(timezone.utc)
+    # The snapshots stay until every dump is written
+    with tempfile.TemporaryDirectory() as tmpdir, RawWriter() as raw:
+        # Sorted so the records come out in the same order every run
+        for path in sorted(source_files(params.in_dir)):
+            file_name = raw_file_name(path)
+            dump_path = params.out_dir / f"{file_name}.sql.gz"
+            # Named like the database a transform restores from the dump
+            snapshot_path = Path(tmpdir) / file_name
+            with metadata.timers.timer("snapshot", file=path.name):
+                earliest, latest = snapshot_sqlite(path.resolve(), snapshot_path)
+            raw.submit(write_dump, path, snapshot_path, dump_path, extract_start, earliest, latest)
+            metadata.add_files_processed(dump_path)
+            transform_database(snapshot_path, writer, metadata, schemas)
+
+
+def write_dump(
+    source_path: Path,
+    snapshot_path: Path,
+    dump_path: Path,
+    extract_start: datetime,
+    earliest: Optional[str],
+    latest: Optional[str],
+) -> None:
+    write_sqlite_dump(snapshot_path, dump_path)
+    write_meta_file(
+        out_dir=dump_path.parent,
+        source_path=source_path,
+        file_name=dump_path.name.removesuffix(".sql.gz"),
+        extract_start=extract_start,
+        data_window_start=earliest,
+        data_window_end=latest,
+    )
+    print(f"Copied file {source_path}")
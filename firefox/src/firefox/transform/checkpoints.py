@@ -0,0 +1,107 @@
+import argparse
+import hashlib
+import sqlite3
+from collections.abc import Iterable
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from firefox.config import PLUGIN_NAME
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS inputs (
+    name TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    canon TEXT NOT NULL,
+    transformed_at TEXT NOT NULL
+)
+"""
+
+
+class Fingerprint(NamedTuple):
+    sha256: str
+    size: int
+    mtime_ns: int
+
+
+def add_checkpoint_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help=f"Skip input files already transformed into --out_dir, tracked in {PLUGIN_NAME}_checkpoints.sqlite there",
+    )
+
+
+def checkpoint_path(out_dir: str | Path) -> Path:
+    return Path(out_dir) / f"{PLUGIN_NAME}_checkpoints.sqlite"
+
+
+def fingerprint(path: Path) -> Fingerprint:
+    stat = path.stat()
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        while chunk := f.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return Fingerprint(digest.hexdigest(), stat.st_size, stat.st_mtime_ns)
+
+
+# Input files are keyed by name. Same size and mtime as last time counts as unchanged without reading the file, otherwise
+# the content hash decides, so a touched but identical file is still skipped. Nothing is stored until the run succeeded
+# (commit), a failed run is simply done again
+class CheckpointStore:
+    def __init__(self, out_dir: str | Path, enabled: bool = True):
+        self.enabled = enabled
+        self.path = checkpoint_path(out_dir)
+        self.pending: dict[str, Fingerprint] = {}
+        # Unchanged content with a new mtime, updated on commit so the next run doesn't hash them again
+        self.touched: dict[str, int] = {}
+        self.skipped: list[dict[str, Any]] = []
+
+    def filter(self, paths: Iterable[Path]) -> list[Path]:
+        # The inputs still to transform, in the order given
+        paths = list(paths)
+        if not self.enabled:
+            return paths
+        result = []
+        with closing(sqlite3.connect(self.path)) as connection:
+            connection.execute(SCHEMA)
+            for path in paths:
+                stat = path.stat()
+                row = connection.execute(
+                    "SELECT sha256, size, mtime_ns, canon FROM inputs WHERE name = ?", (path.name,)
+                ).fetchone()
+                if row is not None and (row[1], row[2]) == (stat.st_size, stat.st_mtime_ns):
+                    self.skipped.append({"input": path.name, "canon": row[3]})
+                    continue
+                current = fingerprint(path)
+                if row is not None and (row[0], row[1]) == (current.sha256, current.size):
+                    self.skipped.append({"input": path.name, "canon": row[3]})
+                    self.touched[path.name] = current.mtime_ns
+                    continue
+                self.pending[path.name] = current
+                result.append(path)
+        print(f"Checkpoints: {len(result)} input(s) to transform, {len(self.skipped)} unchanged")
+        return result
+
+    def commit(self, canon: str) -> None:
+        if not self.enabled:
+            return
+        transformed_at = datetime.now(timezone.utc).isoformat()
+        with closing(sqlite3.connect(self.path)) as connection, connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO inputs VALUES (?, ?, ?, ?, ?, ?)",
+                [(name, *current, canon, transformed_at) for name, current in self.pending.items()],
+            )
+            connection.executemany(
+                "UPDATE inputs SET mtime_ns = ? WHERE name = ?", [(mtime, name) for name, mtime in self.touched.items()]
+            )
+
+    def to_dict(self) -> Optional[dict[str, Any]]:
+        if not self.enabled:
+            return None
+        return {"store": self.path.name, "skipped": self.skipped}
@@ -35,9 +35,9 @@ def transform_website_visit(params: WebsiteVisitTransformerParams):
     if data.visit_type is not None:
         transformed["type"] = transform_visit_type(data.visit_type)
 
-    if params.schemas.website is not None:
+    if params.schemas.website_visit is not None:
         try:
-            jsonschema.validate(instance=transformed, schema=params.schemas.website_visit)
+            params.schemas.website_visit.validate(transformed)
         except jsonschema.ValidationError as e:
             print(f"Valid data validation error: {e.message}")
             raise
@@ -35,9 +35,9 @@ def transform_website(params: WebsiteTransformerParams):
 
     if params.schemas.website is not None:
         try:
-            jsonschema.validate(instance=transformed, schema=params.schemas.website)
+            params.schemas.website.validate(transformed)
         except jsonschema.ValidationError as e:
             print(f"Valid data validation error: {e.message}")
             raise
-    params.metadata.record("website", None)
+    params.metadata.record("website")
     return transformed
@@ -1,4 +1,3 @@
-import gzip
 import json
 import os
 import sqlite3
@@ -7,71 +6,144 @@ import uuid
 from collections.abc import Iterator
 from datetime import datetime, timezone
 from pathlib import Path
-
-import jsonlines
-from dotenv import load_dotenv
+from typing import Callable, Optional
 
 from firefox.config import PLUGIN_NAME, VISIT_DATE_DEDUPE_BUCKET
+from firefox.transform.canon_writer import CanonOptions, RecordSink, canon_writer, remove_outputs
+from firefox.transform.checkpoints import CheckpointStore
+from firefox.transform.dedup import RecordIndex
 from firefox.transform.mappers.transformer_params import WebsiteTransformerParams, WebsiteVisitTransformerParams
 from firefox.transform.mappers.visit import transform_website_visit
 from firefox.transform.mappers.website import transform_website
+from firefox.transform.memory import MemoryMonitor, MemoryOptions
 from firefox.transform.meta import TransformRunMetadata
 from firefox.transform.models import MozHistoryVisit, MozPlace
+from firefox.transform.parallel import merge_canon, merge_metadata, run_parts
 from firefox.transform.restore_sqlite_from_gzip_dump import restore_sqlite_from_gzip_dump
 from firefox.transform.schemas import Schemas
-
-load_dotenv()
-
-
-def run_transform(out_dir: str, in_dir: str, schemas: Schemas):
+from firefox.transform.timers import timed
+
+# Writes records from somewhere other than the dumps in in_dir, the run command streams them from the extract
+Source = Callable[[RecordSink, TransformRunMetadata, Schemas], None]
+
+
+def run_transform(
+    out_dir: str,
+    in_dir: str,
+    schemas: Schemas,
+    canon: Optional[CanonOptions] = None,
+    memory: Optional[MemoryOptions] = None,
+    workers: int = 1,
+    incremental: bool = False,
+    # Instead of every input file in in_dir, --watch passes the ones that settled
+    inputs: Optional[list[Path]] = None,
+    dedup: bool = False,
+    source: Optional[Source] = None,
+):
+    canon = canon or CanonOptions()
     file_name = f"{PLUGIN_NAME}_canon_{timestamp(datetime.now(timezone.utc))}_{str(uuid.uuid4()).split('-')[0]}"
     file_path = os.path.join(out_dir, file_name)
-    canon_file = f"{file_path}.jsonl.gz"
     metadata_file = f"{file_path}.meta.json"
 
     metadata = TransformRunMetadata()
     metadata.start()
-    log_every = 10000
-    row_count = 0
-
-    with tempfile.TemporaryDirectory() as tmpdir:
-        tmpdir = Path(tmpdir)
-        restored_dbs: list[Path] = []
-        for dump_path in Path(in_dir).iterdir():
-            if dump_path.is_file() and dump_path.name.endswith(".sql.gz"):
-                restored_db = tmpdir / dump_path.stem.replace(".sql", "")
-                restore_sqlite_from_gzip_dump(dump_path, restored_db)
-                restored_dbs.append(restored_db)
-
-        with gzip.open(canon_file, "wt", encoding="utf-8") as gz:
-            writer = jsonlines.Writer(gz)
-
-            for db_path in restored_dbs:
-                for row in fetch_websites(db_path):
-                    row_count += 1
-                    params = WebsiteTransformerParams(schemas=schemas, metadata=metadata, place=row)
-                    writer.write(transform_website(params))
-
-                    if row_count % log_every == 0:
-                        print(
-                            f"Processed {row_count} rows "
-                            f"(website={metadata.counts.get('website')}, "
-                            f"website_visits={metadata.counts.get('website_visit')})"
-                        )
-                for row in fetch_website_visits(db_path):
-                    row_count += 1
-                    params = WebsiteVisitTransformerParams(schemas=schemas, metadata=metadata, place=row)
-                    writer.write(transform_website_visit(params))
-
-                    if row_count % log_every == 0:
-                        print(
-                            f"Processed {row_count} rows "
-                            f"(website={metadata.counts.get('website')}, "
-                            f"website_visits={metadata.counts.get('website_visit')})"
-                        )
+    metadata.validation = schemas.validation
+    metadata.timers = schemas.validation.timers
+    metadata.schema_load_timings = schemas.load_timings
+    metadata.codec = canon.to_dict()
+    metadata.memory = MemoryMonitor(memory)
+    checkpoints = CheckpointStore(out_dir, incremental)
+    index = RecordIndex(out_dir, dedup)
+    dumps = checkpoints.filter(dump_files(Path(in_dir)) if inputs is None else inputs) if source is None else []
 
+    try:
+        if workers > 1:
+            with metadata.memory, tempfile.TemporaryDirectory(dir=out_dir, prefix=".parts_") as parts_dir:
+                parts = run_parts(transform_dump, dumps, Path(parts_dir), workers, canon, memory, schemas)
+                merge_metadata(metadata, parts, workers)
+                writer = merge_canon(metadata, parts, file_path, canon, index=index)
+        else:
+            with (
+                metadata.memory,
+                canon_writer(file_path, canon, timers=metadata.timers) as writer,
+                index.writer(writer) as indexed,
+                metadata.memory.writer(indexed) as sink,
+            ):
+                if source is not None:
+                    source(sink, metadata, schemas)
+                for dump_path in dumps:
+                    transform_dump(dump_path, sink, metadata, schemas)
+
+        metadata.shards = writer.manifest()
+        metadata.writer = writer.stats()
+        if schemas.validation_pool is not None:
+            schemas.validation_pool.finish()
+    except BaseException:
+        # Whatever stopped the run, don't leave a complete looking canon file behind
+        remove_outputs(out_dir, file_name)
+        index.close()
+        if schemas.validation_pool is not None:
+            schemas.validation_pool.close()
+        raise
+
+    metadata.checkpoints = checkpoints.to_dict()
+    metadata.dedup = index.to_dict()
+    index.remove_suppressed(metadata.counts)
     with Path(metadata_file).open("w", encoding="utf-8") as f:
         json.dump(metadata.to_dict(), f, indent=2)
+    checkpoints.commit(file_name)
+    index.commit()
+
+
+def dump_files(in_dir: Path) -> list[Path]:
+    return sorted(path for path in in_dir.iterdir() if path.is_file() and path.name.endswith(".sql.gz"))
+
+
+# Restores one dump and maps it, this is also what a --workers process runs for each dump
+def transform_dump(dump_path: Path, writer: RecordSink, metadata: TransformRunMetadata, schemas: Schemas) -> None:
+    metadata.add_files_processed(dump_path)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        db_path = Path(tmpdir) / dump_path.stem.replace(".sql", "")
+        with metadata.timers.timer("restore", file=dump_path.name):
+            restore_sqlite_from_gzip_dump(dump_path, db_path)
+        transform_database(db_path, writer, metadata, schemas)
+
+
+def transform_database(db_path: Path, writer: RecordSink, metadata: TransformRunMetadata, schemas: Schemas) -> None:
+    log_every = 10000
+    row_count = 0
+    # Mapping time includes the validation done by the mappers, which is also timed on its own as "validate"
+    website_timer = metadata.timers.per_record("map", entity="website", file=db_path.name)
+    visit_timer = metadata.timers.per_record("map", entity="websiteVisit", file=db_path.name)
+    websites = timed(fetch_websites(db_path), metadata.timers.per_record("read", file=db_path.name))
+    for row in websites:
+        row_count += 1
+        params = WebsiteTransformerParams(schemas=schemas, metadata=metadata, place=row)
+        with website_timer():
+            transformed = transform_website(params)
+        writer.write(transformed)
+
+        if row_count % log_every == 0:
+            print(
+                f"Processed {row_count} rows "
+                f"(website={metadata.counts.get('website')}, "
+                f"website_visits={metadata.counts.get('website_visit')})"
+            )
+    visits = timed(fetch_website_visits(db_path), metadata.timers.per_record("read", file=db_path.name))
+    for row in visits:
+        row_count += 1
+        params = WebsiteVisitTransformerParams(schemas=schemas, metadata=metadata, place=row)
+        with visit_timer():
+            transformed = transform_website_visit(params)
+        writer.write(transformed)
+
+        if row_count % log_every == 0:
+            print(
+                f"Processed {row_count} rows "
+                f"(website={metadata.counts.get('website')}, "
+                f"website_visits={metadata.counts.get('website_visit')})"
+            )
 
 
 def fetch_websites(db_path: Path) -> Iterator[MozPlace]:
@@ -0,0 +1,107 @@
+import threading
+import time
+from pathlib import Path
+from queue import Queue
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    from firefox.transform.canon_writer import CanonWriter, ShardedCanonWriter
+
+
+# Records are handed to a single writer thread in batches through a bounded queue, so encoding/compression/disk writes
+# overlap with mapping. A full queue blocks the caller (stall), which keeps memory bounded when the disk is the bottleneck
+class WriteBehindWriter:
+    def __init__(self, writer: "CanonWriter | ShardedCanonWriter", queue_size: int, batch_size: int):
+        self.writer = writer
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.batch: list[Any] = []
+        self.queue: Queue[Optional[list[Any]]] = Queue(maxsize=queue_size)
+        self.error: Optional[BaseException] = None
+        self.batches = 0
+        self.depth_total = 0
+        self.max_depth = 0
+        self.stall_seconds = 0.0
+        self.idle_seconds = 0.0
+        self.thread = threading.Thread(target=self._run, name="canon-writer", daemon=True)
+        self.thread.start()
+
+    def __enter__(self) -> "WriteBehindWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def write(self, record: Any) -> None:
+        self.batch.append(record)
+        if len(self.batch) >= self.batch_size:
+            self._put(self.batch)
+            self.batch = []
+
+    def close(self) -> None:
+        if self.thread.is_alive():
+            if self.batch and self.error is None:
+                self._put(self.batch)
+            self.batch = []
+            self.queue.put(None)
+            self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    @property
+    def paths(self) -> list[Path]:
+        return self.writer.paths
+
+    def remove(self) -> None:
+        self.writer.remove()
+
+    def manifest(self) -> list[dict[str, Any]]:
+        return self.writer.manifest()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            **self.writer.stats(),
+            "queue_size": self.queue_size,
+            "batch_size": self.batch_size,
+            "batches": self.batches,
+            "max_queue_depth": self.max_depth,
+            "mean_queue_depth": round(self.depth_total / self.batches, 2) if self.batches else 0,
+            "stall_seconds": round(self.stall_seconds, 3),
+            "writer_idle_seconds": round(self.idle_seconds, 3),
+        }
+
+    def _put(self, batch: list[Any]) -> None:
+        if self.error is not None:
+            raise self.error
+        started = time.perf_counter()
+        self.queue.put(batch)
+        self.stall_seconds += time.perf_counter() - started
+        # Batches waiting for the writer right after this one was queued
+        depth = self.queue.qsize()
+        self.batches += 1
+        self.depth_total += depth
+        self.max_depth = max(self.max_depth, depth)
+
+    def _run(self) -> None:
+        try:
+            while True:
+                started = time.perf_counter()
+                batch = self.queue.get()
+                self.idle_seconds += time.perf_counter() - started
+                if batch is None:
+                    break
+                # After a failure keep draining so the caller never blocks on a full queue
+                if self.error is None:
+                    self._write(batch)
+        finally:
+            try:
+                self.writer.close()
+            except Exception as e:
+                self.error = self.error or e
+
+    def _write(self, batch: list[Any]) -> None:
+        try:
+            for record in batch:
+                self.writer.write(record)
+        except Exception as e:
+            self.error = e
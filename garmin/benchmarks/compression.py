@@ -0,0 +1,46 @@
+"""
+Time and ratio of writing a canon file with each codec/level through CanonWriter.
+
+    uv run python benchmarks/compression.py --rows 200000 --workers 1
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from validation import heart_rate_rows, location_rows
+
+from garmin.transform.canon_writer import CanonOptions, CanonWriter, json_lines_encoder
+
+CASES = [("gzip", 9), ("gzip", 6), ("zstd", 3), ("zstd", 9)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000, help="Records written per entity type")
+    parser.add_argument("--workers", type=int, default=1, help="Compression threads")
+    args = parser.parse_args()
+
+    rows = heart_rate_rows(args.rows) + location_rows(args.rows)
+    encode = json_lines_encoder("orjson")
+    raw_size = sum(len(encode(row)) for row in rows)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for codec, level in CASES:
+            options = CanonOptions(codec=codec, compression_level=level, compression_workers=args.workers)
+            path = Path(tmp_dir) / f"canon_{codec}_{level}{options.extension}"
+            started = time.perf_counter()
+            with CanonWriter(path, options) as writer:
+                for row in rows:
+                    writer.write(row)
+            elapsed = time.perf_counter() - started
+            size = path.stat().st_size
+            print(
+                f"{codec:<5} level={level:<2} {elapsed:>6.2f}s  {raw_size / elapsed / 1_000_000:>7.1f} MB/s  "
+                f"ratio={raw_size / size:>5.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
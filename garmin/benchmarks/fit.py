@@ -0,0 +1,89 @@
+"""
+Just enough of a FIT encoder to write synthetic activity files that fitdecode reads back like the ones Garmin exports:
+file_id, record, lap, session and the undocumented device status message (104) the parser picks up.
+"""
+
+import struct
+from datetime import datetime, timezone
+
+# Seconds between the unix and FIT (1989-12-31) epochs
+FIT_EPOCH = 631065600
+SEMICIRCLES = 2**31 / 180
+
+ENUM = (0x00, "B")
+SINT8 = (0x01, "b")
+UINT8 = (0x02, "B")
+UINT16 = (0x84, "H")
+UINT32 = (0x86, "I")
+SINT32 = (0x85, "i")
+UINT32Z = (0x8C, "I")
+
+# Global message number and fields as (field number, base type)
+FILE_ID = (0, [(0, ENUM), (1, UINT16), (2, UINT16), (3, UINT32Z), (4, UINT32)])
+RECORD = (
+    20,
+    [(253, UINT32), (0, SINT32), (1, SINT32), (3, UINT8), (4, UINT8), (5, UINT32), (73, UINT32), (78, UINT32)],
+)
+LAP = (19, [(253, UINT32), (2, UINT32), (7, UINT32), (8, UINT32), (9, UINT32), (15, UINT8), (16, UINT8)])
+SESSION = (18, [(253, UINT32), (2, UINT32), (5, ENUM), (6, ENUM), (7, UINT32), (9, UINT32), (16, UINT8), (124, UINT32)])
+DEVICE_STATUS = (104, [(253, UINT32), (2, UINT8), (3, SINT8)])
+
+CRC_TABLE = (
+    0x0000,
+    0xCC01,
+    0xD801,
+    0x1400,
+    0xF001,
+    0x3C00,
+    0x2800,
+    0xE401,
+    0xA001,
+    0x6C00,
+    0x7800,
+    0xB401,
+    0x5000,
+    0x9C01,
+    0x8801,
+    0x4400,
+)
+
+
+def crc16(data: bytes, crc: int = 0) -> int:
+    for byte in data:
+        tmp = CRC_TABLE[crc & 0xF]
+        crc = (crc >> 4) & 0x0FFF
+        crc = crc ^ tmp ^ CRC_TABLE[byte & 0xF]
+        tmp = CRC_TABLE[crc & 0xF]
+        crc = (crc >> 4) & 0x0FFF
+        crc = crc ^ tmp ^ CRC_TABLE[(byte >> 4) & 0xF]
+    return crc
+
+
+def fit_time(ts: datetime) -> int:
+    return int(ts.astimezone(timezone.utc).timestamp()) - FIT_EPOCH
+
+
+def semicircles(degrees: float) -> int:
+    return round(degrees * SEMICIRCLES)
+
+
+class FitFile:
+    def __init__(self) -> None:
+        self.body = bytearray()
+        self.local_types: dict[int, int] = {}
+
+    def write(self, message: tuple[int, list], *values: int) -> None:
+        number, fields = message
+        local = self.local_types.get(number)
+        if local is None:
+            local = self.local_types[number] = len(self.local_types)
+            self.body += struct.pack("<BBBHB", 0x40 | local, 0, 0, number, len(fields))
+            for field, (base_type, fmt) in fields:
+                self.body += struct.pack("<BBB", field, struct.calcsize(fmt), base_type)
+        self.body += struct.pack("<B" + "".join(fmt for _, (_, fmt) in fields), local, *values)
+
+    def to_bytes(self) -> bytes:
+        header = struct.pack("<BBHI4s", 14, 0x20, 2132, len(self.body), b".FIT")
+        header += struct.pack("<H", crc16(header))
+        data = header + self.body
+        return data + struct.pack("<H", crc16(data))
@@ -0,0 +1,54 @@
+"""
+Serialized MB/s of canon records, jsonlines.Writer (before) vs the CanonWriter encoders batching lines into one buffer.
+
+    uv run python benchmarks/serialization.py --rows 200000
+"""
+
+import argparse
+import io
+import time
+from typing import Any, Callable
+
+import jsonlines
+from validation import heart_rate_rows, location_rows
+
+from garmin.transform.canon_writer import JSON_ENCODERS, json_lines_encoder
+
+
+def jsonlines_writer(rows: list[dict[str, Any]]) -> int:
+    buffer = io.StringIO()
+    writer = jsonlines.Writer(buffer)
+    for row in rows:
+        writer.write(row)
+    return len(buffer.getvalue().encode("utf-8"))
+
+
+def batched(encode: Callable[[Any], bytes]) -> Callable[[list[dict[str, Any]]], int]:
+    def run(rows: list[dict[str, Any]]) -> int:
+        return len(b"".join([encode(row) for row in rows]))
+
+    return run
+
+
+def mb_per_sec(serialize: Callable[[list[dict[str, Any]]], int], rows: list[dict[str, Any]]) -> float:
+    started = time.perf_counter()
+    size = serialize(rows)
+    return size / (time.perf_counter() - started) / 1_000_000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000, help="Records serialized per entity type")
+    args = parser.parse_args()
+
+    for name, rows in [("heartRate", heart_rate_rows(args.rows)), ("location", location_rows(args.rows))]:
+        before = mb_per_sec(jsonlines_writer, rows)
+        results = [f"jsonlines={before:>7.1f} MB/s"]
+        for encoder in JSON_ENCODERS:
+            after = mb_per_sec(batched(json_lines_encoder(encoder)), rows)
+            results.append(f"{encoder}={after:>7.1f} MB/s ({after / before:.1f}x)")
+        print(f"{name:<10} " + "  ".join(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Deterministic synthetic Garmin exports for the transform benchmark. One tar.gz per run, laid out like the extractor's:
+a device file, daily HR and sleep JSON and a FIT activity per day. Roughly 1000 canon records per day.
+
+    uv run python benchmarks/synthetic.py --rows 100000 --out_dir /tmp/garmin_in
+"""
+
+import argparse
+import json
+import random
+import tarfile
+import tempfile
+import types
+import typing
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+from fit import DEVICE_STATUS, FILE_ID, LAP, RECORD, SESSION, FitFile, fit_time, semicircles
+from pydantic import BaseModel
+
+from garmin.config import ACTIVITY_FOLDER, DEVICE_FOLDER, HR_FOLDER, SLEEP_FOLDER
+from garmin.transform.models.device import Device
+from garmin.transform.models.sleep import Sleep
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+DEVICE_ID = 3442970000
+FILE_ID_PREFIX = "bench"
+HR_PER_DAY = 500
+STAGES_PER_DAY = 99
+RECORDS_PER_ACTIVITY = 200
+ROWS_PER_DAY = HR_PER_DAY + STAGES_PER_DAY + 1 + RECORDS_PER_ACTIVITY * 2 + 3
+
+
+# Placeholder values for every required field of the generated Garmin API models, the mappers only read a few of them
+def placeholder(annotation: Any) -> Any:
+    origin = typing.get_origin(annotation)
+    if annotation is type(None) or origin in (typing.Union, types.UnionType) or annotation is Any:
+        return None
+    if origin is list:
+        return []
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return {
+            name: placeholder(field.annotation)
+            for name, field in annotation.model_fields.items()
+            if field.is_required()
+        }
+    return {bool: False, int: 0, float: 0.0, str: "", datetime: START.isoformat()}[annotation]
+
+
+def device_file() -> dict[str, Any]:
+    device = placeholder(Device)
+    registered = placeholder(Device.model_fields["RegisteredDevices"].annotation.__args__[0])
+    device["RegisteredDevices"] = [{**registered, "deviceId": DEVICE_ID, "deviceTypeSimpleName": "Forerunner 965"}]
+    return device
+
+
+def hr_file(day: datetime, rng: random.Random) -> dict[str, Any]:
+    start_ms = int(day.timestamp() * 1000)
+    step_ms = 86_400_000 // HR_PER_DAY
+    return {
+        "userProfilePK": 1,
+        "calendarDate": day.date().isoformat(),
+        "heartRateValues": [[start_ms + i * step_ms, rng.randint(45, 170)] for i in range(HR_PER_DAY)],
+    }
+
+
+def sleep_file(day: datetime, index: int, rng: random.Random) -> dict[str, Any]:
+    sleep = placeholder(Sleep)
+    started = day - timedelta(hours=2)
+    stage_length = timedelta(minutes=5)
+    dto = sleep["dailySleepDTO"]
+    dto["id"] = int(started.timestamp() * 1000) + index
+    dto["calendarDate"] = day.date().isoformat()
+    dto["sleepStartTimestampGMT"] = int(started.timestamp() * 1000)
+    dto["sleepEndTimestampGMT"] = int((started + stage_length * STAGES_PER_DAY).timestamp() * 1000)
+    dto["sleepScores"]["overall"]["value"] = rng.randint(40, 100)
+    sleep["sleepLevels"] = [
+        {
+            "startGMT": (started + stage_length * i).replace(tzinfo=None).isoformat(),
+            "endGMT": (started + stage_length * (i + 1)).replace(tzinfo=None).isoformat(),
+            "activityLevel": float(rng.randint(0, 3)),
+        }
+        for i in range(STAGES_PER_DAY)
+    ]
+    return sleep
+
+
+def activity_file(day: datetime, rng: random.Random) -> bytes:
+    started = day + timedelta(hours=7)
+    fit = FitFile()
+    fit.write(FILE_ID, 4, 1, 4315, DEVICE_ID, fit_time(started))
+    lat, lng = 45.5 + rng.random() / 10, -73.6 + rng.random() / 10
+    distance = 0
+    for i in range(RECORDS_PER_ACTIVITY):
+        lat += rng.uniform(-0.0001, 0.0001)
+        lng += rng.uniform(-0.0001, 0.0001)
+        distance += rng.randint(200, 400)
+        # Scaled like the FIT profile: distance in cm, speed in mm/s, altitude (m + 500) * 5
+        fit.write(
+            RECORD,
+            fit_time(started + timedelta(seconds=i)),
+            semicircles(lat),
+            semicircles(lng),
+            rng.randint(120, 180),
+            rng.randint(80, 95),
+            distance,
+            rng.randint(2500, 3500),
+            (rng.randint(20, 60) + 500) * 5,
+        )
+        if i % (RECORDS_PER_ACTIVITY // 2) == 0:
+            fit.write(DEVICE_STATUS, fit_time(started + timedelta(seconds=i)), rng.randint(20, 100), 25)
+    ended = started + timedelta(seconds=RECORDS_PER_ACTIVITY)
+    elapsed_ms = RECORDS_PER_ACTIVITY * 1000
+    fit.write(LAP, fit_time(ended), fit_time(started), elapsed_ms, elapsed_ms, distance, 150, 180)
+    fit.write(SESSION, fit_time(ended), fit_time(started), 1, 0, elapsed_ms, distance, 150, 3000)
+    return fit.to_bytes()
+
+
+def generate(out_dir: Path, rows: int, seed: int = 0) -> Path:
+    rng = random.Random(seed)
+    days = max(1, round(rows / ROWS_PER_DAY))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    archive = out_dir / f"{START.date().isoformat()}_{FILE_ID_PREFIX}.tar.gz"
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir)
+        for folder in (DEVICE_FOLDER, HR_FOLDER, SLEEP_FOLDER, ACTIVITY_FOLDER):
+            (root / folder).mkdir()
+        (root / DEVICE_FOLDER / f"{FILE_ID_PREFIX}_device_data.json").write_text(json.dumps(device_file()))
+        mapping = {}
+        for index in range(days):
+            day = START + timedelta(days=index)
+            prefix = f"{day.date().isoformat()}_{FILE_ID_PREFIX}"
+            (root / HR_FOLDER / f"{prefix}_daily_hr.json").write_text(json.dumps(hr_file(day, rng)))
+            (root / SLEEP_FOLDER / f"{prefix}_daily_sleep_data.json").write_text(
+                json.dumps(sleep_file(day, index, rng))
+            )
+            activity_id = str(10_000_000 + index)
+            mapping[activity_id] = f"Morning Run {index}"
+            (root / ACTIVITY_FOLDER / f"{prefix}_{activity_id}_ACTIVITY.fit").write_bytes(activity_file(day, rng))
+        (root / ACTIVITY_FOLDER / f"{prefix}_activity_mapping.json").write_text(json.dumps(mapping))
+        with tarfile.open(archive, "w:gz") as tar:
+            for item in sorted(root.iterdir()):
+                tar.add(item, arcname=item.name)
+    return archive
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000, help="Approximate canon records the export turns into")
+    parser.add_argument("--out_dir", required=True, type=Path)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(generate(args.out_dir, args.rows, args.seed))
+
+
+if __name__ == "__main__":
+    main()
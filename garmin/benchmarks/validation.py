@@ -0,0 +1,85 @@
+"""
+Rows/sec of canon schema validation, per call `jsonschema.validate` (before) vs the compiled validators returned by
+`get_schemas()` (after).
+
+    uv run python benchmarks/validation.py --rows 20000
+"""
+
+import argparse
+import time
+from collections.abc import Callable
+from typing import Any
+
+import jsonschema
+
+from garmin.config import PLUGIN_NAME
+from garmin.transform.mappers.utils.to_utc_iso_from_epoch import to_utc_iso_from_epoch
+from garmin.transform.schemas import get_schemas
+
+START_MS = 1_700_000_000_000
+
+
+def heart_rate_rows(count: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "entityType": "heartRate",
+            "version": "1",
+            "id": f"{PLUGIN_NAME}_{START_MS + i * 1000}",
+            "source": PLUGIN_NAME,
+            "recordedAt": to_utc_iso_from_epoch(START_MS + i * 1000),
+            "heartRate": 60 + i % 100,
+            "deviceId": "3442970000",
+        }
+        for i in range(count)
+    ]
+
+
+def location_rows(count: int) -> list[dict[str, Any]]:
+    return [
+        {
+            "entityType": "location",
+            "version": "1",
+            "id": f"{PLUGIN_NAME}_{START_MS / 1000 + i}",
+            "source": PLUGIN_NAME,
+            "recordedAt": to_utc_iso_from_epoch(START_MS + i * 1000),
+            "deviceId": "3442970000",
+            "location": {"lat": 45.5 + i * 1e-5, "lng": -73.5 - i * 1e-5},
+            "timezone": "America/Toronto",
+            "altitude": 40,
+            "velocity": 10.5,
+        }
+        for i in range(count)
+    ]
+
+
+def rows_per_sec(validate: Callable[[dict[str, Any]], None], rows: list[dict[str, Any]]) -> float:
+    started = time.perf_counter()
+    for row in rows:
+        validate(row)
+    return len(rows) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000, help="Records validated per entity type")
+    args = parser.parse_args()
+
+    schemas = get_schemas()
+    cases = [
+        ("heartRate", schemas.heart_rate, heart_rate_rows(args.rows)),
+        ("location", schemas.location, location_rows(args.rows)),
+    ]
+
+    for name, compiled, rows in cases:
+        if compiled is None:
+            print(f"{name}: schema checks are skipped, nothing to measure")
+            continue
+
+        schema = compiled.schema
+        before = rows_per_sec(lambda row, schema=schema: jsonschema.validate(instance=row, schema=schema), rows)
+        after = rows_per_sec(compiled.validate, rows)
+        print(f"{name:<10} before={before:>10,.0f} rows/s  after={after:>10,.0f} rows/s  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
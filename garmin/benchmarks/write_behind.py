@@ -0,0 +1,47 @@
+"""
+Time spent in the mapping loop writing canon records inline vs through the write-behind thread.
+
+    uv run python benchmarks/write_behind.py --rows 200000
+"""
+
+import argparse
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from validation import heart_rate_rows, location_rows
+
+from garmin.transform.canon_writer import CanonOptions, canon_writer
+
+
+def mapped(row: dict) -> dict:
+    # Roughly what a mapper does per record
+    recorded_at = datetime.fromisoformat(row["recordedAt"].replace("Z", "+00:00"))
+    return {**row, "recordedAt": recorded_at.isoformat().replace("+00:00", "Z")}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200_000, help="Records written per entity type")
+    parser.add_argument("--codec", default="gzip")
+    args = parser.parse_args()
+
+    rows = heart_rate_rows(args.rows) + location_rows(args.rows)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for queue_size in (0, 64):
+            options = CanonOptions(codec=args.codec, write_queue_size=queue_size)
+            started = time.perf_counter()
+            with canon_writer(Path(tmp_dir) / f"canon_{queue_size}", options) as writer:
+                for row in rows:
+                    writer.write(mapped(row))
+            elapsed = time.perf_counter() - started
+            stats = writer.stats()
+            print(
+                f"write_queue_size={queue_size:<3} {elapsed:>6.2f}s  {stats['records_per_second']:>8} records/s  "
+                f"stall={stats.get('stall_seconds', '-')}s"
+            )
+
+
+if __name__ == "__main__":
+    main()
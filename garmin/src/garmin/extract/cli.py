@@ -1,27 +1,27 @@
 import argparse
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import NamedTuple
 
 from dotenv import load_dotenv
 
-from garmin.extract.run import ExtractionParams, run_extract
-
-load_dotenv()
+from garmin.profiling import add_profile_args, profiled
 
 
 @dataclass
 class EnvVars:
-    username: str = os.environ["GARMIN_USERNAME"]
-    email: str = os.environ["GARMIN_EMAIL"]
-    password: str = os.environ["GARMIN_PASSWORD"]
+    username: str = field(default_factory=lambda: os.environ["GARMIN_USERNAME"])
+    email: str = field(default_factory=lambda: os.environ["GARMIN_EMAIL"])
+    password: str = field(default_factory=lambda: os.environ["GARMIN_PASSWORD"])
 
 
 class ExtractorArgs(NamedTuple):
     start_date: datetime
     out_dir: Path
+    profile: bool
+    profile_top: int
 
 
 def parse_extract_args() -> ExtractorArgs:
@@ -41,14 +41,19 @@ def parse_extract_args() -> ExtractorArgs:
         help="Output directory path",
     )
 
+    add_profile_args(parser)
     args = parser.parse_args()
 
-    return ExtractorArgs(start_date=args.start_date, out_dir=args.out_dir)
+    return ExtractorArgs(
+        start_date=args.start_date, out_dir=args.out_dir, profile=args.profile, profile_top=args.profile_top
+    )
 
 
 def extract():
     args = parse_extract_args()
     env = EnvVars()
+    # garth takes about half a second to import, not needed for --help or a missing env var
+    from garmin.extract.run import ExtractionParams, run_extract
 
     print("Start date:", args.start_date)
     print("Output dir:", args.out_dir)
@@ -60,10 +65,12 @@ def extract():
         email=env.email,
         password=env.password,
     )
-    run_extract(params)
+    with profiled(args.profile, args.out_dir, "extract", args.profile_top):
+        run_extract(params)
 
 
 def main():
+    load_dotenv()
     extract()
 
 
@@ -1,14 +1,14 @@
+import io
 import json
-import os
-import shutil
 import tarfile
-import tempfile
 import uuid
 import zipfile
+from collections.abc import Iterator
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from time import sleep
+from typing import Any
 
 import garth
 
@@ -35,58 +35,73 @@ garmin_connect_device_url = "/web-gateway/device-info/primary-training-device"
 day_delay = 2
 
 
+# Archive member (folder/file name, as laid out in the raw tar.gz) and its content
+Payload = tuple[str, bytes]
+
+
 def run_extract(params: ExtractionParams):
     extract_start = datetime.now(timezone.utc)
     garth.login(params.email, params.password)
     file_id = str(uuid.uuid4()).split("-")[0]
 
-    curr_date = params.start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    fetch_device_data(params, file_id)
-    while curr_date < datetime.now(tz=timezone.utc) - timedelta(days=day_delay):
-        fetch_data_for_day(params, curr_date, file_id)
-        curr_date = curr_date + timedelta(days=1)
-        sleep(1)
-    fetch_activity_data(params, file_id)
-    start_day = params.start_date.strftime("%Y-%m-%d")
-    end_day = curr_date.strftime("%Y-%m-%d")
-    final_file_name = f"{PLUGIN_NAME}_{start_day}_{end_day}_{file_id}"
+    days, end_date = extraction_days(params.start_date)
+    for name, data in fetch_payloads(params, file_id, days):
+        path = params.out_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+    final_file_name = archive_name(params.start_date, end_date, file_id)
     archive_in_place(str(params.out_dir), final_file_name)
-    data_window_start = params.start_date.replace(hour=0, minute=0, second=0, microsecond=0)
-    # One day buffer
-    data_window_end = curr_date - timedelta(days=1)
     write_meta_file(
         out_dir=params.out_dir,
         file_name=final_file_name,
         extract_start=extract_start,
-        data_window_start=data_window_start.isoformat(),
-        data_window_end=data_window_end.isoformat(),
+        **data_window(params.start_date, end_date),
     )
 
 
-def fetch_device_data(params: ExtractionParams, file_id: str):
-    device_data_file = params.out_dir / DEVICE_FOLDER / f"{file_id}_device_data.json"
-    device_data_file.parent.mkdir(parents=True, exist_ok=True)
+def extraction_days(start_date: datetime) -> tuple[list[datetime], datetime]:
+    # Every day to fetch, and the day after the last one
+    curr_date = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    days = []
+    while curr_date < datetime.now(tz=timezone.utc) - timedelta(days=day_delay):
+        days.append(curr_date)
+        curr_date = curr_date + timedelta(days=1)
+    return days, curr_date
+
+
+def archive_name(start_date: datetime, end_date: datetime, file_id: str) -> str:
+    return f"{PLUGIN_NAME}_{start_date.strftime('%Y-%m-%d')}_{end_date.strftime('%Y-%m-%d')}_{file_id}"
+
+
+def data_window(start_date: datetime, end_date: datetime) -> dict[str, str]:
+    data_window_start = start_date.replace(hour=0, minute=0, second=0, microsecond=0)
+    # One day buffer
+    data_window_end = end_date - timedelta(days=1)
+    return {"data_window_start": data_window_start.isoformat(), "data_window_end": data_window_end.isoformat()}
+
+
+# Device first and the activity names ahead of the FIT files, the order the transform needs them in
+def fetch_payloads(params: ExtractionParams, file_id: str, days: list[datetime]) -> Iterator[Payload]:
+    yield fetch_device_data(file_id)
+    for day in days:
+        yield from fetch_data_for_day(params, day, file_id)
+        sleep(1)
+    yield from fetch_activity_data(params, file_id)
+
+
+def fetch_device_data(file_id: str) -> Payload:
     device_data = garth.connectapi(
         f"{garmin_connect_device_url}",
     )
-    device_data_file.write_text(json.dumps(device_data))
+    return f"{DEVICE_FOLDER}/{file_id}_device_data.json", json.dumps(device_data).encode()
 
 
-def fetch_activity_data(params: ExtractionParams, file_id: str):
-    day = params.start_date.strftime("%Y-%m-%d")
-    prefix = f"{day}_{file_id}"
-
-    activity_dir = params.out_dir / ACTIVITY_FOLDER
-    activity_dir.mkdir(parents=True, exist_ok=True)
-    activity_mapping_file = params.out_dir / ACTIVITY_FOLDER / f"{prefix}_activity_mapping.json"
-    activity_mapping = {}
-    client = garth.Client()
-
+def list_activities(params: ExtractionParams) -> list[Any]:
     limit = 30
     offset = 0
-    should_continue = True
+    result = []
 
-    while should_continue:
+    while True:
         activities = garth.Activity.list(limit=limit, start=offset)
 
         if not activities:
@@ -102,75 +117,68 @@ def fetch_activity_data(params: ExtractionParams, file_id: str):
                 continue
 
             if activity_start.astimezone(timezone.utc) < params.start_date.astimezone(timezone.utc):
-                should_continue = False
-                break
-            print(f"Processing activity {activity.start_time_gmt}: {activity.activity_name}")
-            activity_mapping[activity.activity_id] = activity.activity_name
-            result = client.get(
-                "connectapi",
-                f"{garmin_connect_download_service_url}/activity/{activity.activity_id}",
-            )
+                return result
+            result.append(activity)
 
-            activity_zip = activity_dir / f"{prefix}_activity_{activity.activity_id}.zip"
-
-            with open(activity_zip, "wb") as file:
-                for chunk in result:
-                    file.write(chunk)
-
-            with tempfile.TemporaryDirectory() as tmpdir:
-                with zipfile.ZipFile(activity_zip, "r") as zip_ref:
-                    zip_ref.extractall(tmpdir)  # noqa: S202
+        offset += limit
+        sleep(1)
+    return result
 
-                for extracted in Path(tmpdir).iterdir():
-                    if extracted.is_file():
-                        new_name = f"{prefix}_{extracted.name}"
-                        shutil.move(str(extracted), activity_dir / new_name)
 
-            os.remove(activity_zip)
+def fetch_activity_data(params: ExtractionParams, file_id: str) -> Iterator[Payload]:
+    day = params.start_date.strftime("%Y-%m-%d")
+    prefix = f"{day}_{file_id}"
 
-        offset += limit
-        sleep(1)
-    activity_mapping_file.write_text(
-        json.dumps(activity_mapping, ensure_ascii=False),
-        encoding="utf-8",
+    activities = list_activities(params)
+    activity_mapping = {activity.activity_id: activity.activity_name for activity in activities}
+    yield (
+        f"{ACTIVITY_FOLDER}/{prefix}_activity_mapping.json",
+        json.dumps(activity_mapping, ensure_ascii=False).encode("utf-8"),
     )
 
-
-def fetch_data_for_day(params: ExtractionParams, current_day: datetime, file_id: str):
+    client = garth.Client()
+    for activity in activities:
+        print(f"Processing activity {activity.start_time_gmt}: {activity.activity_name}")
+        result = client.get(
+            "connectapi",
+            f"{garmin_connect_download_service_url}/activity/{activity.activity_id}",
+        )
+        with zipfile.ZipFile(io.BytesIO(b"".join(result)), "r") as zip_ref:
+            for member in zip_ref.infolist():
+                # Only the files at the top of the zip, like extracting it and moving those did
+                if member.is_dir() or "/" in member.filename:
+                    continue
+                yield f"{ACTIVITY_FOLDER}/{prefix}_{member.filename}", zip_ref.read(member)
+
+
+def fetch_data_for_day(params: ExtractionParams, current_day: datetime, file_id: str) -> Iterator[Payload]:
     day = current_day.strftime("%Y-%m-%d")
     print(f"Fetching day {day}")
 
     prefix = f"{day}_{file_id}"
     name = params.username
 
-    sleep_data_file = params.out_dir / SLEEP_FOLDER / f"{prefix}_daily_sleep_data.json"
-    hr_file = params.out_dir / HR_FOLDER / f"{prefix}_daily_hr.json"
-    # weight_file = params.out_dir / WEIGHT_FOLDER / f"{prefix}_weight_date_range.json"
-
-    sleep_data_file.parent.mkdir(parents=True, exist_ok=True)
-    hr_file.parent.mkdir(parents=True, exist_ok=True)
-    # weight_file.parent.mkdir(parents=True, exist_ok=True)
-
     query_params = {"date": day, "nonSleepBufferMinutes": 60}
     sleep_data = garth.connectapi(
         f"{garmin_connect_sleep_daily_url}/{name}",
         params=query_params,
     )
-    sleep_data_file.write_text(json.dumps(sleep_data))
+    yield f"{SLEEP_FOLDER}/{prefix}_daily_sleep_data.json", json.dumps(sleep_data).encode()
 
     query_params = {"date": day}
     hr_data = garth.connectapi(
         garmin_connect_daily_heart_rate,
         params=query_params,
     )
-    hr_file.write_text(json.dumps(hr_data))
+    yield f"{HR_FOLDER}/{prefix}_daily_hr.json", json.dumps(hr_data).encode()
 
-    query_params = {"startDate": day, "endDate": day}
+    # weight_file = f"{WEIGHT_FOLDER}/{prefix}_weight_date_range.json"
+    # query_params = {"startDate": day, "endDate": day}
     # weight_data = garth.connectapi(
     #     garmin_connect_weight_url,
     #     params=query_params,
     # )
-    # weight_file.write_text(json.dumps(weight_data))
+    # yield weight_file, json.dumps(weight_data).encode()
 
 
 def archive_in_place(source_dir: str, file_name: str):
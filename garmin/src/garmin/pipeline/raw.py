@@ -0,0 +1,38 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+
+# Writes the raw files for audit on a thread of its own while the records are transformed. One thread so they are
+# written in the order they were submitted, the first failure is raised on the next submit or on close
+class RawWriter:
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="raw-writer")
+        self.futures: list[Future[Any]] = []
+
+    def __enter__(self) -> "RawWriter":
+        return self
+
+    def __exit__(self, exc_type: Optional[type[BaseException]], *exc: object) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> None:
+        self.raise_failed()
+        self.futures.append(self.executor.submit(fn, *args))
+
+    def raise_failed(self) -> None:
+        pending = []
+        for future in self.futures:
+            if not future.done():
+                pending.append(future)
+                continue
+            error = future.exception()
+            if error is not None:
+                raise error
+        self.futures = pending
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=True)
+        self.raise_failed()
@@ -0,0 +1,110 @@
+import io
+import tarfile
+import time
+import uuid
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Optional
+
+import garth
+
+from garmin.config import ACTIVITY_FOLDER, DEVICE_FOLDER, HR_FOLDER, SLEEP_FOLDER
+from garmin.extract.meta import write_meta_file
+from garmin.extract.run import ExtractionParams, Payload, archive_name, data_window, extraction_days, fetch_payloads
+from garmin.pipeline.raw import RawWriter
+from garmin.transform.canon_writer import CanonOptions, RecordSink
+from garmin.transform.memory import MemoryOptions
+from garmin.transform.meta import TransformRunMetadata
+from garmin.transform.run import (
+    device_id,
+    parse_activity_mapping,
+    run_transform,
+    transform_activity_file,
+    transform_device_file,
+    transform_hr_file,
+    transform_sleep_file,
+)
+from garmin.transform.schemas import Schemas
+
+
+# Extract and transform in one go: every payload is mapped as soon as it's fetched while the raw archive the extract
+# would have written is written next to it, so there's nothing to read back from disk
+def run_pipeline(
+    params: ExtractionParams,
+    out_dir: Path,
+    schemas: Schemas,
+    canon: Optional[CanonOptions] = None,
+    columnar: bool = False,
+    memory: Optional[MemoryOptions] = None,
+    dedup: bool = False,
+):
+    extract_start = datetime.now(timezone.utc)
+    garth.login(params.email, params.password)
+    file_id = str(uuid.uuid4()).split("-")[0]
+
+    days, end_date = extraction_days(params.start_date)
+    file_name = archive_name(params.start_date, end_date, file_id)
+    archive_path = params.out_dir / f"{file_name}.tar.gz"
+    params.out_dir.mkdir(parents=True, exist_ok=True)
+    source = partial(transform_payloads, fetch_payloads(params, file_id, days), archive_path)
+    try:
+        run_transform(
+            out_dir=str(out_dir),
+            in_dir=str(params.out_dir),
+            schemas=schemas,
+            canon=canon,
+            columnar=columnar,
+            memory=memory,
+            dedup=dedup,
+            source=source,
+        )
+    except BaseException:
+        # Only complete archives are left behind, like the extract
+        archive_path.unlink(missing_ok=True)
+        raise
+    write_meta_file(
+        out_dir=params.out_dir,
+        file_name=file_name,
+        extract_start=extract_start,
+        **data_window(params.start_date, end_date),
+    )
+
+
+def transform_payloads(
+    payloads: Iterable[Payload],
+    archive_path: Path,
+    writer: RecordSink,
+    metadata: TransformRunMetadata,
+    schemas: Schemas,
+) -> None:
+    metadata.add_files_processed(archive_path)
+    deviceId = ""
+    with tarfile.open(archive_path, "w:gz") as tar, RawWriter() as raw:
+        for name, data in payloads:
+            raw.submit(add_member, tar, name, data)
+            folder, file = name.split("/", 1)
+            if folder == DEVICE_FOLDER:
+                records = transform_device_file(file, data, metadata, schemas)
+                deviceId = device_id(records, metadata)
+            elif folder == SLEEP_FOLDER:
+                records = transform_sleep_file(file, data, deviceId, metadata, schemas)
+            elif folder == HR_FOLDER:
+                records = transform_hr_file(file, data, deviceId, metadata, schemas)
+            elif folder == ACTIVITY_FOLDER and file.endswith("_activity_mapping.json"):
+                metadata.activity_mapping = parse_activity_mapping(data)
+                records = []
+            elif folder == ACTIVITY_FOLDER and file.endswith(".fit"):
+                records = transform_activity_file(Path(file), metadata, schemas, data)
+            else:
+                records = []
+            for record in records:
+                writer.write(record)
+
+
+def add_member(tar: tarfile.TarFile, name: str, data: bytes) -> None:
+    info = tarfile.TarInfo(name)
+    info.size = len(data)
+    info.mtime = int(time.time())
+    tar.addfile(info, io.BytesIO(data))
@@ -0,0 +1,59 @@
+import argparse
+import cProfile
+import io
+import pstats
+from collections.abc import Iterator
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from garmin.config import PLUGIN_NAME
+
+DEFAULT_PROFILE_TOP = 30
+
+
+def add_profile_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Run under cProfile, writes a .prof (snakeviz/pstats) and a hot function summary to the output directory",
+    )
+    parser.add_argument(
+        "--profile_top",
+        type=int,
+        default=DEFAULT_PROFILE_TOP,
+        help="Functions listed in the profile summary",
+    )
+
+
+def profile_summary(profiler: cProfile.Profile, top: int) -> str:
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.strip_dirs()
+    for sort in (pstats.SortKey.TIME, pstats.SortKey.CUMULATIVE):
+        out.write(f"Top {top} by {sort.value}\n")
+        stats.sort_stats(sort).print_stats(top)
+    return out.getvalue()
+
+
+# Profiles whatever runs inside, e.g. `with profiled(args.profile, args.out_dir, "transform"): run_transform(...)`.
+# Written even if the run fails, that's often the run worth looking at
+@contextmanager
+def profiled(enabled: bool, out_dir: str | Path, command: str, top: int = DEFAULT_PROFILE_TOP) -> Iterator[None]:
+    if not enabled:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        started = int(datetime.now(timezone.utc).timestamp())
+        base = Path(out_dir) / f"{PLUGIN_NAME}_{command}_profile_{started}"
+        profiler.dump_stats(f"{base}.prof")
+        summary = profile_summary(profiler, top)
+        Path(f"{base}.txt").write_text(summary, encoding="utf-8")
+        print(summary)
+        print(f"Profile written to {base}.prof")
@@ -0,0 +1,360 @@
+import argparse
+import gzip
+import json
+import os
+import time
+from collections import deque
+from collections.abc import Iterator, Sequence
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import IO, Any, Callable, Optional, Protocol
+
+import orjson
+import zstandard
+
+from garmin.transform.timers import PER_RECORD_SAMPLE_EVERY, StageTimer, StageTimers
+from garmin.transform.write_behind import WriteBehindWriter
+
+# Uncompressed bytes per gzip member / zstd frame
+DEFAULT_BLOCK_SIZE = 1024 * 1024
+JSON_ENCODERS = ("json", "orjson")
+CODECS = ("gzip", "zstd")
+DEFAULT_LEVELS = {"gzip": 9, "zstd": 3}
+EXTENSIONS = {"gzip": ".jsonl.gz", "zstd": ".jsonl.zst"}
+DEFAULT_WRITE_QUEUE_SIZE = 64
+DEFAULT_WRITE_BATCH_SIZE = 1000
+
+
+@dataclass
+class CanonOptions:
+    codec: str = "gzip"
+    # Defaults to DEFAULT_LEVELS[codec]
+    compression_level: Optional[int] = None
+    compression_workers: int = field(default_factory=lambda: min(os.cpu_count() or 1, 8))
+    block_size: int = DEFAULT_BLOCK_SIZE
+    # json writes the same bytes jsonlines.Writer did, orjson is faster but its lines are compact
+    json_encoder: str = "json"
+    # One file per entity type, rotated once a shard reaches either budget (None for no limit)
+    shard: bool = False
+    shard_records: Optional[int] = None
+    # Uncompressed bytes
+    shard_bytes: Optional[int] = None
+    # Batches of records queued for the writer thread, 0 writes on the calling thread. With a single CPU there's nothing
+    # to overlap so the thread would only add overhead
+    write_queue_size: int = field(default_factory=lambda: DEFAULT_WRITE_QUEUE_SIZE if (os.cpu_count() or 1) > 1 else 0)
+    write_batch_size: int = DEFAULT_WRITE_BATCH_SIZE
+
+    def __post_init__(self) -> None:
+        if self.codec not in CODECS:
+            raise ValueError("INVALID_CODEC")
+
+    @property
+    def level(self) -> int:
+        return self.compression_level if self.compression_level is not None else DEFAULT_LEVELS[self.codec]
+
+    @property
+    def extension(self) -> str:
+        return EXTENSIONS[self.codec]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"name": self.codec, "level": self.level}
+
+    def shard_full(self, records: int, size: int) -> bool:
+        return (self.shard_records is not None and records >= self.shard_records) or (
+            self.shard_bytes is not None and size >= self.shard_bytes
+        )
+
+
+def add_canon_args(parser: argparse.ArgumentParser) -> None:
+    defaults = CanonOptions()
+    parser.add_argument("--codec", choices=CODECS, default=defaults.codec, help="Canon file compression")
+    parser.add_argument(
+        "--compression_level",
+        type=int,
+        default=None,
+        help=f"Canon file compression level, defaults to {DEFAULT_LEVELS['gzip']} for gzip and {DEFAULT_LEVELS['zstd']} for zstd",
+    )
+    parser.add_argument(
+        "--compression_workers",
+        type=int,
+        default=defaults.compression_workers,
+        help="Threads compressing canon file blocks",
+    )
+    parser.add_argument(
+        "--json_encoder",
+        choices=JSON_ENCODERS,
+        default=defaults.json_encoder,
+        help="json writes the same bytes jsonlines.Writer would, orjson is faster but writes compact lines",
+    )
+    parser.add_argument("--shard", action="store_true", help="Write one canon file per entity type")
+    parser.add_argument("--shard_records", type=int, default=None, help="Start a new shard after this many records")
+    parser.add_argument(
+        "--write_queue_size",
+        type=int,
+        default=defaults.write_queue_size,
+        help=f"Batches of {defaults.write_batch_size} records queued for the writer thread, 0 to write on the main thread. Defaults to {DEFAULT_WRITE_QUEUE_SIZE} (0 with a single CPU)",
+    )
+    parser.add_argument(
+        "--shard_bytes", type=int, default=None, help="Start a new shard after this many uncompressed bytes"
+    )
+
+
+def canon_options(args: argparse.Namespace) -> CanonOptions:
+    return CanonOptions(
+        codec=args.codec,
+        compression_level=args.compression_level,
+        compression_workers=args.compression_workers,
+        json_encoder=args.json_encoder,
+        shard=args.shard,
+        shard_records=args.shard_records,
+        shard_bytes=args.shard_bytes,
+        write_queue_size=args.write_queue_size,
+    )
+
+
+def compressor(codec: str, level: int) -> Callable[[bytes], bytes]:
+    if codec == "zstd":
+        # ZstdCompressor instances can't be shared between threads
+        return lambda block: zstandard.ZstdCompressor(level=level).compress(block)
+    # mtime=0 so the same records always give the same bytes
+    return partial(gzip.compress, compresslevel=level, mtime=0)
+
+
+def open_canon(path: str | Path) -> IO[str]:
+    if str(path).endswith(EXTENSIONS["zstd"]):
+        return zstandard.open(path, "rt", encoding="utf-8")
+    return gzip.open(path, "rt", encoding="utf-8")
+
+
+def read_canon(path: str | Path) -> Iterator[Any]:
+    with open_canon(path) as f:
+        for line in f:
+            yield orjson.loads(line)
+
+
+def json_lines_encoder(name: str) -> Callable[[Any], bytes]:
+    if name == "orjson":
+        return partial(orjson.dumps, option=orjson.OPT_APPEND_NEWLINE)
+    # What jsonlines.Writer uses by default
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    return lambda record: (encode(record) + "\n").encode("utf-8")
+
+
+# Something else fed every record the canon file gets, e.g. the columnar writer
+class RecordSink(Protocol):
+    def write(self, record: Any) -> None: ...
+
+    def close(self) -> None: ...
+
+
+# Lines are batched into blocks and each block is compressed on its own into a gzip member / zstd frame (pigz style) by a
+# thread pool. zlib and zstd release the GIL so blocks compress in parallel, concatenated they're still one valid file
+class CanonWriter:
+    def __init__(
+        self,
+        path: str | Path,
+        options: CanonOptions,
+        tee: Sequence[RecordSink] = (),
+        executor: Optional[ThreadPoolExecutor] = None,
+        timer: Optional[StageTimer] = None,
+    ):
+        self.path = Path(path)
+        self.timer = timer or StageTimer(PER_RECORD_SAMPLE_EVERY)
+        self.options = options
+        self.tee = tee
+        self.encode = json_lines_encoder(options.json_encoder)
+        self.compress = compressor(options.codec, options.level)
+        self.lines: list[bytes] = []
+        self.buffered = 0
+        self.blocks = 0
+        self.records = 0
+        self.size = 0
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+        self.pending: deque[Future[bytes]] = deque()
+        # A shared executor belongs to whoever passed it in
+        self.owns_executor = executor is None
+        self.executor = executor or new_executor(options)
+        self.file = self.path.open("wb")
+
+    def __enter__(self) -> "CanonWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def write(self, record: Any) -> None:
+        with self.timer():
+            line = self.encode(record)
+            self.lines.append(line)
+            self.buffered += len(line)
+            self.records += 1
+            self.size += len(line)
+            if self.buffered >= self.options.block_size:
+                self._flush()
+            for sink in self.tee:
+                sink.write(record)
+
+    def close(self) -> None:
+        try:
+            with self.timer(rows=0):
+                self._flush()
+                if not self.blocks:
+                    # Zero bytes isn't a valid gzip / zstd file, an empty block is
+                    self.file.write(self.compress(b""))
+                while self.pending:
+                    self.file.write(self.pending.popleft().result())
+        finally:
+            if self.executor is not None and self.owns_executor:
+                self.executor.shutdown()
+            self.file.close()
+            for sink in self.tee:
+                sink.close()
+            self.seconds = time.perf_counter() - self.started
+
+    @property
+    def paths(self) -> list[Path]:
+        return [self.path]
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+    def manifest(self) -> list[dict[str, Any]]:
+        return [{"file": self.path.name, "records": self.records, "bytes": self.size}]
+
+    def stats(self) -> dict[str, Any]:
+        return throughput(self.records, self.size, self.seconds)
+
+    def _flush(self) -> None:
+        if not self.lines:
+            return
+        block = b"".join(self.lines)
+        self.lines = []
+        self.buffered = 0
+        self.blocks += 1
+
+        if self.executor is None:
+            self.file.write(self.compress(block))
+            return
+
+        self.pending.append(self.executor.submit(self.compress, block))
+        # Members are written in order, waiting on the oldest also bounds the memory held by queued blocks
+        while len(self.pending) > self.options.compression_workers * 2:
+            self.file.write(self.pending.popleft().result())
+
+
+# Shards are named <file_path>.<entityType>.<n><extension>, every entity type has its own open CanonWriter and they all
+# share one compression pool
+class ShardedCanonWriter:
+    def __init__(
+        self,
+        file_path: str | Path,
+        options: CanonOptions,
+        tee: Sequence[RecordSink] = (),
+        timers: Optional[StageTimers] = None,
+    ):
+        self.file_path = file_path
+        self.options = options
+        self.tee = tee
+        self.timers = timers or StageTimers()
+        self.executor = new_executor(options)
+        self.open: dict[str, CanonWriter] = {}
+        self.closed: list[tuple[str, CanonWriter]] = []
+        self.shard_counts: dict[str, int] = {}
+        self.started = time.perf_counter()
+        self.seconds = 0.0
+
+    def __enter__(self) -> "ShardedCanonWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def write(self, record: Any) -> None:
+        entity = record.get("entityType", "unknown")
+        writer = self.open.get(entity)
+        if writer is None:
+            writer = self._next_shard(entity)
+        writer.write(record)
+        if self.options.shard_full(writer.records, writer.size):
+            writer.close()
+            self.closed.append((entity, self.open.pop(entity)))
+        for sink in self.tee:
+            sink.write(record)
+
+    def close(self) -> None:
+        try:
+            for entity, writer in self.open.items():
+                writer.close()
+                self.closed.append((entity, writer))
+            self.open = {}
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
+            for sink in self.tee:
+                sink.close()
+            self.seconds = time.perf_counter() - self.started
+
+    @property
+    def paths(self) -> list[Path]:
+        return [writer.path for _, writer in [*self.closed, *self.open.items()]]
+
+    def remove(self) -> None:
+        for path in self.paths:
+            path.unlink(missing_ok=True)
+
+    def manifest(self) -> list[dict[str, Any]]:
+        shards = [{"entityType": entity, **writer.manifest()[0]} for entity, writer in self.closed]
+        return sorted(shards, key=lambda shard: shard["file"])
+
+    def stats(self) -> dict[str, Any]:
+        shards = self.manifest()
+        return throughput(sum(s["records"] for s in shards), sum(s["bytes"] for s in shards), self.seconds)
+
+    def _next_shard(self, entity: str) -> CanonWriter:
+        index = self.shard_counts.get(entity, 0)
+        self.shard_counts[entity] = index + 1
+        path = f"{self.file_path}.{entity}.{index:04d}{self.options.extension}"
+        timer = self.timers.per_record("write", entity=entity)
+        self.open[entity] = CanonWriter(path, self.options, executor=self.executor, timer=timer)
+        return self.open[entity]
+
+
+def throughput(records: int, size: int, seconds: float) -> dict[str, Any]:
+    return {
+        "records": records,
+        "bytes": size,
+        "seconds": round(seconds, 3),
+        "records_per_second": round(records / seconds) if seconds else None,
+        "mb_per_second": round(size / seconds / 1_000_000, 2) if seconds else None,
+    }
+
+
+# Everything a run writes to out_dir before its meta file is named <file_name>.*: the canon file or its shards and the
+# Parquet files
+def remove_outputs(out_dir: str | Path, file_name: str) -> None:
+    for path in Path(out_dir).glob(f"{file_name}.*"):
+        path.unlink(missing_ok=True)
+
+
+def new_executor(options: CanonOptions) -> Optional[ThreadPoolExecutor]:
+    return ThreadPoolExecutor(max_workers=options.compression_workers) if options.compression_workers > 1 else None
+
+
+def canon_writer(
+    file_path: str | Path,
+    options: CanonOptions,
+    tee: Sequence[RecordSink] = (),
+    timers: Optional[StageTimers] = None,
+) -> CanonWriter | ShardedCanonWriter | WriteBehindWriter:
+    timers = timers or StageTimers()
+    writer: CanonWriter | ShardedCanonWriter = (
+        ShardedCanonWriter(file_path, options, tee, timers)
+        if options.shard
+        else CanonWriter(f"{file_path}{options.extension}", options, tee, timer=timers.per_record("write"))
+    )
+    if options.write_queue_size > 0:
+        return WriteBehindWriter(writer, options.write_queue_size, options.write_batch_size)
+    return writer
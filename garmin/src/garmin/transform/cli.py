@@ -1,12 +1,16 @@
 import argparse
+from functools import partial
 from pathlib import Path
 
 from dotenv import load_dotenv
 
-from garmin.transform.run import run_transform
-from garmin.transform.schemas import get_schemas
-
-load_dotenv()
+from garmin.profiling import add_profile_args, profiled
+from garmin.transform.canon_writer import add_canon_args, canon_options
+from garmin.transform.checkpoints import add_checkpoint_args
+from garmin.transform.dedup import add_dedup_args
+from garmin.transform.memory import add_memory_args, memory_options
+from garmin.transform.parallel import add_workers_arg
+from garmin.transform.watch import add_watch_args, watch
 
 
 def transform():
@@ -14,7 +18,22 @@ def transform():
 
     parser.add_argument("--out_dir", required=True, type=Path, help="Output directory path")
     parser.add_argument("--in_dir", required=True, type=Path, help="Input directory path")
+    add_canon_args(parser)
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Also write heartRate, location and deviceStatus records to Parquet files next to the canon file",
+    )
+    add_memory_args(parser)
+    add_checkpoint_args(parser)
+    add_dedup_args(parser)
+    add_workers_arg(parser)
+    add_watch_args(parser)
+    add_profile_args(parser)
     args = parser.parse_args()
+    # The mappers, models and schema validation are only imported once the arguments are known to be fine
+    from garmin.transform.run import archive_files, run_transform
+    from garmin.transform.schemas import get_schemas
 
     schemas = get_schemas()
 
@@ -22,12 +41,34 @@ def transform():
     print(f"Out Dir: {args.out_dir}")
     print(f"Is skipping schemas: {schemas.skip_schema_check}")
 
-    run_transform(out_dir=args.out_dir, in_dir=args.in_dir, schemas=schemas)
+    run = partial(
+        run_transform,
+        out_dir=args.out_dir,
+        in_dir=args.in_dir,
+        canon=canon_options(args),
+        memory=memory_options(args),
+        incremental=args.incremental or args.watch,
+        dedup=args.dedup,
+        workers=args.workers,
+        columnar=args.columnar,
+    )
+    with profiled(args.profile, args.out_dir, "transform", args.profile_top):
+        if args.watch:
+            # Schemas are loaded again for every run so each meta file only counts its own validations, from the
+            # schema cache and with the validators compiled for the first load
+            watch(
+                partial(archive_files, args.in_dir),
+                lambda paths: run(schemas=get_schemas(), inputs=paths),
+                args.watch_interval,
+            )
+        else:
+            run(schemas=schemas)
 
     print("Done transforming!")
 
 
 def main():
+    load_dotenv()
     transform()
 
 
@@ -0,0 +1,196 @@
+import argparse
+import json
+from collections import defaultdict
+from collections.abc import Iterator
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Optional
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from garmin.transform.canon_writer import read_canon
+from garmin.transform.mappers.utils.iso_utc import iso_utc
+
+# High volume entities that also get a Parquet file next to the canon file
+COLUMNAR_ENTITIES = ("heartRate", "location", "deviceStatus")
+# Low cardinality strings repeated on every row
+DICTIONARY_COLUMNS = ("entityType", "version", "source", "deviceId", "timezone")
+TIMESTAMP_COLUMNS = ("recordedAt",)
+# Keys a row had with an explicit null, so reading back can tell them apart from keys the record didn't have
+NULLS_COLUMN = "_nulls"
+META_SUFFIX = ".meta.json"
+BATCH_ROWS = 65_536
+
+
+class ColumnarMismatchError(ValueError):
+    def __init__(self, entity: str):
+        super().__init__(f"COLUMNAR_MISMATCH: {entity}")
+        self.entity = entity
+
+
+def columnar_path(file_path: str | Path, entity: str) -> Path:
+    return Path(f"{file_path}.{entity}.parquet")
+
+
+def parse_timestamp(value: str) -> datetime:
+    # fromisoformat only takes the Z suffix from 3.11
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def to_table(records: list[dict[str, Any]]) -> pa.Table:
+    table = pa.Table.from_struct_array(pa.array(records))
+    for name in DICTIONARY_COLUMNS:
+        if name in table.column_names:
+            table = table.set_column(table.schema.get_field_index(name), name, pc.dictionary_encode(table[name]))
+    for name in TIMESTAMP_COLUMNS:
+        if name in table.column_names:
+            # Stored as int64 microseconds since the epoch
+            values = [parse_timestamp(r[name]) if r.get(name) else None for r in records]
+            column = pa.array(values, pa.timestamp("us", tz="UTC"))
+            table = table.set_column(table.schema.get_field_index(name), name, column)
+    nulls = [[k for k, v in r.items() if v is None] or None for r in records]
+    return table.append_column(NULLS_COLUMN, pa.array(nulls, pa.list_(pa.dictionary(pa.int32(), pa.string()))))
+
+
+def conform(table: pa.Table, schema: pa.Schema) -> Optional[pa.Table]:
+    # The table with the schema's columns, the ones it doesn't have as nulls. None if it has other columns or types,
+    # other than nulls where the schema has a type
+    if not set(table.column_names) <= set(schema.names):
+        return None
+    columns = []
+    for field in schema:
+        if field.name not in table.column_names:
+            columns.append(pa.nulls(table.num_rows, field.type))
+            continue
+        column = table[field.name]
+        if column.type != field.type and not (pa.types.is_null(column.type) and not pa.types.is_null(field.type)):
+            return None
+        columns.append(column.cast(field.type))
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+# Every BATCH_ROWS rows are converted to Arrow and written to the entity's Parquet file as a row group, only one batch
+# per entity is held in memory. Optional keys show up as columns part way through, and a file's schema is fixed once
+# it's opened, so a batch that doesn't fit starts another segment. Segments are merged into one file, batch by batch,
+# on close
+class ColumnarFile:
+    def __init__(self, path: Path):
+        self.path = path
+        self.segments: list[Path] = []
+        self.writer: Optional[pq.ParquetWriter] = None
+
+    def write(self, table: pa.Table) -> None:
+        if self.writer is not None:
+            conformed = conform(table, self.writer.schema)
+            if conformed is not None:
+                self.writer.write_table(conformed)
+                return
+            self.writer.close()
+        segment = self.path.with_name(f"{self.path.name}.{len(self.segments)}.part")
+        self.segments.append(segment)
+        self.writer = pq.ParquetWriter(segment, table.schema, compression="zstd")
+        self.writer.write_table(table)
+
+    def close(self) -> None:
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+        if len(self.segments) == 1:
+            self.segments[0].replace(self.path)
+        elif self.segments:
+            self._merge()
+        self.segments = []
+
+    def _merge(self) -> None:
+        files = [pq.ParquetFile(segment) for segment in self.segments]
+        schema = pa.unify_schemas([file.schema_arrow for file in files], promote_options="permissive")
+        empty = schema.empty_table()
+        with pq.ParquetWriter(self.path, schema, compression="zstd") as writer:
+            for file in files:
+                for batch in file.iter_batches(BATCH_ROWS):
+                    table = pa.concat_tables([empty, pa.Table.from_batches([batch])], promote_options="permissive")
+                    writer.write_table(table.select(schema.names).cast(schema))
+        for segment in self.segments:
+            segment.unlink()
+
+
+class ColumnarWriter:
+    def __init__(self, file_path: str | Path, entities: tuple[str, ...] = COLUMNAR_ENTITIES):
+        self.file_path = file_path
+        self.entities = entities
+        self.rows: dict[str, list[dict[str, Any]]] = defaultdict(list)
+        self.open: dict[str, ColumnarFile] = {}
+        self.files: dict[str, str] = {}
+
+    def write(self, record: Any) -> None:
+        entity = record.get("entityType")
+        if entity not in self.entities:
+            return
+        rows = self.rows[entity]
+        rows.append(record)
+        if len(rows) >= BATCH_ROWS:
+            self._flush(entity)
+
+    def close(self) -> None:
+        for entity in list(self.rows):
+            self._flush(entity)
+        for entity, file in self.open.items():
+            file.close()
+            self.files[entity] = file.path.name
+        self.open.clear()
+
+    def _flush(self, entity: str) -> None:
+        rows = self.rows.pop(entity, None)
+        if not rows:
+            return
+        if entity not in self.open:
+            self.open[entity] = ColumnarFile(columnar_path(self.file_path, entity))
+        self.open[entity].write(to_table(rows))
+
+
+def read_columnar(path: str | Path) -> Iterator[dict[str, Any]]:
+    for batch in pq.ParquetFile(path).iter_batches(BATCH_ROWS):
+        for row in batch.to_pylist():
+            nulls = set(row.pop(NULLS_COLUMN) or ())
+            for name in TIMESTAMP_COLUMNS:
+                if row.get(name) is not None:
+                    row[name] = iso_utc(row[name])
+            yield {k: v for k, v in row.items() if v is not None or k in nulls}
+
+
+def verify_columnar(meta_file: str | Path) -> dict[str, int]:
+    meta_file = Path(meta_file)
+    meta = json.loads(meta_file.read_text(encoding="utf-8"))
+    base = str(meta_file).removesuffix(META_SUFFIX)
+    expected: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    # Shards are listed by entity type then index, so records keep the order they were written in
+    for shard in meta["shards"]:
+        for record in read_canon(meta_file.parent / shard["file"]):
+            if record.get("entityType") in COLUMNAR_ENTITIES:
+                expected[record["entityType"]].append(record)
+
+    counts = {}
+    for entity in COLUMNAR_ENTITIES:
+        path = columnar_path(base, entity)
+        records = list(read_columnar(path)) if path.exists() else []
+        if records != expected.get(entity, []):
+            raise ColumnarMismatchError(entity)
+        counts[entity] = len(records)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check the Parquet files of a run hold the same records as its canon files"
+    )
+    parser.add_argument("meta_file", type=Path, help=".meta.json of a run with --columnar")
+    args = parser.parse_args()
+
+    for entity, count in verify_columnar(args.meta_file).items():
+        print(f"{entity}: {count} records match")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+import hashlib
+import importlib.util
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+# Bump when the generated code changes so stale cached validators are not picked up
+GENERATOR_VERSION = "2"
+
+# Keywords that don't assert anything when validating (jsonschema.validate() doesn't check "format" either)
+ANNOTATION_KEYWORDS = {
+    "$schema",
+    "$id",
+    "id",
+    "$comment",
+    "title",
+    "description",
+    "default",
+    "examples",
+    "format",
+    "readOnly",
+    "writeOnly",
+    "deprecated",
+    "definitions",
+    "$defs",
+    "contentMediaType",
+    "contentEncoding",
+}
+
+TYPE_CHECKS = {
+    "string": "isinstance({v}, str)",
+    "object": "isinstance({v}, dict)",
+    "array": "isinstance({v}, list)",
+    "boolean": "isinstance({v}, bool)",
+    "null": "{v} is None",
+    "number": "(isinstance({v}, (int, float)) and not isinstance({v}, bool))",
+    "integer": "((isinstance({v}, int) and not isinstance({v}, bool)) or (isinstance({v}, float) and {v}.is_integer()))",
+}
+# Draft 4 doesn't consider 1.0 an integer
+DRAFT4_INTEGER_CHECK = "(isinstance({v}, int) and not isinstance({v}, bool))"
+
+
+class UnsupportedSchema(Exception):
+    def __init__(self, detail: Any):
+        super().__init__(f"UNSUPPORTED_SCHEMA: {detail}")
+
+
+def validator_cache_dir() -> Path:
+    if cache_dir := os.getenv("VALIDATOR_CACHE_DIR"):
+        return Path(cache_dir)
+    return Path(os.getenv("XDG_CACHE_HOME", "~/.cache")).expanduser() / "lomnia" / "validators"
+
+
+def schema_hash(schema: dict[str, Any]) -> str:
+    raw = json.dumps(schema, sort_keys=True, separators=(",", ":")) + GENERATOR_VERSION
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def build_validator(schema: dict[str, Any], cache_dir: Path | None = None) -> Optional[Callable[[Any], bool]]:
+    """
+    Returns an `is_valid(instance) -> bool` function generated specifically for the schema, or None when the schema
+    uses keywords the generator doesn't support.
+
+    The generated module is cached on disk keyed by the schema hash, so it's only generated once per schema version.
+    A True result is always correct; callers should fall back to jsonschema when it returns False to get the error.
+    """
+    cache_dir = cache_dir or validator_cache_dir()
+    digest = schema_hash(schema)
+    module_path = cache_dir / f"validator_{digest}.py"
+
+    if not module_path.exists():
+        try:
+            source = generate_source(schema, digest)
+        except UnsupportedSchema as e:
+            print(f"Falling back to jsonschema for schema {schema.get('title', digest[:12])}: {e}")
+            return None
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file first so concurrent runs never import a half written module
+        with tempfile.NamedTemporaryFile("w", dir=cache_dir, suffix=".tmp", delete=False, encoding="utf-8") as tmp:
+            tmp.write(source)
+        os.replace(tmp.name, module_path)
+
+    spec = importlib.util.spec_from_file_location(f"lomnia_validator_{digest[:16]}", module_path)
+    if spec is None or spec.loader is None:
+        return None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.is_valid
+
+
+def generate_source(schema: dict[str, Any], digest: str = "") -> str:
+    generator = _Generator(schema)
+    body = generator.function("is_valid", schema)
+    header = [
+        "# Generated by fast_validator, do not edit",
+        f"# schema: {schema.get('title', '')} {digest}",
+        "import re",
+        "",
+        "",
+        "def _equal(a, b):",
+        "    if isinstance(a, bool) or isinstance(b, bool):",
+        "        return isinstance(a, bool) and isinstance(b, bool) and a is b",
+        "    if isinstance(a, dict) and isinstance(b, dict):",
+        "        return a.keys() == b.keys() and all(_equal(a[k], b[k]) for k in a)",
+        "    if isinstance(a, list) and isinstance(b, list):",
+        "        return len(a) == len(b) and all(_equal(x, y) for x, y in zip(a, b))",
+        "    return type(a) in (int, float, str, type(None)) and type(b) in (int, float, str, type(None)) and a == b",
+        "",
+        "",
+    ]
+    constants = [f"{name} = {value}" for name, value in generator.constants]
+    return "\n".join(header + constants + ["", ""] + generator.functions + body) + "\n"
+
+
+class _Generator:
+    def __init__(self, root: dict[str, Any]):
+        self.root = root
+        self.draft4 = "draft-04" in str(root.get("$schema", ""))
+        # jsonschema treats a schema without $schema as the latest draft, where $ref doesn't hide its siblings
+        self.legacy_ref = "draft-0" in str(root.get("$schema", ""))
+        self.constants: list[tuple[str, str]] = []
+        self.functions: list[str] = []
+        self.refs: dict[str, str] = {}
+        self.counter = 0
+
+    def name(self, prefix: str) -> str:
+        self.counter += 1
+        return f"_{prefix}{self.counter}"
+
+    def constant(self, prefix: str, value: str) -> str:
+        name = self.name(prefix)
+        self.constants.append((name, value))
+        return name
+
+    def function(self, name: str, schema: Any) -> list[str]:
+        lines = [f"def {name}(v):"]
+        lines += self.checks(schema, "v", 1, depth=0)
+        lines += ["    return True", "", ""]
+        return lines
+
+    def helper(self, schema: Any) -> str:
+        name = self.name("check")
+        self.functions += self.function(name, schema)
+        return name
+
+    def ref(self, ref: str) -> str:
+        if ref not in self.refs:
+            if not ref.startswith("#"):
+                raise UnsupportedSchema(ref)
+            target: Any = self.root
+            for part in ref.lstrip("#").split("/"):
+                if not part:
+                    continue
+                part = part.replace("~1", "/").replace("~0", "~")
+                if not isinstance(target, dict) or part not in target:
+                    raise UnsupportedSchema(ref)
+                target = target[part]
+            # Register before generating so recursive refs point at the same function
+            self.refs[ref] = self.name("ref")
+            self.functions += self.function(self.refs[ref], target)
+        return self.refs[ref]
+
+    def type_check(self, type_name: str, v: str) -> str:
+        if type_name not in TYPE_CHECKS:
+            raise UnsupportedSchema(type_name)
+        if type_name == "integer" and self.draft4:
+            return DRAFT4_INTEGER_CHECK.format(v=v)
+        return TYPE_CHECKS[type_name].format(v=v)
+
+    def checks(self, schema: Any, v: str, indent: int, depth: int) -> list[str]:  # noqa: C901
+        pad = "    " * indent
+        if schema is True or schema == {}:
+            return []
+        if schema is False:
+            return [f"{pad}return False"]
+        if not isinstance(schema, dict):
+            raise UnsupportedSchema(schema)
+
+        if "$ref" in schema:
+            ref_check = [f"{pad}if not {self.ref(schema['$ref'])}({v}):", f"{pad}    return False"]
+            # Draft 7 and older ignore keywords next to $ref, later drafts apply them as well
+            if self.legacy_ref:
+                return ref_check
+            siblings = {key: value for key, value in schema.items() if key != "$ref"}
+            return ref_check + self.checks(siblings, v, indent, depth)
+
+        lines: list[str] = []
+        handled = set(ANNOTATION_KEYWORDS)
+
+        types = schema.get("type")
+        if types is not None:
+            handled.add("type")
+            type_list = [types] if isinstance(types, str) else list(types)
+            expression = " or ".join(self.type_check(t, v) for t in type_list)
+            lines += [f"{pad}if not ({expression}):", f"{pad}    return False"]
+        single_type = types if isinstance(types, str) else None
+
+        if "enum" in schema:
+            handled.add("enum")
+            options = schema["enum"]
+            if all(isinstance(o, str) for o in options):
+                name = self.constant("enum", repr(frozenset(options)))
+                lines += [f"{pad}if not (isinstance({v}, str) and {v} in {name}):", f"{pad}    return False"]
+            else:
+                name = self.constant("enum", repr(tuple(options)))
+                lines += [f"{pad}if not any(_equal({v}, o) for o in {name}):", f"{pad}    return False"]
+
+        if "const" in schema:
+            handled.add("const")
+            name = self.constant("const", repr(schema["const"]))
+            lines += [f"{pad}if not _equal({v}, {name}):", f"{pad}    return False"]
+
+        lines += self.number_checks(schema, v, pad, single_type, handled)
+        lines += self.string_checks(schema, v, pad, single_type, handled)
+        lines += self.array_checks(schema, v, pad, single_type, handled, indent, depth)
+        lines += self.object_checks(schema, v, pad, single_type, handled, indent, depth)
+
+        for keyword in ("anyOf", "oneOf", "allOf"):
+            if keyword in schema:
+                handled.add(keyword)
+                helpers = [self.helper(sub) for sub in schema[keyword]]
+                calls = [f"{h}({v})" for h in helpers]
+                if keyword == "anyOf":
+                    lines += [f"{pad}if not ({' or '.join(calls)}):", f"{pad}    return False"]
+                elif keyword == "allOf":
+                    lines += [f"{pad}if not ({' and '.join(calls)}):", f"{pad}    return False"]
+                else:
+                    lines += [f"{pad}if sum(({', '.join(calls)},)) != 1:", f"{pad}    return False"]
+
+        if "not" in schema:
+            handled.add("not")
+            lines += [f"{pad}if {self.helper(schema['not'])}({v}):", f"{pad}    return False"]
+
+        unsupported = set(schema) - handled
+        if unsupported:
+            raise UnsupportedSchema(sorted(unsupported))
+        return lines
+
+    def guarded(self, pad: str, guard: str | None, conditions: list[str]) -> list[str]:
+        if not conditions:
+            return []
+        failing = " or ".join(conditions)
+        if guard is None:
+            return [f"{pad}if {failing}:", f"{pad}    return False"]
+        return [f"{pad}if {guard} and ({failing}):", f"{pad}    return False"]
+
+    def number_checks(self, schema, v, pad, single_type, handled) -> list[str]:
+        conditions = []
+        for keyword, operator in (
+            ("minimum", "<"),
+            ("maximum", ">"),
+            ("exclusiveMinimum", "<="),
+            ("exclusiveMaximum", ">="),
+        ):
+            if keyword in schema:
+                handled.add(keyword)
+                limit = schema[keyword]
+                if isinstance(limit, bool) or not isinstance(limit, (int, float)):
+                    raise UnsupportedSchema({keyword: limit})
+                conditions.append(f"{v} {operator} {limit!r}")
+        guard = None if single_type in ("number", "integer") else self.type_check("number", v)
+        return self.guarded(pad, guard, conditions)
+
+    def string_checks(self, schema, v, pad, single_type, handled) -> list[str]:
+        conditions = []
+        if "minLength" in schema:
+            handled.add("minLength")
+            conditions.append(f"len({v}) < {int(schema['minLength'])}")
+        if "maxLength" in schema:
+            handled.add("maxLength")
+            conditions.append(f"len({v}) > {int(schema['maxLength'])}")
+        if "pattern" in schema:
+            handled.add("pattern")
+            name = self.constant("pattern", f"re.compile({schema['pattern']!r})")
+            conditions.append(f"{name}.search({v}) is None")
+        guard = None if single_type == "string" else f"isinstance({v}, str)"
+        return self.guarded(pad, guard, conditions)
+
+    def array_checks(self, schema, v, pad, single_type, handled, indent, depth) -> list[str]:
+        conditions = []
+        if "minItems" in schema:
+            handled.add("minItems")
+            conditions.append(f"len({v}) < {int(schema['minItems'])}")
+        if "maxItems" in schema:
+            handled.add("maxItems")
+            conditions.append(f"len({v}) > {int(schema['maxItems'])}")
+        guard = None if single_type == "array" else f"isinstance({v}, list)"
+        lines = self.guarded(pad, guard, conditions)
+
+        if "items" in schema:
+            handled.add("items")
+            items = schema["items"]
+            if isinstance(items, list):
+                raise UnsupportedSchema(items)
+            item_checks = self.checks(items, f"i{depth}", indent + 2, depth + 1)
+            if item_checks:
+                lines.append(f"{pad}if isinstance({v}, list):")
+                lines.append(f"{pad}    for i{depth} in {v}:")
+                lines += item_checks
+        return lines
+
+    def object_checks(self, schema, v, pad, single_type, handled, indent, depth) -> list[str]:
+        inner_pad = pad if single_type == "object" else pad + "    "
+        inner_indent = indent if single_type == "object" else indent + 1
+        inner = self.key_checks(schema, v, inner_pad, handled, depth)
+
+        for key, subschema in schema.get("properties", {}).items():
+            prop_checks = self.checks(subschema, f"p{depth}", inner_indent + 1, depth + 1)
+            if not prop_checks:
+                continue
+            inner += [
+                f"{inner_pad}if {key!r} in {v}:",
+                f"{inner_pad}    p{depth} = {v}[{key!r}]",
+                *prop_checks,
+            ]
+
+        if not inner or single_type == "object":
+            return inner
+        return [f"{pad}if isinstance({v}, dict):", *inner]
+
+    def key_checks(self, schema, v, inner_pad, handled, depth) -> list[str]:
+        inner: list[str] = []
+        if "required" in schema:
+            handled.add("required")
+            if schema["required"]:
+                name = self.constant("required", repr(frozenset(schema["required"])))
+                inner += [f"{inner_pad}if not {name} <= {v}.keys():", f"{inner_pad}    return False"]
+
+        properties = schema.get("properties", {})
+        if "properties" in schema:
+            handled.add("properties")
+
+        if "additionalProperties" in schema:
+            handled.add("additionalProperties")
+            additional = schema["additionalProperties"]
+            name = self.constant("properties", repr(frozenset(properties)))
+            if additional is False:
+                inner += [f"{inner_pad}if not {v}.keys() <= {name}:", f"{inner_pad}    return False"]
+            elif additional is not True and additional != {}:
+                helper = self.helper(additional)
+                inner += [
+                    f"{inner_pad}for k{depth}, p{depth} in {v}.items():",
+                    f"{inner_pad}    if k{depth} not in {name} and not {helper}(p{depth}):",
+                    f"{inner_pad}        return False",
+                ]
+        return inner
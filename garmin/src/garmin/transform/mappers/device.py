@@ -30,14 +30,16 @@ def transform_device(
 
         if schemas.device is not None:
             try:
-                jsonschema.validate(instance=transformed, schema=schemas.device)
+                schemas.device.validate(transformed)
             except jsonschema.ValidationError as e:
                 print(f"Valid data validation error: {e.message}")
                 raise
 
-        metadata.record("device", [])
+        metadata.record("device")
         entries.append(transformed)
         metadata.device_ids_seen.add(did)
+        if metadata.device_id is None:
+            metadata.device_id = did
     return entries
 
 
@@ -59,11 +61,11 @@ def transform_device_from_fit(
 
     if schemas.device is not None:
         try:
-            jsonschema.validate(instance=transformed, schema=schemas.device)
+            schemas.device.validate(transformed)
         except jsonschema.ValidationError as e:
             print(f"Valid data validation error: {e.message}")
             raise
 
-    metadata.record("device", [])
+    metadata.record("device")
     metadata.device_ids_seen.add(did)
     return transformed
@@ -1,4 +1,3 @@
-from datetime import datetime
 from typing import Any
 
 import jsonschema
@@ -36,15 +35,12 @@ def transform_device_status(
 
         if schemas.device_status is not None:
             try:
-                jsonschema.validate(instance=transformed, schema=schemas.device_status)
+                schemas.device_status.validate(transformed)
             except jsonschema.ValidationError as e:
                 print(f"Valid data validation error: {e.message}")
                 raise
 
-        metadata.record(
-            "device_status",
-            [datetime.fromisoformat(transformed["recordedAt"])],
-        )
+        metadata.record("device_status", timestamp)
         entries.append(transformed)
 
     return entries
@@ -1,4 +1,3 @@
-from datetime import datetime
 from typing import Any
 
 import jsonschema
@@ -59,15 +58,12 @@ def transform_exercise(
 
         if schemas.exercise is not None:
             try:
-                jsonschema.validate(instance=exercise, schema=schemas.exercise)
+                schemas.exercise.validate(exercise)
             except jsonschema.ValidationError as e:
                 print(f"Valid data validation error: {e.message}")
                 raise
 
-        metadata.record(
-            "exercise",
-            [datetime.fromisoformat(exercise["startedAt"]), datetime.fromisoformat(exercise["endedAt"])],
-        )
+        metadata.record("exercise", session.start_time, session.end_time)
         entries.append(exercise)
 
     return entries
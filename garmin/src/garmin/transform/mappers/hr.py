@@ -1,11 +1,10 @@
-from datetime import datetime
 from typing import Any
 
 import jsonschema
 
 from garmin.config import PLUGIN_NAME
 from garmin.transform.mappers.utils.iso_utc import iso_utc
-from garmin.transform.mappers.utils.to_utc_iso_from_epoch import to_utc_iso_from_epoch
+from garmin.transform.mappers.utils.to_utc_iso_from_epoch import epoch_seconds, to_utc_iso_from_epoch
 from garmin.transform.meta import TransformRunMetadata
 from garmin.transform.models.hr import HeartRate
 from garmin.transform.parsers.activity import FITResult
@@ -48,15 +47,12 @@ def transform_hr(
         }
         if schemas.heart_rate is not None:
             try:
-                jsonschema.validate(instance=transformed, schema=schemas.heart_rate)
+                schemas.heart_rate.validate(transformed)
             except jsonschema.ValidationError as e:
                 print(f"Valid data validation error: {e.message}")
                 raise
 
-        metadata.record(
-            "heart_rate",
-            [datetime.fromisoformat(transformed["recordedAt"])],
-        )
+        metadata.record("heart_rate", epoch_seconds(timestamp_ms))
         entries.append(transformed)
 
     return entries
@@ -87,15 +83,12 @@ def transform_hr_from_fit(
         }
         if schemas.heart_rate is not None:
             try:
-                jsonschema.validate(instance=transformed, schema=schemas.heart_rate)
+                schemas.heart_rate.validate(transformed)
             except jsonschema.ValidationError as e:
                 print(f"Valid data validation error: {e.message}")
                 raise
 
-        metadata.record(
-            "heart_rate",
-            [datetime.fromisoformat(transformed["recordedAt"])],
-        )
+        metadata.record("heart_rate", timestamp)
         entries.append(transformed)
 
     return entries
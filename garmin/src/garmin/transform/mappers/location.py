@@ -1,8 +1,7 @@
-from datetime import datetime
-from typing import Any
+from functools import cache
+from typing import TYPE_CHECKING, Any
 
 import jsonschema
-from timezonefinder import TimezoneFinder
 
 from garmin.config import PLUGIN_NAME
 from garmin.transform.mappers.utils.iso_utc import iso_utc
@@ -11,7 +10,16 @@ from garmin.transform.meta import TransformRunMetadata
 from garmin.transform.parsers.activity import FITResult
 from garmin.transform.schemas import Schemas
 
-tf = TimezoneFinder(in_memory=True)
+if TYPE_CHECKING:
+    from timezonefinder import TimezoneFinder
+
+
+# Loading the polygons (and numpy) takes a few hundred ms, only paid once a FIT file with GPS records turns up
+@cache
+def timezone_finder() -> "TimezoneFinder":
+    from timezonefinder import TimezoneFinder
+
+    return TimezoneFinder(in_memory=True)
 
 
 def ms_to_kmh(speed_ms: float) -> float:
@@ -25,6 +33,7 @@ def transform_location(
     schemas: Schemas,
 ) -> list[dict[str, Any]]:
     entries: list[dict[str, Any]] = []
+    timezone_timer = metadata.timers.per_record("timezone", entity="location")
 
     for record in fit.records:
         timestamp = record.timestamp
@@ -32,7 +41,8 @@ def transform_location(
         lng = record.lng
         if timestamp is None or lat is None or lng is None:
             continue
-        tz = tf.timezone_at(lng=lng, lat=lat)
+        with timezone_timer():
+            tz = timezone_finder().timezone_at(lng=lng, lat=lat)
         transformed: dict[str, Any] = remove_none_values({
             "entityType": "location",
             "version": "1",
@@ -48,15 +58,12 @@ def transform_location(
 
         if schemas.location is not None:
             try:
-                jsonschema.validate(instance=transformed, schema=schemas.location)
+                schemas.location.validate(transformed)
             except jsonschema.ValidationError as e:
                 print(f"Valid data validation error: {e.message}")
                 raise
 
-        metadata.record(
-            "location",
-            [datetime.fromisoformat(transformed["recordedAt"])],
-        )
+        metadata.record("location", timestamp)
         entries.append(transformed)
 
     return entries
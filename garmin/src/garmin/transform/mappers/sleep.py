@@ -1,11 +1,10 @@
-from datetime import datetime
 from typing import Any
 
 import jsonschema
 
 from garmin.config import PLUGIN_NAME
 from garmin.transform.mappers.utils.get_sleep_id import get_sleep_id
-from garmin.transform.mappers.utils.to_utc_iso_from_epoch import to_utc_iso_from_epoch
+from garmin.transform.mappers.utils.to_utc_iso_from_epoch import epoch_seconds, to_utc_iso_from_epoch
 from garmin.transform.meta import TransformRunMetadata
 from garmin.transform.models.sleep import Sleep
 from garmin.transform.schemas import Schemas
@@ -36,12 +35,10 @@ def transform_sleep(
 
     if schemas.sleep is not None:
         try:
-            jsonschema.validate(instance=transformed, schema=schemas.sleep)
+            schemas.sleep.validate(transformed)
         except jsonschema.ValidationError as e:
             print(f"Valid data validation error: {e.message}")
             raise
 
-    metadata.record(
-        "sleep", [datetime.fromisoformat(transformed["startedAt"]), datetime.fromisoformat(transformed["endedAt"])]
-    )
+    metadata.record("sleep", epoch_seconds(dto.sleepStartTimestampGMT), epoch_seconds(dto.sleepEndTimestampGMT))
     return transformed
@@ -1,5 +1,4 @@
 import hashlib
-from datetime import datetime
 from typing import Any
 
 import jsonschema
@@ -51,14 +50,11 @@ def transform_sleep_stage(
 
         if schemas.sleep_stage is not None:
             try:
-                jsonschema.validate(instance=transformed, schema=schemas.sleep_stage)
+                schemas.sleep_stage.validate(transformed)
             except jsonschema.ValidationError as e:
                 print(f"Valid data validation error: {e.message}")
                 raise
 
-        metadata.record(
-            "sleep_stage",
-            [datetime.fromisoformat(transformed["startedAt"]), datetime.fromisoformat(transformed["endedAt"])],
-        )
+        metadata.record("sleep_stage", start, end)
         result.append(transformed)
     return result
@@ -1,9 +1,12 @@
 from datetime import datetime, timezone
 
 
-def to_utc_iso_from_epoch(epoch: int | float) -> str:
+def epoch_seconds(epoch: int | float) -> int:
     # Detect milliseconds
     if epoch > 1e12:
         epoch = epoch / 1000
+    return int(epoch)
+
 
-    return datetime.fromtimestamp(epoch, tz=timezone.utc).replace(microsecond=0).isoformat().replace("+00:00", "Z")
+def to_utc_iso_from_epoch(epoch: int | float) -> str:
+    return datetime.fromtimestamp(epoch_seconds(epoch), tz=timezone.utc).isoformat().replace("+00:00", "Z")
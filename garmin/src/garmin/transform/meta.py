@@ -1,9 +1,13 @@
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 from garmin.config import PACKAGE_NAME
+from garmin.transform.memory import MemoryMonitor
+from garmin.transform.timers import StageTimers
+from garmin.transform.validation import ValidationReport
+from garmin.transform.windows import Timestamp, TimeWindows, isoformat
 from garmin.version import get_version
 
 
@@ -13,14 +17,32 @@ class TransformRunMetadata:
     transformer_version: str = get_version()
     files_processed: list[str] = field(default_factory=list)
 
-    min_date: Optional[datetime] = None
-    max_date: Optional[datetime] = None
+    windows: TimeWindows = field(default_factory=TimeWindows)
 
     start_date: Optional[datetime] = None
     activity_mapping: dict[str, str] = field(default_factory=lambda: {})
 
     counts: dict[str, int] = field(default_factory=lambda: {})
     device_ids_seen: set[str] = field(default_factory=lambda: set())
+    # The first device registered in the run, for archives whose devices an earlier one wrote already
+    device_id: Optional[str] = None
+    # Device records a --workers part leaves to the merge, which writes each one once ahead of the parts
+    devices: list[dict[str, Any]] = field(default_factory=lambda: [])
+
+    validation: Optional[ValidationReport] = None
+    schema_load_timings: dict[str, float] = field(default_factory=lambda: {})
+    codec: Optional[dict[str, Any]] = None
+    shards: list[dict[str, Any]] = field(default_factory=lambda: [])
+    writer: Optional[dict[str, Any]] = None
+    timers: StageTimers = field(default_factory=StageTimers)
+    memory: Optional[MemoryMonitor] = None
+    # Store and inputs skipped by an --incremental run
+    checkpoints: Optional[dict[str, Any]] = None
+    # New, changed and suppressed records of a --dedup run
+    dedup: Optional[dict[str, Any]] = None
+    columnar_files: dict[str, str] = field(default_factory=lambda: {})
+    # Workers and per input part of a --workers run
+    parallel: Optional[dict[str, Any]] = None
 
     def add_files_processed(self, path: Path) -> None:
         self.files_processed.append(path.name)
@@ -28,10 +50,10 @@ class TransformRunMetadata:
     def start(self) -> None:
         self.start_date = datetime.now(timezone.utc)
 
-    def record(self, entity: str, dates: list[datetime]) -> None:
+    def record(self, entity: str, *timestamps: Timestamp) -> None:
         self._inc(entity)
-        for date in dates:
-            self._update_time_bounds(date)
+        for timestamp in timestamps:
+            self.windows.add(entity, timestamp)
 
     def _inc(self, key: str) -> None:
         if self.counts.get(key):
@@ -39,11 +61,23 @@ class TransformRunMetadata:
         else:
             self.counts[key] = 1
 
-    def _update_time_bounds(self, ts: datetime) -> None:
-        if self.min_date is None or ts < self.min_date:
-            self.min_date = ts
-        if self.max_date is None or ts > self.max_date:
-            self.max_date = ts
+    # A part is the metadata of one input transformed by a --workers process
+    def merge(self, part: "TransformRunMetadata") -> None:
+        self.files_processed.extend(part.files_processed)
+        self.windows.merge(part.windows)
+        for key, count in part.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        if self.device_id is None:
+            self.device_id = part.device_id
+        self.devices.extend(device for device in part.devices if device["id"] not in self.device_ids_seen)
+        self.device_ids_seen |= part.device_ids_seen
+        # Parts can see the same device, it's only written once
+        if self.device_ids_seen:
+            self.counts["device"] = len(self.device_ids_seen)
+        self.activity_mapping.update(part.activity_mapping)
+        if self.validation is not None and part.validation is not None:
+            self.validation.merge(part.validation)
+        self.timers.merge(part.timers)
 
     def to_dict(self) -> dict:
         return {
@@ -52,7 +86,19 @@ class TransformRunMetadata:
             "transform_start": self.start_date.isoformat() if self.start_date else None,
             "transform_end": datetime.now(timezone.utc).isoformat(),
             "inputs": self.files_processed,
-            "window_start": (self.min_date.isoformat() if self.min_date else None),
-            "window_end": (self.max_date.isoformat() if self.max_date else None),
+            "window_start": isoformat(self.windows.start),
+            "window_end": isoformat(self.windows.end),
+            "windows": self.windows.to_dict(),
             "counts": self.counts,
+            "validation": self.validation.to_dict() if self.validation else None,
+            "schema_load_seconds": self.schema_load_timings,
+            "codec": self.codec,
+            "shards": self.shards,
+            "writer": self.writer,
+            "timings": self.timers.to_dict(),
+            "memory": self.memory.to_dict() if self.memory else None,
+            "checkpoints": self.checkpoints,
+            "dedup": self.dedup,
+            "parallel": self.parallel,
+            "columnar": self.columnar_files,
         }
@@ -1,5 +1,7 @@
+import io
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
+from typing import Optional
 
 import fitdecode
 from attr import dataclass
@@ -26,10 +28,11 @@ class FITResult:
     laps: list[ActivityLap]
 
 
-def process_activity_file(activity_file: Path, metadata: TransformRunMetadata):
+def process_activity_file(activity_file: Path, metadata: TransformRunMetadata, data: Optional[bytes] = None):
     filename = activity_file.stem
     parts = filename.split("_")
-    fit = fitdecode.FitReader(str(activity_file), processor=fitdecode.StandardUnitsDataProcessor())
+    source = io.BytesIO(data) if data is not None else str(activity_file)
+    fit = fitdecode.FitReader(source, processor=fitdecode.StandardUnitsDataProcessor())
 
     activity_id = parts[2]
     activity_name = metadata.activity_mapping.get(activity_id)
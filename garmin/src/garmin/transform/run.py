@@ -1,16 +1,17 @@
-import gzip
 import json
 import os
 import tarfile
 import tempfile
 import uuid
 from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
-
-import jsonlines
-from dotenv import load_dotenv
+from typing import TYPE_CHECKING, Any, Callable, Optional
 
 from garmin.config import ACTIVITY_FOLDER, DEVICE_FOLDER, HR_FOLDER, PLUGIN_NAME, SLEEP_FOLDER
+from garmin.transform.canon_writer import CanonOptions, RecordSink, canon_writer, remove_outputs
+from garmin.transform.checkpoints import CheckpointStore
+from garmin.transform.dedup import RecordIndex
 from garmin.transform.mappers.device import transform_device, transform_device_from_fit
 from garmin.transform.mappers.device_status import transform_device_status
 from garmin.transform.mappers.exercise import transform_exercise
@@ -18,105 +19,255 @@ from garmin.transform.mappers.hr import transform_hr, transform_hr_from_fit
 from garmin.transform.mappers.location import transform_location
 from garmin.transform.mappers.sleep import transform_sleep
 from garmin.transform.mappers.sleep_stage import transform_sleep_stage
+from garmin.transform.memory import MemoryMonitor, MemoryOptions, SpillBuffer
 from garmin.transform.meta import TransformRunMetadata
 from garmin.transform.models.device import Device
 from garmin.transform.models.hr import HeartRate
 from garmin.transform.models.sleep import Sleep
+from garmin.transform.parallel import merge_canon, merge_metadata, run_parts
 from garmin.transform.parsers.activity import process_activity_file
 from garmin.transform.schemas import Schemas
 
-load_dotenv()
+if TYPE_CHECKING:
+    from garmin.transform.columnar import ColumnarWriter
+
+# Writes records from somewhere other than the archives in in_dir, the run command streams them from the extract
+Source = Callable[[RecordSink, TransformRunMetadata, Schemas], None]
 
 
-def run_transform(out_dir: str, in_dir: str, schemas: Schemas):
+def run_transform(
+    out_dir: str,
+    in_dir: str,
+    schemas: Schemas,
+    canon: Optional[CanonOptions] = None,
+    columnar: bool = False,
+    memory: Optional[MemoryOptions] = None,
+    workers: int = 1,
+    incremental: bool = False,
+    # Instead of every input file in in_dir, --watch passes the ones that settled
+    inputs: Optional[list[Path]] = None,
+    dedup: bool = False,
+    source: Optional[Source] = None,
+):
+    canon = canon or CanonOptions()
     file_name = f"{PLUGIN_NAME}_canon_{timestamp(datetime.now(timezone.utc))}_{str(uuid.uuid4()).split('-')[0]}"
     file_path = os.path.join(out_dir, file_name)
-    canon_file = f"{file_path}.jsonl.gz"
     metadata_file = f"{file_path}.meta.json"
 
     metadata = TransformRunMetadata()
     metadata.start()
+    metadata.validation = schemas.validation
+    metadata.timers = schemas.validation.timers
+    metadata.schema_load_timings = schemas.load_timings
+    metadata.codec = canon.to_dict()
+    metadata.memory = MemoryMonitor(memory)
+    checkpoints = CheckpointStore(out_dir, incremental)
+    index = RecordIndex(out_dir, dedup)
+    columnar_writer = open_columnar(file_path) if columnar else None
+    tee = [columnar_writer] if columnar_writer else []
     # log_every = 10000
     # row_count = 0
+    archives = checkpoints.filter(archive_files(Path(in_dir)) if inputs is None else inputs) if source is None else []
 
-    with tempfile.TemporaryDirectory() as tmp_dir, gzip.open(canon_file, "wt", encoding="utf-8") as gz:
-        writer = jsonlines.Writer(gz)
-        tmp_path = Path(tmp_dir)
-        for archive in Path(in_dir).glob("*.tar.gz"):
-            print("Found archive", archive)
-            with tarfile.open(archive, "r:gz") as tar:
-                # Unsafe, but I trust the tar :)
-                tar.extractall(path=tmp_path)  # noqa: S202
-            metadata.activity_mapping = read_activity_mapping(tmp_path)
-            transformed = process_device_files(tmp_path, metadata, schemas)
-            for line in transformed:
-                writer.write(line)
-            # Fine to assume just one for my use case
-            deviceId = transformed[0]["id"]
-            transformed = process_sleep_files(tmp_path, deviceId, metadata, schemas)
-            for line in transformed:
-                writer.write(line)
-            transformed = process_hr_files(tmp_path, deviceId, metadata, schemas)
-            for line in transformed:
-                writer.write(line)
-            transformed = process_activity_files(tmp_path, metadata, schemas)
-            for line in transformed:
-                writer.write(line)
+    try:
+        if workers > 1:
+            with metadata.memory, tempfile.TemporaryDirectory(dir=out_dir, prefix=".parts_") as parts_dir:
+                parts = run_parts(transform_archive_part, archives, Path(parts_dir), workers, canon, memory, schemas)
+                merge_metadata(metadata, parts, workers)
+                # Parts leave their devices out, the first record of each is written once ahead of them. Unlike a run
+                # without workers the devices, FIT ones included, all come first rather than with their archive
+                writer = merge_canon(metadata, parts, file_path, canon, tee, metadata.devices, index=index)
+        else:
+            with (
+                metadata.memory,
+                canon_writer(file_path, canon, tee, metadata.timers) as writer,
+                index.writer(writer) as indexed,
+                metadata.memory.writer(indexed) as sink,
+            ):
+                if source is not None:
+                    source(sink, metadata, schemas)
+                for archive in archives:
+                    transform_archive(archive, sink, metadata, schemas)
+        metadata.columnar_files = columnar_writer.files if columnar_writer else {}
+        metadata.shards = writer.manifest()
+        metadata.writer = writer.stats()
+        if schemas.validation_pool is not None:
+            schemas.validation_pool.finish()
+    except BaseException:
+        # Whatever stopped the run, don't leave a complete looking canon file behind
+        remove_outputs(out_dir, file_name)
+        index.close()
+        if schemas.validation_pool is not None:
+            schemas.validation_pool.close()
+        raise
+
+    metadata.checkpoints = checkpoints.to_dict()
+    metadata.dedup = index.to_dict()
+    index.remove_suppressed(metadata.counts)
     with Path(metadata_file).open("w", encoding="utf-8") as f:
         json.dump(metadata.to_dict(), f, indent=2)
+    checkpoints.commit(file_name)
+    index.commit()
+
+
+def archive_files(in_dir: Path) -> list[Path]:
+    return sorted(in_dir.glob("*.tar.gz"))
+
+
+# Every archive is extracted to its own directory, this is also what a --workers process runs for each archive
+def transform_archive(archive: Path, writer: RecordSink, metadata: TransformRunMetadata, schemas: Schemas) -> None:
+    print("Found archive", archive)
+    metadata.add_files_processed(archive)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = Path(tmp_dir)
+        with metadata.timers.timer("extract", file=archive.name), tarfile.open(archive, "r:gz") as tar:
+            # Unsafe, but I trust the tar :)
+            tar.extractall(path=tmp_path)  # noqa: S202
+        metadata.activity_mapping = read_activity_mapping(tmp_path)
+        transformed = process_device_files(tmp_path, metadata, schemas)
+        for line in transformed:
+            writer.write(line)
+        # Devices are few so they stay a plain list, the rest can spill to disk with --memory_budget_action spill
+        deviceId = device_id(transformed, metadata)
+        transformed = process_sleep_files(tmp_path, deviceId, metadata, schemas)
+        for line in transformed:
+            writer.write(line)
+        transformed = process_hr_files(tmp_path, deviceId, metadata, schemas)
+        for line in transformed:
+            writer.write(line)
+        transformed = process_activity_files(tmp_path, metadata, schemas)
+        for line in transformed:
+            writer.write(line)
+
+
+def transform_archive_part(archive: Path, writer: RecordSink, metadata: TransformRunMetadata, schemas: Schemas) -> None:
+    transform_archive(archive, PartSink(writer, metadata), metadata, schemas)
+
+
+# Other parts can see the same devices, so a part keeps them on its metadata for the merge. The rest of the part is
+# then written as is and the merge only has to concatenate the part files
+class PartSink:
+    def __init__(self, sink: RecordSink, metadata: TransformRunMetadata):
+        self.sink = sink
+        self.metadata = metadata
+
+    def write(self, record: dict[str, Any]) -> None:
+        if record.get("entityType") == "device":
+            self.metadata.devices.append(record)
+        else:
+            self.sink.write(record)
+
+    def close(self) -> None:
+        pass
 
 
 def process_sleep_files(tmp_path: Path, deviceId: str, metadata: TransformRunMetadata, schemas: Schemas):
-    result = []
+    result = SpillBuffer(metadata.memory)
     for sleep_file in (Path(tmp_path) / SLEEP_FOLDER).glob("*.json"):
         print("Found sleep file:", sleep_file)
-        raw = json.loads(Path(sleep_file).read_text())
-        if raw.get("dailySleepDTO") is None or raw.get("dailySleepDTO").get("id") is None:
-            print("Skipping sleep ingest. No sleep data found", sleep_file)
-            continue
-        sleep = Sleep(**raw)
-        result.append(transform_sleep(sleep=sleep, deviceId=deviceId, metadata=metadata, schemas=schemas))
-        result.extend(transform_sleep_stage(sleep=sleep, deviceId=deviceId, metadata=metadata, schemas=schemas))
+        result.extend(transform_sleep_file(sleep_file.name, sleep_file.read_bytes(), deviceId, metadata, schemas))
     return result
 
 
+def transform_sleep_file(
+    name: str, data: bytes, deviceId: str, metadata: TransformRunMetadata, schemas: Schemas
+) -> list[dict[str, Any]]:
+    with metadata.timers.timer("parse", file=name):
+        raw = json.loads(data)
+    if raw.get("dailySleepDTO") is None or raw.get("dailySleepDTO").get("id") is None:
+        print("Skipping sleep ingest. No sleep data found", name)
+        return []
+    with metadata.timers.timer("parse", file=name):
+        sleep = Sleep(**raw)
+    params = {"sleep": sleep, "deviceId": deviceId, "metadata": metadata, "schemas": schemas}
+    with metadata.timers.timer("map", entity="sleep", file=name)():
+        records = [transform_sleep(**params)]
+    records.extend(timed_map(metadata, "sleepStage", name, partial(transform_sleep_stage, **params)))
+    return records
+
+
 def process_hr_files(tmp_path: Path, deviceId: str, metadata: TransformRunMetadata, schemas: Schemas):
-    result = []
-    for hr in (Path(tmp_path) / HR_FOLDER).glob("*.json"):
-        print("Found hr file:", hr)
-        raw = json.loads(Path(hr).read_text())
-        hr = HeartRate(**raw)
-        result.extend(transform_hr(hr=hr, deviceId=deviceId, metadata=metadata, schemas=schemas))
+    result = SpillBuffer(metadata.memory)
+    for hr_file in (Path(tmp_path) / HR_FOLDER).glob("*.json"):
+        print("Found hr file:", hr_file)
+        result.extend(transform_hr_file(hr_file.name, hr_file.read_bytes(), deviceId, metadata, schemas))
     return result
 
 
+def transform_hr_file(
+    name: str, data: bytes, deviceId: str, metadata: TransformRunMetadata, schemas: Schemas
+) -> list[dict[str, Any]]:
+    with metadata.timers.timer("parse", file=name):
+        hr = HeartRate(**json.loads(data))
+    transform = partial(transform_hr, hr=hr, deviceId=deviceId, metadata=metadata, schemas=schemas)
+    return timed_map(metadata, "heartRate", name, transform)
+
+
 def process_device_files(tmp_path: Path, metadata: TransformRunMetadata, schemas: Schemas):
     result = []
-    for device in (Path(tmp_path) / DEVICE_FOLDER).glob("*.json"):
-        print("Found device file:", device)
-        raw = json.loads(Path(device).read_text())
-        device = Device(**raw)
-        result.extend(transform_device(device=device, metadata=metadata, schemas=schemas))
+    for device_file in (Path(tmp_path) / DEVICE_FOLDER).glob("*.json"):
+        print("Found device file:", device_file)
+        result.extend(transform_device_file(device_file.name, device_file.read_bytes(), metadata, schemas))
     return result
 
 
+def transform_device_file(
+    name: str, data: bytes, metadata: TransformRunMetadata, schemas: Schemas
+) -> list[dict[str, Any]]:
+    with metadata.timers.timer("parse", file=name):
+        device = Device(**json.loads(data))
+    transform = partial(transform_device, device=device, metadata=metadata, schemas=schemas)
+    return timed_map(metadata, "device", name, transform)
+
+
 def process_activity_files(tmp_path: Path, metadata: TransformRunMetadata, schemas: Schemas):
-    result = []
+    result = SpillBuffer(metadata.memory)
     activity_dir = Path(tmp_path) / ACTIVITY_FOLDER
 
     for activity_file in activity_dir.glob("*.fit"):
         print("Found activity file:", activity_file)
-        fit = process_activity_file(activity_file, metadata)
-        result.extend(transform_exercise(fit=fit, metadata=metadata, schemas=schemas))
-        result.extend(transform_location(fit=fit, metadata=metadata, schemas=schemas))
-        result.extend(transform_device_status(fit=fit, metadata=metadata, schemas=schemas))
-        device = transform_device_from_fit(fit=fit, metadata=metadata, schemas=schemas)
-        if device:
-            result.append(device)
-        result.extend(transform_hr_from_fit(fit=fit, metadata=metadata, schemas=schemas))
+        result.extend(transform_activity_file(activity_file, metadata, schemas))
     return result
 
 
+# data is the FIT file's content when it was never written to disk (the run command)
+def transform_activity_file(
+    activity_file: Path, metadata: TransformRunMetadata, schemas: Schemas, data: Optional[bytes] = None
+) -> list[dict[str, Any]]:
+    with metadata.timers.timer("parse", file=activity_file.name):
+        fit = process_activity_file(activity_file, metadata, data)
+    params = {"fit": fit, "metadata": metadata, "schemas": schemas}
+    name = activity_file.name
+    records = timed_map(metadata, "exercise", name, partial(transform_exercise, **params))
+    records.extend(timed_map(metadata, "location", name, partial(transform_location, **params)))
+    records.extend(timed_map(metadata, "deviceStatus", name, partial(transform_device_status, **params)))
+    device = transform_device_from_fit(**params)
+    if device:
+        records.append(device)
+    records.extend(timed_map(metadata, "heartRate", name, partial(transform_hr_from_fit, **params)))
+    return records
+
+
+# Mapping time includes the validation done by the mappers, which is also timed on its own as "validate"
+def timed_map(
+    metadata: TransformRunMetadata, entity: str, file: str, transform: Callable[[], list[dict[str, Any]]]
+) -> list[dict[str, Any]]:
+    with metadata.timers.timer("map", entity=entity, file=file) as timer:
+        records = transform()
+        timer.rows += len(records)
+    return records
+
+
+# Fine to assume just one for my use case. An archive's devices may all have been written by an earlier one, its sleep
+# and HR records then go to the run's first device
+def device_id(devices: list[dict[str, Any]], metadata: TransformRunMetadata) -> str:
+    if devices:
+        return devices[0]["id"]
+    if metadata.device_id is None:
+        raise ValueError("NO_DEVICE")
+    return metadata.device_id
+
+
 def read_activity_mapping(base_path: Path) -> dict[str, str]:
     activity_dir = base_path / ACTIVITY_FOLDER
 
@@ -130,10 +281,19 @@ def read_activity_mapping(base_path: Path) -> dict[str, str]:
 
     mapping_file = max(matches, key=lambda p: p.stat().st_mtime)
 
-    raw = json.loads(mapping_file.read_text(encoding="utf-8"))
+    return parse_activity_mapping(mapping_file.read_bytes())
 
-    return {str(k): str(v) for k, v in raw.items()}
+
+def parse_activity_mapping(data: bytes) -> dict[str, str]:
+    return {str(k): str(v) for k, v in json.loads(data).items()}
 
 
 def timestamp(time: datetime) -> str:
     return str(int(time.timestamp()))
+
+
+def open_columnar(file_path: str) -> "ColumnarWriter":
+    # pyarrow is an optional dependency, only needed with --columnar
+    from garmin.transform.columnar import ColumnarWriter
+
+    return ColumnarWriter(file_path)
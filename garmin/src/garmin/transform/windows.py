@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+from typing import Any, Optional, Union
+
+# A datetime or epoch seconds, whatever the mapper already has at hand. Naive datetimes are taken as UTC
+Timestamp = Union[datetime, int, float]
+
+
+def epoch(timestamp: Timestamp) -> float:
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp.timestamp()
+    return timestamp
+
+
+def isoformat(seconds: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(seconds, tz=timezone.utc).isoformat() if seconds is not None else None
+
+
+# Earliest and latest timestamp seen per entity type, kept as epoch seconds so recording a record is a couple of float
+# comparisons
+class TimeWindows:
+    __slots__ = ("bounds",)
+
+    def __init__(self) -> None:
+        self.bounds: dict[str, list[float]] = {}
+
+    def add(self, entity: str, timestamp: Timestamp) -> None:
+        seconds = epoch(timestamp)
+        bounds = self.bounds.get(entity)
+        if bounds is None:
+            self.bounds[entity] = [seconds, seconds]
+        elif seconds < bounds[0]:
+            bounds[0] = seconds
+        elif seconds > bounds[1]:
+            bounds[1] = seconds
+
+    def merge(self, other: "TimeWindows") -> None:
+        for entity, (start, end) in other.bounds.items():
+            self.add(entity, start)
+            self.add(entity, end)
+
+    @property
+    def start(self) -> Optional[float]:
+        return min((bounds[0] for bounds in self.bounds.values()), default=None)
+
+    @property
+    def end(self) -> Optional[float]:
+        return max((bounds[1] for bounds in self.bounds.values()), default=None)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            entity: {"start": isoformat(start), "end": isoformat(end)}
+            for entity, (start, end) in sorted(self.bounds.items())
+        }
@@ -0,0 +1,80 @@
+"""
+Deterministic synthetic Hares databases (SQLite, like the app's backup) for the transform benchmark. One habit canon
+record per entry, spread over a handful of number, yes/no and text list trackers.
+
+    uv run python benchmarks/synthetic.py --rows 100000 --out_dir /tmp/hares_in
+"""
+
+import argparse
+import random
+import sqlite3
+from pathlib import Path
+
+START = 1_704_067_200
+TRACKERS = (
+    (1, "Water", "", " glasses", "number"),
+    (2, "Coffee", "", " cups", "number"),
+    (3, "Workout", None, None, "boolean"),
+    (4, "Meditated", None, None, "boolean"),
+    (5, "Mood", None, None, "text"),
+)
+MOODS = ("calm", "tired", "happy", "stressed", "focused")
+PERIODS = (None, "morning", "afternoon", "evening")
+
+SCHEMA = """
+CREATE TABLE trackers (id INTEGER PRIMARY KEY, name TEXT NOT NULL, prefix TEXT, suffix TEXT);
+CREATE TABLE entries (
+    id INTEGER PRIMARY KEY, tracker_id INTEGER NOT NULL, date INTEGER NOT NULL, timezone TEXT,
+    "createdAt" INTEGER NOT NULL, "numberValue" REAL, "booleanValue" INTEGER, comment TEXT, "periodOfDay" TEXT
+);
+CREATE TABLE text_list_entries (entry_id INTEGER NOT NULL, name TEXT NOT NULL);
+CREATE INDEX text_list_entries_entry_id ON text_list_entries (entry_id);
+"""
+
+
+def generate(out_dir: Path, rows: int, seed: int = 0) -> Path:
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / "hares.sqlite"
+    path.unlink(missing_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.executemany("INSERT INTO trackers VALUES (?, ?, ?, ?)", (tracker[:4] for tracker in TRACKERS))
+    entries, texts = [], []
+    for i in range(1, max(1, rows) + 1):
+        tracker_id, _, _, _, kind = TRACKERS[i % len(TRACKERS)]
+        day = START + (i // len(TRACKERS)) * 86_400
+        number = rng.randint(1, 8) if kind == "number" else None
+        boolean = rng.randint(0, 1) if kind == "boolean" else None
+        if kind == "text":
+            texts.extend((i, mood) for mood in rng.sample(MOODS, rng.randint(1, 3)))
+        comment = "synthetic" if rng.random() < 0.1 else None
+        entries.append((
+            i,
+            tracker_id,
+            day,
+            "America/Toronto",
+            day + rng.randint(0, 86_399),
+            number,
+            boolean,
+            comment,
+            rng.choice(PERIODS),
+        ))
+    conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", entries)
+    conn.executemany("INSERT INTO text_list_entries VALUES (?, ?)", texts)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000, help="Habit entries, one canon record each")
+    parser.add_argument("--out_dir", required=True, type=Path)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(generate(args.out_dir, args.rows, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+End to end transform benchmark on synthetic inputs (see synthetic.py) of several sizes: rows/s, peak RSS and canon
+bytes written. Every size runs in a fresh process so the peak RSS is its own. Schemas and validation come from the
+usual env vars, e.g. SKIP_SCHEMA_CHECK=true to leave validation out.
+
+    uv run python benchmarks/transform.py --sizes 1000 10000 100000 --out benchmarks/baseline.json
+
+benchmarks/compare.py checks a run against the committed baseline.json.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import tempfile
+import time
+from collections.abc import Sequence
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from synthetic import generate
+
+from hares.config import PLUGIN_NAME
+from hares.transform.run import run_transform
+from hares.transform.schemas import get_schemas
+from hares.version import get_version
+
+SIZES = (1_000, 10_000, 100_000)
+# Recorded with the results, they change what a run does
+SETTINGS = ("SKIP_SCHEMA_CHECK", "VALIDATION_MODE", "VALIDATION_WORKERS")
+
+
+class BenchmarkFailedError(RuntimeError):
+    def __init__(self, size: int, exitcode: int | None):
+        super().__init__(f"BENCHMARK_FAILED: {size} rows, exit code {exitcode}")
+
+
+def transform_once(in_dir: Path, out_dir: Path) -> None:
+    run_transform(out_dir=str(out_dir), in_dir=str(in_dir), schemas=get_schemas())
+
+
+def measure(size: int, in_dir: Path, out_dir: Path) -> dict[str, Any]:
+    out_dir.mkdir()
+    process = multiprocessing.get_context("spawn").Process(target=transform_once, args=(in_dir, out_dir))
+    started = time.perf_counter()
+    process.start()
+    process.join()
+    process_seconds = time.perf_counter() - started
+    if process.exitcode != 0:
+        raise BenchmarkFailedError(size, process.exitcode)
+
+    meta = json.loads(next(out_dir.glob("*.meta.json")).read_text())
+    seconds = (
+        datetime.fromisoformat(meta["transform_end"]) - datetime.fromisoformat(meta["transform_start"])
+    ).total_seconds()
+    rows = sum(meta["counts"].values())
+    return {
+        "rows": rows,
+        "seconds": round(seconds, 3),
+        "process_seconds": round(process_seconds, 3),
+        "rows_per_second": round(rows / seconds) if seconds else None,
+        "peak_rss_bytes": meta["memory"]["peak_rss_bytes"],
+        "input_bytes": sum(path.stat().st_size for path in in_dir.iterdir()),
+        "output_bytes": sum(shard["bytes"] for shard in meta["shards"]),
+    }
+
+
+def run_benchmarks(sizes: Sequence[int], seed: int = 0, repeat: int = 1) -> dict[str, Any]:
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for size in sizes:
+            in_dir = Path(tmp_dir) / f"in_{size}"
+            generate(in_dir, size, seed)
+            runs = [measure(size, in_dir, Path(tmp_dir) / f"out_{size}_{attempt}") for attempt in range(repeat)]
+            # Best of the repeats, noise from a busy machine only ever makes a run slower or bigger
+            result = results[str(size)] = max(runs, key=lambda run: run["rows_per_second"] or 0)
+            result["peak_rss_bytes"] = min(run["peak_rss_bytes"] for run in runs)
+            print(
+                f"{size:>8} rows  {result['rows']:>8} out  {result['seconds']:>7.2f}s  "
+                f"{result['rows_per_second'] or 0:>8} rows/s  {result['peak_rss_bytes'] / 2**20:>7.1f} MiB peak  "
+                f"{result['output_bytes'] / 2**20:>7.2f} MiB out"
+            )
+
+    return {
+        "plugin": PLUGIN_NAME,
+        "version": get_version(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "seed": seed,
+        "repeat": repeat,
+        "settings": {name: os.environ[name] for name in SETTINGS if name in os.environ},
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES, help="Approximate canon records per run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per size, the best one is kept")
+    parser.add_argument("--out", type=Path, help="Write the results as JSON, e.g. benchmarks/baseline.json")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.seed, args.repeat)
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from hares.profiling import add_profile_args, profiled
+from hares.transform.canon_writer import add_canon_args, canon_options
+from hares.transform.dedup import add_dedup_args
+from hares.transform.memory import add_memory_args, memory_options
+
+
+def run():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        "--start_date",
+        required=True,
+        type=lambda value: datetime.fromtimestamp(float(value), tz=timezone.utc),
+        help="Start date in POSIX timestamp (UTC)",
+    )
+    parser.add_argument("--in_dir", required=True, type=Path, help="Input directory path")
+    parser.add_argument("--raw_dir", required=True, type=Path, help="Directory the raw file is copied to")
+    parser.add_argument("--out_dir", required=True, type=Path, help="Output directory path")
+    add_canon_args(parser)
+    add_memory_args(parser)
+    add_dedup_args(parser)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    from hares.extract.run import ExtractionParams
+    from hares.pipeline.run import run_pipeline
+    from hares.transform.schemas import get_schemas
+
+    schemas = get_schemas()
+
+    print("Start date:", args.start_date)
+    print(f"In Dir: {args.in_dir}")
+    print(f"Raw Dir: {args.raw_dir}")
+    print(f"Out Dir: {args.out_dir}")
+    print(f"Is skipping schemas: {schemas.skip_schema_check}")
+
+    params = ExtractionParams(start_date=args.start_date, out_dir=args.raw_dir, in_dir=args.in_dir)
+    with profiled(args.profile, args.out_dir, "run", args.profile_top):
+        run_pipeline(
+            params,
+            out_dir=args.out_dir,
+            schemas=schemas,
+            canon=canon_options(args),
+            memory=memory_options(args),
+            dedup=args.dedup,
+        )
+
+    print("Done!")
+
+
+def main():
+    load_dotenv()
+    run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from hares.extract.run import ExtractionParams, copy_file, latest_sqlite_file
+from hares.pipeline.raw import RawWriter
+from hares.transform.canon_writer import CanonOptions
+from hares.transform.memory import MemoryOptions
+from hares.transform.run import run_transform
+from hares.transform.schemas import Schemas
+
+
+# Extract and transform in one go: the latest export is transformed from where it is while the copy the extract would
+# have made is written next to it
+def run_pipeline(
+    params: ExtractionParams,
+    out_dir: Path,
+    schemas: Schemas,
+    canon: Optional[CanonOptions] = None,
+    memory: Optional[MemoryOptions] = None,
+    dedup: bool = False,
+):
+    extract_start = datetime.now(timezone.utc)
+    path = latest_sqlite_file(params.in_dir)
+    with RawWriter() as raw:
+        raw.submit(copy_file, path, params.out_dir, extract_start)
+        run_transform(
+            out_dir=str(out_dir),
+            in_dir=str(params.out_dir),
+            schemas=schemas,
+            canon=canon,
+            memory=memory,
+            dedup=dedup,
+            db_path=path,
+        )
@@ -1,5 +1,4 @@
 import sqlite3
-from datetime import datetime
 from typing import Any, Callable
 
 import jsonschema
@@ -64,10 +63,10 @@ def transform_habit(
 
     if schemas.habit is not None:
         try:
-            jsonschema.validate(instance=transformed, schema=schemas.habit)
+            schemas.habit.validate(transformed)
         except jsonschema.ValidationError as e:
             print(f"Valid data validation error: {e.message}")
             raise
 
-    metadata.record("habit", datetime.fromisoformat(transformed["recordedAt"]))
+    metadata.record("habit", row["createdAt"])
     return transformed
@@ -1,41 +1,60 @@
-import gzip
 import json
 import sqlite3
 import uuid
 from collections.abc import Iterator
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
-
-import jsonlines
-from dotenv import load_dotenv
+from typing import Any, Optional
 
 from hares.config import PLUGIN_NAME
+from hares.transform.canon_writer import CanonOptions, canon_writer, remove_outputs
+from hares.transform.checkpoints import CheckpointStore
+from hares.transform.dedup import RecordIndex
 from hares.transform.mappers.habit import transform_habit
+from hares.transform.memory import MemoryMonitor, MemoryOptions
 from hares.transform.meta import TransformRunMetadata
 from hares.transform.schemas import Schemas
-
-load_dotenv()
-
-
-def run_transform(out_dir: str, in_dir: str, schemas: Schemas):
+from hares.transform.timers import timed
+
+
+def run_transform(
+    out_dir: str,
+    in_dir: str,
+    schemas: Schemas,
+    canon: Optional[CanonOptions] = None,
+    memory: Optional[MemoryOptions] = None,
+    incremental: bool = False,
+    dedup: bool = False,
+    db_path: Optional[Path] = None,
+):
+    canon = canon or CanonOptions()
     file_name = f"{PLUGIN_NAME}_canon_{timestamp(datetime.now(timezone.utc))}_{str(uuid.uuid4()).split('-')[0]}"
     file_path = Path(out_dir) / file_name
-    canon_file = f"{file_path}.jsonl.gz"
     metadata_file = f"{file_path}.meta.json"
 
     metadata = TransformRunMetadata()
     metadata.start()
+    metadata.validation = schemas.validation
+    metadata.timers = schemas.validation.timers
+    metadata.schema_load_timings = schemas.load_timings
+    metadata.codec = canon.to_dict()
+    metadata.memory = MemoryMonitor(memory)
+    checkpoints = CheckpointStore(out_dir, incremental)
+    index = RecordIndex(out_dir, dedup)
     log_every = 10_000
     row_count = 0
 
-    db_path = get_latest_sqlite_file(Path(in_dir))
+    # The run command passes the file it's extracting
+    db_path = db_path or get_latest_sqlite_file(Path(in_dir))
 
     if db_path is None:
         print("No SQLite file found in folder")
         return
 
-    metadata.add_files_processed(db_path)
+    # Unchanged since an earlier --incremental run: no records, the meta file lists it as skipped
+    changed = bool(checkpoints.filter([db_path]))
+    if changed:
+        metadata.add_files_processed(db_path)
     conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
     cursor = conn.cursor()
@@ -61,29 +80,61 @@ def run_transform(out_dir: str, in_dir: str, schemas: Schemas):
         texts = [r["name"] for r in cursor.fetchall()]
         return texts
 
-    with gzip.open(canon_file, "wt", encoding="utf-8") as gz:
-        writer = jsonlines.Writer(gz)
-
-        for row in get_rows(db_path):
-            row_count += 1
-
-            transformed = transform_habit(
-                row=row,
-                schemas=schemas,
-                metadata=metadata,
-                fetch_tracker=fetch_tracker,
-                fetch_text_list=fetch_text_list,
-            )
-
-            writer.write(transformed)
-
-            if row_count % log_every == 0:
-                print(f"Processed {row_count} rows (habit={metadata.counts.get('habit', 0)})")
+    # Mapping time includes the validation done by the mappers, which is also timed on its own as "validate"
+    habit_timer = metadata.timers.per_record("map", entity="habit", file=db_path.name)
+    try:
+        with (
+            metadata.memory,
+            canon_writer(file_path, canon, timers=metadata.timers) as writer,
+            index.writer(writer) as indexed,
+            metadata.memory.writer(indexed) as sink,
+        ):
+            for row in timed(
+                get_rows(db_path) if changed else iter(()), metadata.timers.per_record("read", file=db_path.name)
+            ):
+                row_count += 1
+
+                with habit_timer():
+                    transformed = transform_habit(
+                        row=row,
+                        schemas=schemas,
+                        metadata=metadata,
+                        fetch_tracker=fetch_tracker,
+                        fetch_text_list=fetch_text_list,
+                    )
+
+                sink.write(transformed)
+
+                if row_count % log_every == 0:
+                    print(f"Processed {row_count} rows (habit={metadata.counts.get('habit', 0)})")
 
-    conn.close()
+        conn.close()
 
+        metadata.shards = writer.manifest()
+        metadata.writer = writer.stats()
+        if schemas.validation_pool is not None:
+            schemas.validation_pool.finish()
+    except BaseException:
+        # Whatever stopped the run, don't leave a complete looking canon file behind
+        remove_outputs(out_dir, file_name)
+        index.close()
+        if schemas.validation_pool is not None:
+            schemas.validation_pool.close()
+        raise
+
+    metadata.checkpoints = checkpoints.to_dict()
+    metadata.dedup = index.to_dict()
+    index.remove_suppressed(metadata.counts)
     with Path(metadata_file).open("w", encoding="utf-8") as f:
         json.dump(metadata.to_dict(), f, indent=2)
+    checkpoints.commit(file_name)
+    index.commit()
+
+
+# Only the latest file is transformed, the one --watch looks at
+def sqlite_inputs(folder: Path) -> list[Path]:
+    path = get_latest_sqlite_file(folder)
+    return [path] if path is not None else []
 
 
 def get_latest_sqlite_file(folder: Path) -> Path | None:
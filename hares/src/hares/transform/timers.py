@@ -0,0 +1,165 @@
+import time
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+from typing import Any, Optional, TypeVar
+
+from hares.transform.memory import current_rss
+
+T = TypeVar("T")
+_DONE = object()
+
+
+# Timing a call costs ~1.5us, for stages entered once per record only every sample_every-th call is timed and the totals
+# are scaled up to all calls
+PER_RECORD_SAMPLE_EVERY = 16
+
+
+class StageTimer:
+    __slots__ = (
+        "allocated",
+        "allocated_started",
+        "calls",
+        "cpu",
+        "cpu_started",
+        "rows",
+        "rss",
+        "rss_started",
+        "sample_every",
+        "timed",
+        "wall",
+        "wall_started",
+    )
+
+    def __init__(self, sample_every: int = 1) -> None:
+        self.sample_every = sample_every
+        self.calls = 0
+        self.timed = 0
+        self.rows = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.wall_started = 0.0
+        self.cpu_started = 0.0
+        # Memory is only tracked for stages that aren't sampled, reading RSS on every record would cost too much
+        self.rss: Optional[int] = None
+        self.rss_started: Optional[int] = None
+        self.allocated: Optional[int] = None
+        self.allocated_started = 0
+
+    # `with timer(rows=n):` when the rows are known up front, otherwise `timer.rows += n`
+    def __call__(self, rows: int = 1) -> "StageTimer":
+        self.rows += rows
+        return self
+
+    def __enter__(self) -> "StageTimer":
+        self.calls += 1
+        if self.calls % self.sample_every == 0:
+            if self.sample_every == 1:
+                self._start_memory()
+            self.wall_started = time.perf_counter()
+            self.cpu_started = time.process_time()
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        if self.calls % self.sample_every == 0:
+            self.wall += time.perf_counter() - self.wall_started
+            # Process CPU time, so it includes helper threads (compression, write-behind) running meanwhile
+            self.cpu += time.process_time() - self.cpu_started
+            self.timed += 1
+            if self.sample_every == 1:
+                self._stop_memory()
+
+    def _start_memory(self) -> None:
+        self.rss_started = current_rss()
+        if tracemalloc.is_tracing():
+            self.allocated_started = tracemalloc.get_traced_memory()[0]
+
+    def _stop_memory(self) -> None:
+        rss = current_rss()
+        if rss is not None and self.rss_started is not None:
+            self.rss = (self.rss or 0) + rss - self.rss_started
+        if tracemalloc.is_tracing():
+            self.allocated = (self.allocated or 0) + tracemalloc.get_traced_memory()[0] - self.allocated_started
+
+    @property
+    def scale(self) -> float:
+        return self.calls / self.timed if self.timed else 0.0
+
+    def add(self, other: "StageTimer") -> None:
+        # Totals of sampled timers are scaled before adding them up
+        self.calls += other.calls
+        self.timed += other.calls
+        self.rows += other.rows
+        self.wall += other.wall * other.scale
+        self.cpu += other.cpu * other.scale
+        if other.rss is not None:
+            self.rss = (self.rss or 0) + other.rss
+        if other.allocated is not None:
+            self.allocated = (self.allocated or 0) + other.allocated
+
+    def to_dict(self) -> dict[str, Any]:
+        wall = self.wall * self.scale
+        result: dict[str, Any] = {
+            "wall_seconds": round(wall, 3),
+            "cpu_seconds": round(self.cpu * self.scale, 3),
+            "rows": self.rows,
+            "rows_per_second": round(self.rows / wall) if wall and self.rows else None,
+        }
+        # Growth of the process RSS / of the memory traced by tracemalloc still held at the end of the stage
+        if self.rss is not None:
+            result["rss_growth_bytes"] = self.rss
+        if self.allocated is not None:
+            result["allocated_bytes"] = self.allocated
+        return result
+
+
+# Timers are kept per (stage, entity type, input file), fetch one once outside a hot loop and reuse it inside.
+# Serialized as totals per stage, and per stage for each entity type and input file
+class StageTimers:
+    def __init__(self) -> None:
+        self.timers: dict[tuple[str, Optional[str], Optional[str]], StageTimer] = {}
+
+    def timer(
+        self, stage: str, *, entity: Optional[str] = None, file: Optional[str] = None, sample_every: int = 1
+    ) -> StageTimer:
+        key = (stage, entity, file)
+        timer = self.timers.get(key)
+        if timer is None:
+            timer = self.timers[key] = StageTimer(sample_every)
+        return timer
+
+    def per_record(self, stage: str, *, entity: Optional[str] = None, file: Optional[str] = None) -> StageTimer:
+        return self.timer(stage, entity=entity, file=file, sample_every=PER_RECORD_SAMPLE_EVERY)
+
+    def merge(self, other: "StageTimers") -> None:
+        # Added to plain timers, the totals of sampled ones are scaled up by add()
+        for key, timer in other.timers.items():
+            self.timers.setdefault(key, StageTimer()).add(timer)
+
+    def to_dict(self) -> dict[str, Any]:
+        stages: dict[str, StageTimer] = defaultdict(StageTimer)
+        entities: dict[str, dict[str, StageTimer]] = defaultdict(lambda: defaultdict(StageTimer))
+        files: dict[str, dict[str, StageTimer]] = defaultdict(lambda: defaultdict(StageTimer))
+        for (stage, entity, file), timer in self.timers.items():
+            stages[stage].add(timer)
+            if entity is not None:
+                entities[entity][stage].add(timer)
+            if file is not None:
+                files[file][stage].add(timer)
+        return {
+            "stages": {stage: timer.to_dict() for stage, timer in stages.items()},
+            "entities": {k: {stage: t.to_dict() for stage, t in v.items()} for k, v in entities.items()},
+            "files": {k: {stage: t.to_dict() for stage, t in v.items()} for k, v in files.items()},
+        }
+
+
+# Times pulling each item out of a generator, i.e. the reading/parsing it does between yields
+def timed(items: Iterable[T], timer: StageTimer) -> Iterator[T]:
+    iterator = iter(items)
+    while True:
+        with timer:
+            item = next(iterator, _DONE)
+        if item is _DONE:
+            return
+        timer.rows += 1
+        yield item  # type: ignore[misc]
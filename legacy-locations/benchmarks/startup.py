@@ -0,0 +1,147 @@
+"""
+Startup latency of the extract, transform and run entry points and where their import time goes. Every sample is a fresh
+interpreter: `python -m <entry point> --help` for the latency (next to a bare `python -c pass`), `python -X importtime`
+importing the entry point for the cost per module and per top level package, the fastest of a few runs.
+
+    uv run python benchmarks/startup.py
+    uv run python benchmarks/startup.py --repeat 20 --top 20 --out /tmp/startup.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, NamedTuple
+
+from legacy_locations.config import PLUGIN_NAME
+from legacy_locations.version import get_version
+
+ENTRY_POINTS = ("legacy_locations.extract.cli", "legacy_locations.transform.cli", "legacy_locations.pipeline.cli")
+IMPORT_RUNS = 3
+IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|\s+(\S+)$")
+
+
+class ModuleImport(NamedTuple):
+    module: str
+    self_us: int
+    cumulative_us: int
+
+
+class StartupFailedError(RuntimeError):
+    def __init__(self, args: tuple[str, ...], stderr: str):
+        super().__init__(f"STARTUP_FAILED: {' '.join(args)}\n{stderr}")
+
+
+def run_python(*args: str) -> str:
+    result = subprocess.run([sys.executable, *args], capture_output=True, text=True)  # noqa: S603
+    if result.returncode != 0:
+        raise StartupFailedError(args, result.stderr)
+    return result.stderr
+
+
+def startup_seconds(args: tuple[str, ...], repeat: int) -> dict[str, float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run_python(*args)
+        samples.append(time.perf_counter() - started)
+    return {"median": round(statistics.median(samples), 4), "min": round(min(samples), 4)}
+
+
+def import_times(module: str) -> dict[str, ModuleImport]:
+    # The first run can also pay for writing .pyc files and a cold disk cache, the fastest one of each module is kept
+    fastest: dict[str, ModuleImport] = {}
+    for _ in range(IMPORT_RUNS):
+        for line in run_python("-X", "importtime", "-c", f"import {module}").splitlines():
+            match = IMPORT_TIME.match(line)
+            if match is None:
+                continue
+            name, self_us, cumulative_us = match[3], int(match[1]), int(match[2])
+            if name in fastest:
+                self_us = min(self_us, fastest[name].self_us)
+                cumulative_us = min(cumulative_us, fastest[name].cumulative_us)
+            fastest[name] = ModuleImport(name, self_us, cumulative_us)
+    return fastest
+
+
+def benchmark_entry_point(module: str, repeat: int, top: int) -> dict[str, Any]:
+    imports = import_times(module)
+    packages: dict[str, int] = defaultdict(int)
+    for entry in imports.values():
+        packages[entry.module.split(".")[0]] += entry.self_us
+    slowest = sorted(imports.values(), key=lambda entry: entry.self_us, reverse=True)[:top]
+    return {
+        "startup_seconds": startup_seconds(("-m", module, "--help"), repeat),
+        "import_seconds": round(imports[module].cumulative_us / 1e6, 4),
+        "packages": {
+            name: round(us / 1e6, 4) for name, us in sorted(packages.items(), key=lambda item: -item[1])[:top]
+        },
+        "modules": [
+            {
+                "module": entry.module,
+                "self_seconds": round(entry.self_us / 1e6, 4),
+                "cumulative_seconds": round(entry.cumulative_us / 1e6, 4),
+            }
+            for entry in slowest
+        ],
+    }
+
+
+def format_report(module: str, result: dict[str, Any]) -> str:
+    startup = result["startup_seconds"]
+    lines = [
+        f"{module}: {startup['median'] * 1000:.0f} ms to --help (median, min {startup['min'] * 1000:.0f} ms), "
+        f"{result['import_seconds'] * 1000:.0f} ms importing it",
+        f"  {'package':<40} {'self':>9}",
+    ]
+    lines += [f"  {name:<40} {seconds * 1000:>6.1f} ms" for name, seconds in result["packages"].items()]
+    lines.append(f"  {'module':<40} {'self':>9} {'cumulative':>12}")
+    lines += [
+        f"  {entry['module']:<40} {entry['self_seconds'] * 1000:>6.1f} ms {entry['cumulative_seconds'] * 1000:>9.1f} ms"
+        for entry in result["modules"]
+    ]
+    return "\n".join(lines)
+
+
+def run_benchmarks(repeat: int, top: int) -> dict[str, Any]:
+    interpreter = startup_seconds(("-c", "pass"), repeat)
+    print(f"python -c pass: {interpreter['median'] * 1000:.0f} ms (median, min {interpreter['min'] * 1000:.0f} ms)")
+    results = {}
+    for module in ENTRY_POINTS:
+        results[module] = benchmark_entry_point(module, repeat, top)
+        print(format_report(module, results[module]))
+
+    return {
+        "plugin": PLUGIN_NAME,
+        "version": get_version(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "repeat": repeat,
+        "interpreter_seconds": interpreter,
+        "results": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=10, help="Fresh interpreters timed per entry point")
+    parser.add_argument("--top", type=int, default=10, help="Packages and modules listed per entry point")
+    parser.add_argument("--out", type=Path, help="Write the results as JSON")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.repeat, args.top)
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
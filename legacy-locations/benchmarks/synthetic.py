@@ -0,0 +1,66 @@
+"""
+Deterministic synthetic legacy location exports (jsonl.gz) for the transform benchmark. Every row turns into a
+location and a deviceStatus canon record.
+
+    uv run python benchmarks/synthetic.py --rows 100000 --out_dir /tmp/legacy_in
+"""
+
+import argparse
+import gzip
+import json
+import random
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any
+
+START = datetime(2020, 1, 1, tzinfo=timezone.utc)
+TRIGGERS = ("p", "c", "t", "u")
+CONNECTIONS = ("wifi", "data", "offline")
+
+
+def row(i: int, lat: float, lng: float, rng: random.Random) -> dict[str, Any]:
+    return {
+        "row_id": i,
+        "timezone": "America/Toronto",
+        "raw": {
+            "timestamp": (START + timedelta(seconds=i * 30)).isoformat().replace("+00:00", "Z"),
+            "latitude": round(lat, 6),
+            "longitude": round(lng, 6),
+            "accuracy": rng.randint(3, 50),
+            "verticalAccuracy": rng.randint(1, 10),
+            "velocity": rng.randint(0, 60),
+            "altitude": rng.randint(0, 200),
+            "battery": rng.randint(5, 100),
+            "batteryStatus": rng.randint(1, 3),
+            "connectionStatus": rng.choice(CONNECTIONS),
+            "triggerType": rng.choice(TRIGGERS),
+            "wifiSSID": "home" if rng.random() < 0.5 else None,
+            "originalPublishTopic": "owntracks/user/phone",
+        },
+    }
+
+
+def generate(out_dir: Path, rows: int, seed: int = 0) -> Path:
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    path = out_dir / "locations.jsonl.gz"
+    lat, lng = 45.5, -73.6
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for i in range(max(1, rows // 2)):
+            lat += rng.uniform(-0.001, 0.001)
+            lng += rng.uniform(-0.001, 0.001)
+            f.write(json.dumps(row(i, lat, lng, rng)) + "\n")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000, help="Approximate canon records the export turns into")
+    parser.add_argument("--out_dir", required=True, type=Path)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(generate(args.out_dir, args.rows, args.seed))
+
+
+if __name__ == "__main__":
+    main()
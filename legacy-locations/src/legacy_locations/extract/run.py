@@ -1,5 +1,6 @@
 import shutil
 import uuid
+from collections.abc import Iterator
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
@@ -18,7 +19,15 @@ def run_extract(params: ExtractionParams):
     extract_start = datetime.now(timezone.utc)
     copied = 0
 
-    for path in Path(params.in_dir).rglob("*"):
+    for path in source_files(params.in_dir):
+        copy_file(path, params.out_dir, extract_start)
+        copied += 1
+
+    print(f"Copied {copied} file(s)")
+
+
+def source_files(in_dir: Path) -> Iterator[Path]:
+    for path in Path(in_dir).rglob("*"):
         if not path.is_file():
             continue
 
@@ -28,22 +37,23 @@ def run_extract(params: ExtractionParams):
         # if mtime <= args.start_date:
         #     continue
 
-        suffix = "".join(path.suffixes)
-        base = path.name.removesuffix(suffix)
+        yield path
 
-        file_name = f"{base}_{str(uuid.uuid4()).split('-')[0]}"
-        raw_file_name = f"{file_name}{suffix}"
-        dest_path = params.out_dir / raw_file_name
 
-        shutil.copy2(path, dest_path)
+def copy_file(path: Path, out_dir: Path, extract_start: datetime) -> Path:
+    suffix = "".join(path.suffixes)
+    base = path.name.removesuffix(suffix)
 
-        write_meta_file(
-            out_dir=params.out_dir,
-            source_path=path,
-            file_name=file_name,
-            extract_start=extract_start,
-        )
+    file_name = f"{base}_{str(uuid.uuid4()).split('-')[0]}"
+    raw_file_name = f"{file_name}{suffix}"
+    dest_path = out_dir / raw_file_name
 
-        copied += 1
+    shutil.copy2(path, dest_path)
 
-    print(f"Copied {copied} file(s)")
+    write_meta_file(
+        out_dir=out_dir,
+        source_path=path,
+        file_name=file_name,
+        extract_start=extract_start,
+    )
+    return dest_path
@@ -0,0 +1,51 @@
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Optional
+
+from legacy_locations.extract.run import ExtractionParams, copy_file, source_files
+from legacy_locations.pipeline.raw import RawWriter
+from legacy_locations.transform.canon_writer import CanonOptions, RecordSink
+from legacy_locations.transform.memory import MemoryOptions
+from legacy_locations.transform.meta import TransformRunMetadata
+from legacy_locations.transform.read_jsonl import is_jsonl_file
+from legacy_locations.transform.run import run_transform, transform_file
+from legacy_locations.transform.schemas import Schemas
+
+
+# Extract and transform in one go: the exports are transformed from where they are while the copies the extract would
+# have made are written next to it, so there's nothing to read back from disk
+def run_pipeline(
+    params: ExtractionParams,
+    device: str,
+    out_dir: Path,
+    schemas: Schemas,
+    canon: Optional[CanonOptions] = None,
+    memory: Optional[MemoryOptions] = None,
+    dedup: bool = False,
+):
+    run_transform(
+        device=device,
+        out_dir=str(out_dir),
+        in_dir=str(params.out_dir),
+        schemas=schemas,
+        canon=canon,
+        memory=memory,
+        dedup=dedup,
+        source=partial(transform_sources, params, device),
+    )
+
+
+def transform_sources(
+    params: ExtractionParams, device: str, writer: RecordSink, metadata: TransformRunMetadata, schemas: Schemas
+) -> None:
+    extract_start = datetime.now(timezone.utc)
+    copied = 0
+    with RawWriter() as raw:
+        # Sorted so the records come out in the same order every run
+        for path in sorted(source_files(params.in_dir)):
+            raw.submit(copy_file, path, params.out_dir, extract_start)
+            copied += 1
+            if is_jsonl_file(path):
+                transform_file(path, writer, metadata, schemas, device=device, write_device=True)
+    print(f"Copied {copied} file(s)")
@@ -1,19 +1,23 @@
 import argparse
 import os
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
 
 from dotenv import load_dotenv
-from pydantic.dataclasses import dataclass
 
-from legacy_locations.transform.run import run_transform
-from legacy_locations.transform.schemas import get_schemas
-
-load_dotenv()
+from legacy_locations.profiling import add_profile_args, profiled
+from legacy_locations.transform.canon_writer import add_canon_args, canon_options
+from legacy_locations.transform.checkpoints import add_checkpoint_args
+from legacy_locations.transform.dedup import add_dedup_args
+from legacy_locations.transform.memory import add_memory_args, memory_options
+from legacy_locations.transform.parallel import add_workers_arg
+from legacy_locations.transform.watch import add_watch_args, watch
 
 
 @dataclass
 class EnvVars:
-    device: str = os.environ["DEVICE"]
+    device: str = field(default_factory=lambda: os.environ["DEVICE"])
 
 
 def transform():
@@ -21,7 +25,18 @@ def transform():
 
     parser.add_argument("--out_dir", required=True, type=Path, help="Output directory path")
     parser.add_argument("--in_dir", required=True, type=Path, help="Input directory path")
+    add_canon_args(parser)
+    add_memory_args(parser)
+    add_checkpoint_args(parser)
+    add_dedup_args(parser)
+    add_workers_arg(parser)
+    add_watch_args(parser)
+    add_profile_args(parser)
     args = parser.parse_args()
+    # The mappers, models and schema validation are only imported once the arguments are known to be fine
+    from legacy_locations.transform.read_jsonl import jsonl_files
+    from legacy_locations.transform.run import run_transform
+    from legacy_locations.transform.schemas import get_schemas
 
     env = EnvVars()
     schemas = get_schemas()
@@ -31,12 +46,34 @@ def transform():
     print(f"Env vars: {env}")
     print(f"Is skipping schemas: {schemas.skip_schema_check}")
 
-    run_transform(device=env.device, out_dir=args.out_dir, in_dir=args.in_dir, schemas=schemas)
+    run = partial(
+        run_transform,
+        device=env.device,
+        out_dir=args.out_dir,
+        in_dir=args.in_dir,
+        canon=canon_options(args),
+        memory=memory_options(args),
+        incremental=args.incremental or args.watch,
+        dedup=args.dedup,
+        workers=args.workers,
+    )
+    with profiled(args.profile, args.out_dir, "transform", args.profile_top):
+        if args.watch:
+            # Schemas are loaded again for every run so each meta file only counts its own validations, from the
+            # schema cache and with the validators compiled for the first load
+            watch(
+                partial(jsonl_files, args.in_dir),
+                lambda paths: run(schemas=get_schemas(), inputs=paths),
+                args.watch_interval,
+            )
+        else:
+            run(schemas=schemas)
 
     print("Done transforming!")
 
 
 def main():
+    load_dotenv()
     transform()
 
 
@@ -0,0 +1,157 @@
+import argparse
+import hashlib
+import re
+import sqlite3
+from collections import defaultdict
+from contextlib import AbstractContextManager, nullcontext
+from pathlib import Path
+from typing import Any, Optional
+
+import orjson
+
+from legacy_locations.config import PLUGIN_NAME
+from legacy_locations.transform.canon_writer import RecordSink
+
+# Records looked up at once, a point query per record costs about twice as much
+BATCH_SIZE = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    entity TEXT NOT NULL,
+    id TEXT NOT NULL,
+    hash BLOB NOT NULL,
+    PRIMARY KEY (entity, id)
+) WITHOUT ROWID
+"""
+
+
+def add_dedup_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help=f"Only write records that are new or changed since earlier --dedup runs into --out_dir, tracked in {PLUGIN_NAME}_records.sqlite there",
+    )
+
+
+def content_hash(record: dict[str, Any]) -> bytes:
+    return hashlib.blake2b(orjson.dumps(record, option=orjson.OPT_SORT_KEYS), digest_size=16).digest()
+
+
+# (entityType, id) -> content hash of every record written by earlier runs. The whole run is one transaction committed
+# after the meta file is written, a run that fails is rolled back (close) and leaves the index as it was
+class RecordIndex:
+    def __init__(self, out_dir: str | Path, enabled: bool = True):
+        self.enabled = enabled
+        self.path = Path(out_dir) / f"{PLUGIN_NAME}_records.sqlite"
+        self.new: dict[str, int] = defaultdict(int)
+        self.changed: dict[str, int] = defaultdict(int)
+        self.suppressed: dict[str, int] = defaultdict(int)
+        self.connection: Optional[sqlite3.Connection] = None
+        if enabled:
+            self.connection = sqlite3.connect(self.path)
+            self.connection.execute(SCHEMA)
+
+    def writer(self, writer: RecordSink) -> AbstractContextManager[RecordSink]:
+        return DedupWriter(writer, self) if self.connection is not None else nullcontext(writer)
+
+    def select(self, records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        # The records that are new or changed, in order. Records without an id are always written
+        if self.connection is None:
+            return records
+        ids: dict[str, list[str]] = defaultdict(list)
+        for record in records:
+            if record.get("id") is not None:
+                ids[record.get("entityType", "unknown")].append(str(record["id"]))
+        known: dict[tuple[str, str], bytes] = {}
+        for entity, entity_ids in ids.items():
+            placeholders = ",".join("?" * len(entity_ids))
+            rows = self.connection.execute(
+                f"SELECT id, hash FROM records WHERE entity = ? AND id IN ({placeholders})",  # noqa: S608
+                (entity, *entity_ids),
+            )
+            known.update(((entity, record_id), digest) for record_id, digest in rows)
+
+        selected = []
+        updates = []
+        for record in records:
+            if record.get("id") is None:
+                selected.append(record)
+                continue
+            entity = record.get("entityType", "unknown")
+            key = (entity, str(record["id"]))
+            digest = content_hash(record)
+            previous = known.get(key)
+            if previous == digest:
+                self.suppressed[entity] += 1
+                continue
+            if previous is None:
+                self.new[entity] += 1
+            else:
+                self.changed[entity] += 1
+            # Also catches the same record twice within the batch
+            known[key] = digest
+            updates.append((*key, digest))
+            selected.append(record)
+        self.connection.executemany("INSERT OR REPLACE INTO records VALUES (?, ?, ?)", updates)
+        return selected
+
+    def remove_suppressed(self, counts: dict[str, int]) -> None:
+        # The run counts every record it mapped, keyed by entity type in snake case. Leaves the ones in the canon file
+        for entity, suppressed in self.suppressed.items():
+            key = re.sub(r"(?<!^)(?=[A-Z])", "_", entity).lower()
+            if key in counts:
+                counts[key] -= suppressed
+
+    def commit(self) -> None:
+        if self.connection is not None:
+            self.connection.commit()
+            self.connection.close()
+            self.connection = None
+
+    def close(self) -> None:
+        # Without a commit this rolls back, and releases the write lock right away rather than whenever it's collected
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def to_dict(self) -> Optional[dict[str, Any]]:
+        if not self.enabled:
+            return None
+        return {
+            "store": self.path.name,
+            "new": dict(self.new),
+            "changed": dict(self.changed),
+            "suppressed": dict(self.suppressed),
+        }
+
+
+# Batches records for the index in front of the canon writer, so suppressed records never reach the canon file or the
+# columnar tee
+class DedupWriter:
+    def __init__(self, writer: RecordSink, index: RecordIndex, batch_size: int = BATCH_SIZE):
+        self.writer = writer
+        self.index = index
+        self.batch_size = batch_size
+        self.batch: list[dict[str, Any]] = []
+
+    def __enter__(self) -> "DedupWriter":
+        return self
+
+    def __exit__(self, exc_type: Optional[type[BaseException]], *exc: object) -> None:
+        if exc_type is None:
+            self.flush()
+        else:
+            self.index.close()
+
+    def write(self, record: Any) -> None:
+        self.batch.append(record)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        batch, self.batch = self.batch, []
+        for record in self.index.select(batch):
+            self.writer.write(record)
+
+    def close(self) -> None:
+        self.flush()
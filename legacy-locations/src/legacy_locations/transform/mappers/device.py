@@ -7,7 +7,7 @@ def transform_device(params: TransformerParams):
     transformed_device = {"id": params.device, "entityType": "device", "source": "legacy_locations", "version": "1"}
     if params.schemas.device is not None:
         try:
-            jsonschema.validate(instance=transformed_device, schema=params.schemas.device)
+            params.schemas.device.validate(transformed_device)
         except jsonschema.ValidationError as e:
             print(f"Valid data validation error: {e.message}")
             raise
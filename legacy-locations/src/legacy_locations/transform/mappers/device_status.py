@@ -30,7 +30,7 @@ def transform_device_status(params: TransformerParams):
 
     if params.schemas.device_status is not None:
         try:
-            jsonschema.validate(instance=transformed, schema=params.schemas.device_status)
+            params.schemas.device_status.validate(transformed)
         except jsonschema.ValidationError as e:
             print(f"Valid data validation error: {e.message}")
             raise
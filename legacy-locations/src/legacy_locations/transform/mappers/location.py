@@ -26,7 +26,7 @@ def transform_location(params: TransformerParams):
 
     if params.schemas.location is not None:
         try:
-            jsonschema.validate(instance=transformed, schema=params.schemas.location)
+            params.schemas.location.validate(transformed)
         except jsonschema.ValidationError as e:
             print(f"Valid data validation error: {e.message}")
             raise
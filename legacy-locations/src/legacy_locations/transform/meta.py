@@ -1,9 +1,13 @@
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 from legacy_locations.config import PACKAGE_NAME
+from legacy_locations.transform.memory import MemoryMonitor
+from legacy_locations.transform.timers import StageTimers
+from legacy_locations.transform.validation import ValidationReport
+from legacy_locations.transform.windows import Timestamp, TimeWindows, isoformat
 from legacy_locations.version import get_version
 
 
@@ -14,8 +18,7 @@ class TransformRunMetadata:
 
     files_processed: list[str] = field(default_factory=list)
 
-    min_date: Optional[datetime] = None
-    max_date: Optional[datetime] = None
+    windows: TimeWindows = field(default_factory=TimeWindows)
 
     start_date: Optional[datetime] = None
 
@@ -27,6 +30,20 @@ class TransformRunMetadata:
         }
     )
 
+    validation: Optional[ValidationReport] = None
+    schema_load_timings: dict[str, float] = field(default_factory=lambda: {})
+    codec: Optional[dict[str, Any]] = None
+    shards: list[dict[str, Any]] = field(default_factory=lambda: [])
+    writer: Optional[dict[str, Any]] = None
+    timers: StageTimers = field(default_factory=StageTimers)
+    memory: Optional[MemoryMonitor] = None
+    # Store and inputs skipped by an --incremental run
+    checkpoints: Optional[dict[str, Any]] = None
+    # New, changed and suppressed records of a --dedup run
+    dedup: Optional[dict[str, Any]] = None
+    # Workers and per input part of a --workers run
+    parallel: Optional[dict[str, Any]] = None
+
     def add_files_processed(self, path: Path) -> None:
         self.files_processed.append(path.name)
 
@@ -36,22 +53,26 @@ class TransformRunMetadata:
     def record_device(self) -> None:
         self._inc("device")
 
-    def record_location(self, recorded_at: datetime) -> None:
+    def record_location(self, recorded_at: Timestamp) -> None:
         self._inc("location")
-        self._update_time_bounds(recorded_at)
+        self.windows.add("location", recorded_at)
 
-    def record_device_status(self, recorded_at: datetime) -> None:
+    def record_device_status(self, recorded_at: Timestamp) -> None:
         self._inc("device_status")
-        self._update_time_bounds(recorded_at)
+        self.windows.add("device_status", recorded_at)
 
     def _inc(self, key: str) -> None:
         self.counts[key] += 1
 
-    def _update_time_bounds(self, ts: datetime) -> None:
-        if self.min_date is None or ts < self.min_date:
-            self.min_date = ts
-        if self.max_date is None or ts > self.max_date:
-            self.max_date = ts
+    # A part is the metadata of one input transformed by a --workers process
+    def merge(self, part: "TransformRunMetadata") -> None:
+        self.files_processed.extend(part.files_processed)
+        self.windows.merge(part.windows)
+        for key, count in part.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        if self.validation is not None and part.validation is not None:
+            self.validation.merge(part.validation)
+        self.timers.merge(part.timers)
 
     def to_dict(self) -> dict:
         return {
@@ -60,7 +81,18 @@ class TransformRunMetadata:
             "transform_start": self.start_date.isoformat() if self.start_date else None,
             "transform_end": datetime.now(timezone.utc).isoformat(),
             "inputs": self.files_processed,
-            "window_start": (self.min_date.isoformat() if self.min_date else None),
-            "window_end": (self.max_date.isoformat() if self.max_date else None),
+            "window_start": isoformat(self.windows.start),
+            "window_end": isoformat(self.windows.end),
+            "windows": self.windows.to_dict(),
             "counts": self.counts,
+            "validation": self.validation.to_dict() if self.validation else None,
+            "schema_load_seconds": self.schema_load_timings,
+            "codec": self.codec,
+            "shards": self.shards,
+            "writer": self.writer,
+            "timings": self.timers.to_dict(),
+            "memory": self.memory.to_dict() if self.memory else None,
+            "checkpoints": self.checkpoints,
+            "dedup": self.dedup,
+            "parallel": self.parallel,
         }
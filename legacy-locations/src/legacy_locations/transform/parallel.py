@@ -0,0 +1,181 @@
+import argparse
+import shutil
+import time
+from collections.abc import Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from dataclasses import replace
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Callable, NamedTuple, Optional
+
+from legacy_locations.transform.canon_writer import (
+    CanonOptions,
+    CanonWriter,
+    RecordSink,
+    canon_writer,
+    read_canon,
+    throughput,
+)
+from legacy_locations.transform.dedup import RecordIndex
+from legacy_locations.transform.memory import MemoryMonitor, MemoryOptions
+from legacy_locations.transform.meta import TransformRunMetadata
+from legacy_locations.transform.schemas import Schemas, get_schemas
+
+# Transforms a single input file into the writer, has to be a module level function (or a partial of one) so the pool
+# can pickle it
+TransformFile = Callable[[Path, RecordSink, TransformRunMetadata, Schemas], None]
+
+
+class Part(NamedTuple):
+    input: str
+    path: Path
+    metadata: TransformRunMetadata
+    worker_peak_rss_bytes: int | None
+
+
+def add_workers_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes transforming input files in parallel, merged back in input order. 1 transforms them in turn",
+    )
+
+
+def part_options(canon: CanonOptions) -> CanonOptions:
+    # One file per part in the final codec, so unsharded parts can be concatenated as they are. The pool already keeps
+    # the cores busy, no compression or writer threads on top of it
+    return replace(canon, shard=False, compression_workers=1, write_queue_size=0)
+
+
+def transform_part(
+    transform: TransformFile,
+    input_path: Path,
+    part_path: Path,
+    canon: CanonOptions,
+    memory: MemoryOptions | None,
+    loaded: dict[str, Any],
+) -> Part:
+    # Runs in a pool process. Compiled validators don't pickle, so they're compiled again from the parent's schemas
+    schemas = get_schemas(loaded)
+    metadata = TransformRunMetadata()
+    metadata.validation = schemas.validation
+    metadata.timers = schemas.validation.timers
+    metadata.memory = MemoryMonitor(memory)
+    with (
+        metadata.memory,
+        canon_writer(part_path, part_options(canon), timers=metadata.timers) as writer,
+        metadata.memory.writer(writer) as sink,
+    ):
+        transform(input_path, sink, metadata, schemas)
+    metadata.shards = writer.manifest()
+    # ru_maxrss of the pool process, so the high-water mark of every part it ran so far rather than this one's
+    worker_peak_rss_bytes = metadata.memory.to_dict()["peak_rss_bytes"]
+    # The monitor holds a thread event, it stays in the worker
+    metadata.memory = None
+    return Part(input_path.name, writer.paths[0], metadata, worker_peak_rss_bytes)
+
+
+def run_parts(
+    transform: TransformFile,
+    inputs: Sequence[Path],
+    parts_dir: Path,
+    workers: int,
+    canon: CanonOptions,
+    memory: MemoryOptions | None,
+    schemas: Schemas,
+) -> list[Part]:
+    # spawn rather than fork, the parent has the memory monitor and possibly writer threads running
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn")) as executor:
+        futures = [
+            executor.submit(
+                transform_part, transform, path, parts_dir / f"part_{index:05d}", canon, memory, schemas.loaded
+            )
+            for index, path in enumerate(inputs)
+        ]
+        try:
+            return [future.result() for future in futures]
+        except BaseException:
+            for future in futures:
+                future.cancel()
+            raise
+
+
+class MergedCanon:
+    def __init__(self, path: Path, records: int, size: int, seconds: float):
+        self.path = path
+        self.records = records
+        self.size = size
+        self.seconds = seconds
+
+    @property
+    def paths(self) -> list[Path]:
+        return [self.path]
+
+    def remove(self) -> None:
+        self.path.unlink(missing_ok=True)
+
+    def manifest(self) -> list[dict[str, Any]]:
+        return [{"file": self.path.name, "records": self.records, "bytes": self.size}]
+
+    def stats(self) -> dict[str, Any]:
+        return throughput(self.records, self.size, self.seconds)
+
+
+# Parts are merged in input order, whichever worker finished first, so the canon records and the meta file counts are
+# the same for any number of workers. Records a run writes ahead of the parts (head) come before all of them though
+def merge_metadata(metadata: TransformRunMetadata, parts: Sequence[Part], workers: int) -> None:
+    for part in parts:
+        metadata.merge(part.metadata)
+    metadata.parallel = {
+        "workers": workers,
+        "parts": [
+            {
+                "input": part.input,
+                "records": part.metadata.shards[0]["records"],
+                "bytes": part.metadata.shards[0]["bytes"],
+                "worker_peak_rss_bytes": part.worker_peak_rss_bytes,
+            }
+            for part in parts
+        ],
+    }
+
+
+# Unsharded parts are concatenated byte for byte (gzip members / zstd frames are valid one after the other). Shards, the
+# columnar tee and the --dedup index need the records, so those are read back and written again. head is written before
+# the parts
+def merge_canon(
+    metadata: TransformRunMetadata,
+    parts: Sequence[Part],
+    file_path: str | Path,
+    canon: CanonOptions,
+    tee: Sequence[RecordSink] = (),
+    head: Iterable[Any] = (),
+    index: Optional[RecordIndex] = None,
+) -> Any:
+    with metadata.timers.timer("merge"):
+        if canon.shard or tee or (index is not None and index.enabled):
+            with (
+                canon_writer(file_path, canon, tee, metadata.timers) as writer,
+                index.writer(writer) if index is not None else nullcontext(writer) as sink,
+            ):
+                for record in head:
+                    sink.write(record)
+                for part in parts:
+                    for record in read_canon(part.path):
+                        sink.write(record)
+            return writer
+
+        started = time.perf_counter()
+        path = Path(f"{file_path}{canon.extension}")
+        with CanonWriter(path, canon, timer=metadata.timers.per_record("write")) as head_writer:
+            for record in head:
+                head_writer.write(record)
+        with path.open("ab") as out:
+            for part in parts:
+                with part.path.open("rb") as f:
+                    shutil.copyfileobj(f, out)
+        records = head_writer.records + sum(part.metadata.shards[0]["records"] for part in parts)
+        size = head_writer.size + sum(part.metadata.shards[0]["bytes"] for part in parts)
+        return MergedCanon(path, records, size, time.perf_counter() - started)
@@ -1,57 +1,137 @@
-import gzip
 import json
 import os
+import tempfile
 import uuid
 from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
-
-import jsonlines
-from dotenv import load_dotenv
+from typing import Callable, Optional
 
 from legacy_locations.config import PLUGIN_NAME
+from legacy_locations.transform.canon_writer import CanonOptions, RecordSink, canon_writer, remove_outputs
+from legacy_locations.transform.checkpoints import CheckpointStore
+from legacy_locations.transform.dedup import RecordIndex
 from legacy_locations.transform.mappers.device import transform_device
 from legacy_locations.transform.mappers.device_status import transform_device_status
 from legacy_locations.transform.mappers.location import transform_location
 from legacy_locations.transform.mappers.transformer_params import TransformerParams
+from legacy_locations.transform.memory import MemoryMonitor, MemoryOptions
 from legacy_locations.transform.meta import TransformRunMetadata
-from legacy_locations.transform.read_jsonl import get_rows
+from legacy_locations.transform.parallel import merge_canon, merge_metadata, run_parts
+from legacy_locations.transform.read_jsonl import get_rows, jsonl_files
 from legacy_locations.transform.schemas import Schemas
 
-load_dotenv()
+# Writes records from somewhere other than the export files in in_dir, the run command streams them from the extract
+Source = Callable[[RecordSink, TransformRunMetadata, Schemas], None]
 
 
-def run_transform(device: str, out_dir: str, in_dir: str, schemas: Schemas):
+def run_transform(
+    device: str,
+    out_dir: str,
+    in_dir: str,
+    schemas: Schemas,
+    canon: Optional[CanonOptions] = None,
+    memory: Optional[MemoryOptions] = None,
+    workers: int = 1,
+    incremental: bool = False,
+    # Instead of every input file in in_dir, --watch passes the ones that settled
+    inputs: Optional[list[Path]] = None,
+    dedup: bool = False,
+    source: Optional[Source] = None,
+):
+    canon = canon or CanonOptions()
     file_name = f"{PLUGIN_NAME}_canon_{timestamp(datetime.now(timezone.utc))}_{str(uuid.uuid4()).split('-')[0]}"
     file_path = os.path.join(out_dir, file_name)
-    canon_file = f"{file_path}.jsonl.gz"
     metadata_file = f"{file_path}.meta.json"
 
     metadata = TransformRunMetadata()
     metadata.start()
-    is_device_saved = False
-    log_every = 10000
-    row_count = 0
-
-    with gzip.open(canon_file, "wt", encoding="utf-8") as gz:
-        writer = jsonlines.Writer(gz)
-
-        for row in get_rows(Path(in_dir), metadata):
-            row_count += 1
-            params = TransformerParams(device=device, schemas=schemas, metadata=metadata, data=row)
-            if not is_device_saved:
-                # Currently only support one user/device
-                writer.write(transform_device(params))
-                is_device_saved = True
-
-            writer.write(transform_location(params))
-            writer.write(transform_device_status(params))
-            if row_count % log_every == 0:
-                print(
-                    f"Processed {row_count} rows (locations={metadata.counts.get('location')}, device_status={metadata.counts.get('device_status')})"
-                )
+    metadata.validation = schemas.validation
+    metadata.timers = schemas.validation.timers
+    metadata.schema_load_timings = schemas.load_timings
+    metadata.codec = canon.to_dict()
+    metadata.memory = MemoryMonitor(memory)
+    checkpoints = CheckpointStore(out_dir, incremental)
+    index = RecordIndex(out_dir, dedup)
+    files = checkpoints.filter(jsonl_files(Path(in_dir)) if inputs is None else inputs) if source is None else []
+
+    try:
+        if workers > 1:
+            with metadata.memory, tempfile.TemporaryDirectory(dir=out_dir, prefix=".parts_") as parts_dir:
+                transform = partial(transform_file, device=device, write_device=False)
+                parts = run_parts(transform, files, Path(parts_dir), workers, canon, memory, schemas)
+                merge_metadata(metadata, parts, workers)
+                # Parts leave the device out, it's written once ahead of them like a run without workers does
+                head = []
+                if metadata.counts["location"]:
+                    # The device record only needs the device name
+                    params = TransformerParams(device=device, schemas=schemas, metadata=metadata, data=None)  # type: ignore[arg-type]
+                    head.append(transform_device(params))
+                writer = merge_canon(metadata, parts, file_path, canon, head=head, index=index)
+        else:
+            with (
+                metadata.memory,
+                canon_writer(file_path, canon, timers=metadata.timers) as writer,
+                index.writer(writer) as indexed,
+                metadata.memory.writer(indexed) as sink,
+            ):
+                if source is not None:
+                    source(sink, metadata, schemas)
+                for path in files:
+                    transform_file(path, sink, metadata, schemas, device=device, write_device=True)
 
+        metadata.shards = writer.manifest()
+        metadata.writer = writer.stats()
+        if schemas.validation_pool is not None:
+            schemas.validation_pool.finish()
+    except BaseException:
+        # Whatever stopped the run, don't leave a complete looking canon file behind
+        remove_outputs(out_dir, file_name)
+        index.close()
+        if schemas.validation_pool is not None:
+            schemas.validation_pool.close()
+        raise
+
+    metadata.checkpoints = checkpoints.to_dict()
+    metadata.dedup = index.to_dict()
+    index.remove_suppressed(metadata.counts)
     with Path(metadata_file).open("w", encoding="utf-8") as f:
         json.dump(metadata.to_dict(), f, indent=2)
+    checkpoints.commit(file_name)
+    index.commit()
+
+
+# One export file, this is also what a --workers process runs for each file
+def transform_file(
+    path: Path,
+    writer: RecordSink,
+    metadata: TransformRunMetadata,
+    schemas: Schemas,
+    *,
+    device: str,
+    write_device: bool,
+) -> None:
+    log_every = 10000
+
+    # Mapping time includes the validation done by the mappers, which is also timed on its own as "validate"
+    location_timer = metadata.timers.per_record("map", entity="location")
+    device_status_timer = metadata.timers.per_record("map", entity="deviceStatus")
+    for row_count, row in enumerate(get_rows(path, metadata), start=1):
+        params = TransformerParams(device=device, schemas=schemas, metadata=metadata, data=row)
+        if write_device and not metadata.counts["device"]:
+            # Currently only support one user/device
+            writer.write(transform_device(params))
+
+        with location_timer():
+            transformed = transform_location(params)
+        writer.write(transformed)
+        with device_status_timer():
+            transformed = transform_device_status(params)
+        writer.write(transformed)
+        if row_count % log_every == 0:
+            print(
+                f"Processed {row_count} rows (locations={metadata.counts.get('location')}, device_status={metadata.counts.get('device_status')})"
+            )
 
 
 def timestamp(time: datetime) -> str:
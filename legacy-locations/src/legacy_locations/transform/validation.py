@@ -0,0 +1,117 @@
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+from legacy_locations.transform.fast_validator import build_validator
+from legacy_locations.transform.timers import StageTimers
+
+FULL = "full"
+SAMPLE = "sample"
+STRUCTURAL = "structural"
+VALIDATION_MODES = (FULL, SAMPLE, STRUCTURAL)
+
+
+@dataclass
+class EntityValidationCounts:
+    records: int = 0
+    full: int = 0
+    structural: int = 0
+    skipped: int = 0
+
+
+@dataclass
+class ValidationReport:
+    mode: str = FULL
+    sample_first: int = 1000
+    sample_every: int = 100
+    workers: int = 0
+    entities: dict[str, EntityValidationCounts] = field(default_factory=lambda: {})
+    # Shared with the run metadata so validation shows up next to the other stages
+    timers: StageTimers = field(default_factory=StageTimers)
+
+    def __post_init__(self) -> None:
+        if self.mode not in VALIDATION_MODES:
+            raise ValueError("INVALID_VALIDATION_MODE")
+        if self.sample_first < 0 or self.sample_every < 1:
+            raise ValueError("INVALID_VALIDATION_SAMPLE")
+
+    def validator(self, entity: str, schema: dict[str, Any], validate: Callable[[Any], None]) -> Callable[[Any], None]:
+        counts = self.entities.setdefault(entity, EntityValidationCounts())
+        timer = self.timers.per_record("validate", entity=entity)
+
+        if self.mode == SAMPLE:
+            first, every = self.sample_first, self.sample_every
+
+            def sampled(instance: Any) -> None:
+                index = counts.records
+                counts.records += 1
+                if index < first or (index - first) % every == 0:
+                    counts.full += 1
+                    with timer():
+                        validate(instance)
+                else:
+                    counts.skipped += 1
+
+            return sampled
+
+        if self.mode == STRUCTURAL:
+            is_valid = build_validator(structural_schema(schema))
+
+            def structural(instance: Any) -> None:
+                counts.records += 1
+                with timer():
+                    if is_valid is not None and is_valid(instance):
+                        counts.structural += 1
+                        return
+                    # Only pay for the full schema when the cheap check fails, it builds the error to report
+                    counts.full += 1
+                    validate(instance)
+
+            return structural
+
+        def full(instance: Any) -> None:
+            counts.records += 1
+            counts.full += 1
+            with timer():
+                validate(instance)
+
+        return full
+
+    def merge(self, other: "ValidationReport") -> None:
+        # Counts only, the timers are shared with the run metadata and merged with it
+        for entity, counts in other.entities.items():
+            merged = self.entities.setdefault(entity, EntityValidationCounts())
+            merged.records += counts.records
+            merged.full += counts.full
+            merged.structural += counts.structural
+            merged.skipped += counts.skipped
+
+    def to_dict(self) -> dict:
+        result: dict[str, Any] = {"mode": self.mode}
+        if self.mode == SAMPLE:
+            result["sample_first"] = self.sample_first
+            result["sample_every"] = self.sample_every
+        if self.workers:
+            result["workers"] = self.workers
+        result["entities"] = {
+            entity: {
+                "records": counts.records,
+                "full": counts.full,
+                "structural": counts.structural,
+                "skipped": counts.skipped,
+            }
+            for entity, counts in self.entities.items()
+        }
+        return result
+
+
+def structural_schema(schema: dict[str, Any]) -> dict[str, Any]:
+    # Required keys and the top level types, nothing nested
+    properties = {
+        key: {"type": prop["type"]}
+        for key, prop in schema.get("properties", {}).items()
+        if isinstance(prop, dict) and "type" in prop
+    }
+    result: dict[str, Any] = {"type": "object", "required": schema.get("required", []), "properties": properties}
+    if "$schema" in schema:
+        result["$schema"] = schema["$schema"]
+    return result
@@ -0,0 +1,102 @@
+import pickle
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Callable, Optional
+
+import jsonschema
+from jsonschema.exceptions import best_match
+
+from legacy_locations.transform.fast_validator import build_validator
+
+DEFAULT_BATCH_SIZE = 1000
+# Batches per worker waiting to be validated before the main loop blocks on the oldest one
+IN_FLIGHT_PER_WORKER = 4
+
+Failure = tuple[str, str, str]
+
+_worker_validators: dict[str, Callable[[Any], Optional[str]]] = {}
+
+
+class InvalidRecordsError(Exception):
+    def __init__(self, failures: list[Failure]):
+        super().__init__(f"INVALID_RECORDS: {len(failures)}")
+        self.failures = failures
+
+    # Raised in pool processes too, rebuilt from the failures rather than the message
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (InvalidRecordsError, (self.failures,))
+
+
+def _error_message(schema: dict[str, Any]) -> Callable[[Any], Optional[str]]:
+    validator = jsonschema.validators.validator_for(schema)(schema)
+    is_valid = build_validator(schema)
+
+    def check(instance: Any) -> Optional[str]:
+        if is_valid is not None and is_valid(instance):
+            return None
+        error = best_match(validator.iter_errors(instance))
+        return error.message if error is not None else None
+
+    return check
+
+
+def _init_worker(schemas: dict[str, dict[str, Any]]) -> None:
+    for entity, schema in schemas.items():
+        _worker_validators[entity] = _error_message(schema)
+
+
+def _validate_batch(payload: bytes) -> list[Failure]:
+    failures = []
+    for entity, record in pickle.loads(payload):  # noqa: S301
+        message = _worker_validators[entity](record)
+        if message is not None:
+            failures.append((entity, str(record.get("id")), message))
+    return failures
+
+
+class ValidationPool:
+    def __init__(self, schemas: dict[str, dict[str, Any]], workers: int, batch_size: int = DEFAULT_BATCH_SIZE):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.batch: list[tuple[str, Any]] = []
+        self.pending: deque[Future[list[Failure]]] = deque()
+        # Spawned like the --workers pool, by the first submit the writer, compression and memory monitor threads are
+        # running and forking then could copy a lock one of them holds
+        self.executor = ProcessPoolExecutor(
+            max_workers=workers, mp_context=get_context("spawn"), initializer=_init_worker, initargs=(schemas,)
+        )
+
+    def submit(self, entity: str, record: Any) -> None:
+        self.batch.append((entity, record))
+        if len(self.batch) >= self.batch_size:
+            self._flush()
+
+    def finish(self) -> None:
+        # Raises InvalidRecordsError for the first batch, in the order records were mapped, that has invalid records
+        self._flush()
+        try:
+            while self.pending:
+                self._collect(self.pending.popleft())
+        finally:
+            self.executor.shutdown(cancel_futures=True)
+
+    def close(self) -> None:
+        self.executor.shutdown(cancel_futures=True)
+
+    def _flush(self) -> None:
+        if self.batch:
+            # Pickled here so the records can't change while the executor thread is still sending them
+            self.pending.append(self.executor.submit(_validate_batch, pickle.dumps(self.batch)))
+            self.batch = []
+        while len(self.pending) > self.workers * IN_FLIGHT_PER_WORKER:
+            self._collect(self.pending.popleft())
+
+    def _collect(self, future: Future[list[Failure]]) -> None:
+        failures = future.result()
+        if not failures:
+            return
+        for entity, record_id, message in failures:
+            print(f"Validation error in {entity} {record_id}: {message}")
+        self.executor.shutdown(cancel_futures=True)
+        raise InvalidRecordsError(failures)
@@ -0,0 +1,58 @@
+"""
+Deterministic synthetic Obsidian habit exports (one JSON array, like the extractor writes) for the transform
+benchmark. One habit canon record per entry. Zero/empty values are left out by the transform, so none are generated.
+
+    uv run python benchmarks/synthetic.py --rows 100000 --out_dir /tmp/obsidian_in
+"""
+
+import argparse
+import json
+import random
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any
+
+START = date(2024, 1, 1)
+KEYS = ("water", "coffee", "workout", "reading", "mood", "notes")
+
+
+def value(key: str, rng: random.Random) -> Any:
+    if key in ("water", "coffee"):
+        return rng.randint(1, 8)
+    if key == "workout":
+        return True
+    if key == "reading":
+        return round(rng.uniform(0.5, 3), 1)
+    if key == "mood":
+        return rng.sample(["calm", "tired", "happy", "stressed"], rng.randint(1, 2))
+    return {"text": f"note {rng.randint(0, 999)}", "tags": ["synthetic"]}
+
+
+def generate(out_dir: Path, rows: int, seed: int = 0) -> Path:
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    entries = [
+        {
+            "key": KEYS[i % len(KEYS)],
+            "value": value(KEYS[i % len(KEYS)], rng),
+            "timezone": "America/Toronto",
+            "date": f"{(START + timedelta(days=i // len(KEYS))).isoformat()}T00:00:00Z",
+        }
+        for i in range(max(1, rows))
+    ]
+    path = out_dir / "habits.json"
+    path.write_text(json.dumps(entries), encoding="utf-8")
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000, help="Habit entries, one canon record each")
+    parser.add_argument("--out_dir", required=True, type=Path)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(generate(args.out_dir, args.rows, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -17,26 +17,34 @@ class ExtractionParams:
 def run_extract(params: ExtractionParams):
     extract_start = datetime.now(timezone.utc)
 
+    path = latest_json_file(params.in_dir)
+    copy_file(path, params.out_dir, extract_start)
+
+    print(f"Copied json file {path}")
+
+
+def latest_json_file(in_dir: Path) -> Path:
     extensions = {".json"}
-    json_files = (p for p in Path(params.in_dir).rglob("*") if p.suffix in extensions and p.is_file())
+    json_files = (p for p in Path(in_dir).rglob("*") if p.suffix in extensions and p.is_file())
 
     # Get latest file
-    path = max(json_files, key=lambda p: p.stat().st_ctime)
+    return max(json_files, key=lambda p: p.stat().st_ctime)
 
+
+def copy_file(path: Path, out_dir: Path, extract_start: datetime) -> Path:
     suffix = "".join(path.suffixes)
     base = path.name.removesuffix(suffix)
 
     file_name = f"{base}_{str(uuid.uuid4()).split('-')[0]}"
     raw_file_name = f"{file_name}{suffix}"
-    dest_path = params.out_dir / raw_file_name
+    dest_path = out_dir / raw_file_name
 
     shutil.copy2(path, dest_path)
 
     write_meta_file(
-        out_dir=params.out_dir,
+        out_dir=out_dir,
         source_path=path,
         file_name=file_name,
         extract_start=extract_start,
     )
-
-    print(f"Copied json file {path}")
+    return dest_path
@@ -1,12 +1,15 @@
 import argparse
+from functools import partial
 from pathlib import Path
 
 from dotenv import load_dotenv
 
-from obsidian_habits.transform.run import run_transform
-from obsidian_habits.transform.schemas import get_schemas
-
-load_dotenv()
+from obsidian_habits.profiling import add_profile_args, profiled
+from obsidian_habits.transform.canon_writer import add_canon_args, canon_options
+from obsidian_habits.transform.checkpoints import add_checkpoint_args
+from obsidian_habits.transform.dedup import add_dedup_args
+from obsidian_habits.transform.memory import add_memory_args, memory_options
+from obsidian_habits.transform.watch import add_watch_args, watch
 
 
 def transform():
@@ -14,7 +17,16 @@ def transform():
 
     parser.add_argument("--out_dir", required=True, type=Path, help="Output directory path")
     parser.add_argument("--in_dir", required=True, type=Path, help="Input directory path")
+    add_canon_args(parser)
+    add_memory_args(parser)
+    add_checkpoint_args(parser)
+    add_dedup_args(parser)
+    add_watch_args(parser)
+    add_profile_args(parser)
     args = parser.parse_args()
+    # The mappers, models and schema validation are only imported once the arguments are known to be fine
+    from obsidian_habits.transform.run import json_inputs, run_transform
+    from obsidian_habits.transform.schemas import get_schemas
 
     # env = EnvVars()
     schemas = get_schemas()
@@ -24,12 +36,28 @@ def transform():
     # print(f"Env vars: {env}")
     print(f"Is skipping schemas: {schemas.skip_schema_check}")
 
-    run_transform(out_dir=args.out_dir, in_dir=args.in_dir, schemas=schemas)
+    run = partial(
+        run_transform,
+        out_dir=args.out_dir,
+        in_dir=args.in_dir,
+        canon=canon_options(args),
+        memory=memory_options(args),
+        incremental=args.incremental or args.watch,
+        dedup=args.dedup,
+    )
+    with profiled(args.profile, args.out_dir, "transform", args.profile_top):
+        if args.watch:
+            # Schemas are loaded again for every run so each meta file only counts its own validations, from the
+            # schema cache and with the validators compiled for the first load
+            watch(partial(json_inputs, args.in_dir), lambda _: run(schemas=get_schemas()), args.watch_interval)
+        else:
+            run(schemas=schemas)
 
     print("Done transforming!")
 
 
 def main():
+    load_dotenv()
     transform()
 
 
@@ -1,6 +1,7 @@
 import json
 from collections.abc import Mapping
 from datetime import datetime
+from functools import lru_cache
 from typing import Any, Callable, Optional
 
 import jsonschema
@@ -21,6 +22,12 @@ def normalize(value):
     return value
 
 
+# Every habit of a day has the same date, only parse each one once
+@lru_cache(maxsize=4096)
+def parse_date(date: str) -> datetime:
+    return datetime.fromisoformat(date)
+
+
 def transform_habit(
     *,
     row: dict[str, Any],
@@ -45,10 +52,10 @@ def transform_habit(
 
     if schemas.habit is not None:
         try:
-            jsonschema.validate(instance=transformed, schema=schemas.habit)
+            schemas.habit.validate(transformed)
         except jsonschema.ValidationError as e:
             print(f"Valid data validation error: {e.message}")
             raise
 
-    metadata.record("habit", datetime.fromisoformat(transformed["recordedAt"]))
+    metadata.record("habit", parse_date(row["date"]))
     return transformed
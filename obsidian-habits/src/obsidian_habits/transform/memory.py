@@ -0,0 +1,220 @@
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import tracemalloc
+from collections.abc import Iterable, Iterator
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass
+from typing import IO, Any, Optional
+
+import orjson
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+FAIL = "fail"
+SPILL = "spill"
+BUDGET_ACTIONS = (FAIL, SPILL)
+MB = 1024 * 1024
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> Optional[int]:
+    # Linux only, elsewhere the peak is the best we get without psutil
+    try:
+        with open("/proc/self/statm", "rb") as f:
+            return int(f.read().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+def peak_rss() -> Optional[int]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB on Linux
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MemoryBudgetExceededError(MemoryError):
+    def __init__(self, rss: int, budget: int):
+        super().__init__(f"MEMORY_BUDGET_EXCEEDED: {rss // MB} MiB > {budget // MB} MiB")
+        self.rss = rss
+        self.budget = budget
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (MemoryBudgetExceededError, (self.rss, self.budget))
+
+
+@dataclass
+class MemoryOptions:
+    budget_mb: Optional[int] = None
+    # fail stops the run as soon as RSS goes over the budget, spill moves buffered records to disk instead
+    action: str = FAIL
+    # tracemalloc, adds allocated bytes to the stage timings but slows the run down noticeably
+    trace: bool = False
+    interval: float = 0.2
+
+    def __post_init__(self) -> None:
+        if self.action not in BUDGET_ACTIONS:
+            raise ValueError("INVALID_MEMORY_BUDGET_ACTION")
+
+    @property
+    def budget(self) -> Optional[int]:
+        return self.budget_mb * MB if self.budget_mb else None
+
+
+def add_memory_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--memory_budget_mb", type=int, default=None, help="RSS the transform may use, no limit by default"
+    )
+    parser.add_argument(
+        "--memory_budget_action",
+        choices=BUDGET_ACTIONS,
+        default=FAIL,
+        help="fail stops the run once over budget, spill moves buffered records to disk instead",
+    )
+    parser.add_argument(
+        "--trace_memory", action="store_true", help="Record allocated bytes per stage with tracemalloc (slow)"
+    )
+
+
+def memory_options(args: argparse.Namespace) -> MemoryOptions:
+    return MemoryOptions(budget_mb=args.memory_budget_mb, action=args.memory_budget_action, trace=args.trace_memory)
+
+
+# With a budget a thread samples RSS every interval and flags the run as over budget. The spill action moves buffered
+# records to disk from then on, the fail action raises MemoryBudgetExceededError on the main thread from check(), which
+# the writer (and SpillBuffer) call before every record, or when leaving the `with` at the latest
+class MemoryMonitor:
+    def __init__(self, options: Optional[MemoryOptions] = None):
+        self.options = options or MemoryOptions()
+        self.max_sampled = 0
+        self.over_budget = False
+        self.spilled_records = 0
+        self.stopped = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> "MemoryMonitor":
+        if self.options.trace and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        # Nothing to sample for without a budget, the peak comes from getrusage
+        if self.options.budget is not None:
+            self.thread = threading.Thread(target=self._watch, name="memory-monitor", daemon=True)
+            self.thread.start()
+        return self
+
+    def __exit__(self, exc_type: Optional[type[BaseException]], *exc: object) -> None:
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+        if exc_type is None:
+            self.check()
+
+    def writer(self, writer: Any) -> AbstractContextManager[Any]:
+        return (
+            BudgetCheckedWriter(writer, self)
+            if self.options.budget is not None and self.options.action == FAIL
+            else nullcontext(writer)
+        )
+
+    def check(self) -> None:
+        if self.over_budget and self.options.action == FAIL:
+            raise MemoryBudgetExceededError(self.max_sampled, self.options.budget or 0)
+
+    @property
+    def should_spill(self) -> bool:
+        return self.over_budget and self.options.action == SPILL
+
+    def sample(self) -> int:
+        rss = current_rss() or peak_rss() or 0
+        self.max_sampled = max(self.max_sampled, rss)
+        budget = self.options.budget
+        if budget is not None and rss > budget:
+            self.over_budget = True
+        return rss
+
+    def to_dict(self) -> dict[str, Any]:
+        result: dict[str, Any] = {
+            "peak_rss_bytes": peak_rss() or self.max_sampled or None,
+            "budget_bytes": self.options.budget,
+            "budget_action": self.options.action,
+            "over_budget": self.over_budget,
+            "spilled_records": self.spilled_records,
+        }
+        if tracemalloc.is_tracing():
+            result["traced_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        return result
+
+    def _watch(self) -> None:
+        while not self.stopped.wait(self.options.interval):
+            self.sample()
+
+
+# In front of the canon writer with the fail action, so the run stops at the next record once over budget
+class BudgetCheckedWriter:
+    def __init__(self, writer: Any, monitor: MemoryMonitor):
+        self.writer = writer
+        self.monitor = monitor
+
+    def __enter__(self) -> "BudgetCheckedWriter":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        pass
+
+    def write(self, record: Any) -> None:
+        self.monitor.check()
+        self.writer.write(record)
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+# List of records that moves to a temp file (as JSON lines) once the monitor says we're over budget
+class SpillBuffer:
+    def __init__(self, monitor: Optional[MemoryMonitor]):
+        self.monitor = monitor
+        self.items: list[Any] = []
+        self.file: Optional[IO[bytes]] = None
+        self.spilled = 0
+
+    def __len__(self) -> int:
+        return len(self.items) + self.spilled
+
+    def append(self, record: Any) -> None:
+        if self.monitor is not None:
+            self.monitor.check()
+        if self.file is None and self.monitor is not None and self.monitor.should_spill:
+            self.file = tempfile.TemporaryFile()  # noqa: SIM115
+            self._spill(self.file, self.items)
+            self.items = []
+        if self.file is None:
+            self.items.append(record)
+        else:
+            self._spill(self.file, [record])
+
+    def extend(self, records: Iterable[Any]) -> None:
+        for record in records:
+            self.append(record)
+
+    # Can only be iterated once, the temp file is closed after that
+    def __iter__(self) -> Iterator[Any]:
+        if self.file is None:
+            yield from self.items
+            return
+        self.file.seek(0)
+        for line in self.file:
+            yield orjson.loads(line)
+        self.file.close()
+        self.file = None
+
+    def _spill(self, file: IO[bytes], records: list[Any]) -> None:
+        file.write(b"".join(orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE) for record in records))
+        self.spilled += len(records)
+        if self.monitor is not None:
+            self.monitor.spilled_records += len(records)
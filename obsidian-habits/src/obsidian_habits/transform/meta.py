@@ -1,9 +1,13 @@
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 from obsidian_habits.config import PACKAGE_NAME
+from obsidian_habits.transform.memory import MemoryMonitor
+from obsidian_habits.transform.timers import StageTimers
+from obsidian_habits.transform.validation import ValidationReport
+from obsidian_habits.transform.windows import Timestamp, TimeWindows, isoformat
 from obsidian_habits.version import get_version
 
 
@@ -14,23 +18,34 @@ class TransformRunMetadata:
 
     files_processed: list[str] = field(default_factory=list)
 
-    min_date: Optional[datetime] = None
-    max_date: Optional[datetime] = None
+    windows: TimeWindows = field(default_factory=TimeWindows)
 
     start_date: Optional[datetime] = None
 
     counts: dict[str, int] = field(default_factory=lambda: {})
 
+    validation: Optional[ValidationReport] = None
+    schema_load_timings: dict[str, float] = field(default_factory=lambda: {})
+    codec: Optional[dict[str, Any]] = None
+    shards: list[dict[str, Any]] = field(default_factory=lambda: [])
+    writer: Optional[dict[str, Any]] = None
+    timers: StageTimers = field(default_factory=StageTimers)
+    memory: Optional[MemoryMonitor] = None
+    # Store and inputs skipped by an --incremental run
+    checkpoints: Optional[dict[str, Any]] = None
+    # New, changed and suppressed records of a --dedup run
+    dedup: Optional[dict[str, Any]] = None
+
     def add_files_processed(self, path: Path) -> None:
         self.files_processed.append(path.name)
 
     def start(self) -> None:
         self.start_date = datetime.now(timezone.utc)
 
-    def record(self, entity: str, date: datetime | None) -> None:
+    def record(self, entity: str, *timestamps: Timestamp) -> None:
         self._inc(entity)
-        if date is not None:
-            self._update_time_bounds(date)
+        for timestamp in timestamps:
+            self.windows.add(entity, timestamp)
 
     def _inc(self, key: str) -> None:
         if self.counts.get(key):
@@ -38,12 +53,6 @@ class TransformRunMetadata:
         else:
             self.counts[key] = 1
 
-    def _update_time_bounds(self, ts: datetime) -> None:
-        if self.min_date is None or ts < self.min_date:
-            self.min_date = ts
-        if self.max_date is None or ts > self.max_date:
-            self.max_date = ts
-
     def to_dict(self) -> dict:
         return {
             "transformer": self.transformer,
@@ -51,7 +60,17 @@ class TransformRunMetadata:
             "transform_start": self.start_date.isoformat() if self.start_date else None,
             "transform_end": datetime.now(timezone.utc).isoformat(),
             "inputs": self.files_processed,
-            "window_start": (self.min_date.isoformat() if self.min_date else None),
-            "window_end": (self.max_date.isoformat() if self.max_date else None),
+            "window_start": isoformat(self.windows.start),
+            "window_end": isoformat(self.windows.end),
+            "windows": self.windows.to_dict(),
             "counts": self.counts,
+            "validation": self.validation.to_dict() if self.validation else None,
+            "schema_load_seconds": self.schema_load_timings,
+            "codec": self.codec,
+            "shards": self.shards,
+            "writer": self.writer,
+            "timings": self.timers.to_dict(),
+            "memory": self.memory.to_dict() if self.memory else None,
+            "checkpoints": self.checkpoints,
+            "dedup": self.dedup,
         }
@@ -1,61 +1,112 @@
-import gzip
 import json
 import uuid
 from collections.abc import Iterator
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
-
-import jsonlines
-from dotenv import load_dotenv
+from typing import Any, Optional
 
 from obsidian_habits.config import PLUGIN_NAME
+from obsidian_habits.transform.canon_writer import CanonOptions, canon_writer, remove_outputs
+from obsidian_habits.transform.checkpoints import CheckpointStore
+from obsidian_habits.transform.dedup import RecordIndex
 from obsidian_habits.transform.mappers.habit import transform_habit
+from obsidian_habits.transform.memory import MemoryMonitor, MemoryOptions
 from obsidian_habits.transform.meta import TransformRunMetadata
 from obsidian_habits.transform.schemas import Schemas
-
-load_dotenv()
-
-
-def run_transform(out_dir: str, in_dir: str, schemas: Schemas):
+from obsidian_habits.transform.timers import timed
+
+
+def run_transform(
+    out_dir: str,
+    in_dir: str,
+    schemas: Schemas,
+    canon: Optional[CanonOptions] = None,
+    memory: Optional[MemoryOptions] = None,
+    incremental: bool = False,
+    dedup: bool = False,
+    json_path: Optional[Path] = None,
+):
+    canon = canon or CanonOptions()
     file_name = f"{PLUGIN_NAME}_canon_{timestamp(datetime.now(timezone.utc))}_{str(uuid.uuid4()).split('-')[0]}"
     file_path = Path(out_dir) / file_name
-    canon_file = f"{file_path}.jsonl.gz"
     metadata_file = f"{file_path}.meta.json"
 
     metadata = TransformRunMetadata()
     metadata.start()
+    metadata.validation = schemas.validation
+    metadata.timers = schemas.validation.timers
+    metadata.schema_load_timings = schemas.load_timings
+    metadata.codec = canon.to_dict()
+    metadata.memory = MemoryMonitor(memory)
+    checkpoints = CheckpointStore(out_dir, incremental)
+    index = RecordIndex(out_dir, dedup)
     log_every = 10_000
     row_count = 0
 
-    json_path = get_latest_json_file(Path(in_dir))
+    # The run command passes the file it's extracting
+    json_path = json_path or get_latest_json_file(Path(in_dir))
 
     if json_path is None:
         print("No json file found in folder")
         return
 
-    metadata.add_files_processed(json_path)
-
-    with gzip.open(canon_file, "wt", encoding="utf-8") as gz:
-        writer = jsonlines.Writer(gz)
-
-        for row in get_rows(json_path):
-            row_count += 1
-
-            transformed = transform_habit(
-                row=row,
-                schemas=schemas,
-                metadata=metadata,
-            )
-
-            if transformed:
-                writer.write(transformed)
-
-            if row_count % log_every == 0:
-                print(f"Processed {row_count} rows (habit={metadata.counts.get('habit', 0)})")
-
+    # Unchanged since an earlier --incremental run: no records, the meta file lists it as skipped
+    changed = bool(checkpoints.filter([json_path]))
+    if changed:
+        metadata.add_files_processed(json_path)
+
+    # Mapping time includes the validation done by the mappers, which is also timed on its own as "validate"
+    habit_timer = metadata.timers.per_record("map", entity="habit", file=json_path.name)
+    try:
+        with (
+            metadata.memory,
+            canon_writer(file_path, canon, timers=metadata.timers) as writer,
+            index.writer(writer) as indexed,
+            metadata.memory.writer(indexed) as sink,
+        ):
+            for row in timed(
+                get_rows(json_path) if changed else iter(()), metadata.timers.per_record("read", file=json_path.name)
+            ):
+                row_count += 1
+
+                with habit_timer():
+                    transformed = transform_habit(
+                        row=row,
+                        schemas=schemas,
+                        metadata=metadata,
+                    )
+
+                if transformed:
+                    sink.write(transformed)
+
+                if row_count % log_every == 0:
+                    print(f"Processed {row_count} rows (habit={metadata.counts.get('habit', 0)})")
+
+        metadata.shards = writer.manifest()
+        metadata.writer = writer.stats()
+        if schemas.validation_pool is not None:
+            schemas.validation_pool.finish()
+    except BaseException:
+        # Whatever stopped the run, don't leave a complete looking canon file behind
+        remove_outputs(out_dir, file_name)
+        index.close()
+        if schemas.validation_pool is not None:
+            schemas.validation_pool.close()
+        raise
+
+    metadata.checkpoints = checkpoints.to_dict()
+    metadata.dedup = index.to_dict()
+    index.remove_suppressed(metadata.counts)
     with Path(metadata_file).open("w", encoding="utf-8") as f:
         json.dump(metadata.to_dict(), f, indent=2)
+    checkpoints.commit(file_name)
+    index.commit()
+
+
+# Only the latest file is transformed, the one --watch looks at
+def json_inputs(folder: Path) -> list[Path]:
+    path = get_latest_json_file(folder)
+    return [path] if path is not None else []
 
 
 def get_latest_json_file(folder: Path) -> Path | None:
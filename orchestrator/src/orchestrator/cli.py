@@ -0,0 +1,45 @@
+import argparse
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+
+from orchestrator.config import load_config
+from orchestrator.report import build_report, format_report, previous_seconds, write_report
+from orchestrator.run import FAILED, SKIPPED, Scheduler
+
+
+def run() -> bool:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--config", required=True, type=Path, help="JSON file with the limits and the jobs to run")
+    parser.add_argument(
+        "--report_dir", type=Path, help="Where the run report and job logs go. Defaults to report_dir in the config"
+    )
+    args = parser.parse_args()
+    config = load_config(args.config, args.report_dir)
+
+    started = datetime.now(timezone.utc)
+    log_dir = config.report_dir / f"logs_{started.strftime('%Y%m%dT%H%M%S')}"
+    log_dir.mkdir(parents=True, exist_ok=True)
+    print(f"Config: {args.config}")
+    print(f"Report Dir: {config.report_dir}")
+    print(
+        f"Limits: {config.max_cpus} cpus, {config.memory_mb or 'unlimited'} MB, "
+        f"{config.network_concurrency} network job(s) at once"
+    )
+
+    scheduler = Scheduler(config, log_dir, previous_seconds(config.report_dir))
+    states = scheduler.run()
+    report = build_report(config, states, started, datetime.now(timezone.utc))
+    path = write_report(report, config.report_dir, started)
+    print(format_report(report))
+    print(f"Report written to {path}")
+    return not any(state.status in (FAILED, SKIPPED) for state in states.values())
+
+
+def main():
+    if not run():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+import json
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+DEFAULT_RUNNER = ("uv", "run")
+DEFAULT_RETRIES = 2
+DEFAULT_BACKOFF_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class Job:
+    name: str
+    plugin_dir: Path
+    command: tuple[str, ...]
+    cpus: int = 1
+    memory_mb: Optional[int] = None
+    network: bool = False
+    after: tuple[str, ...] = ()
+    env: dict[str, str] = field(default_factory=dict)
+    retries: int = DEFAULT_RETRIES
+    backoff_seconds: float = DEFAULT_BACKOFF_SECONDS
+    timeout_seconds: Optional[float] = None
+
+
+@dataclass(frozen=True)
+class Config:
+    jobs: tuple[Job, ...]
+    max_cpus: int
+    memory_mb: Optional[int]
+    network_concurrency: int
+    report_dir: Path
+    runner: tuple[str, ...] = DEFAULT_RUNNER
+
+
+def positive(value: Any, error: str, allow_none: bool = False) -> Any:
+    if value is None and allow_none:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError(error)
+    return value
+
+
+def positive_int(value: Any, error: str) -> int:
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise ValueError(error)
+    return value
+
+
+def string_list(value: Any, error: str) -> tuple[str, ...]:
+    if not isinstance(value, list) or not all(isinstance(item, str) for item in value):
+        raise ValueError(error)
+    return tuple(value)
+
+
+def parse_job(raw: dict[str, Any], defaults: dict[str, Any], base_dir: Path, max_cpus: int) -> Job:
+    options = {**defaults, **raw}
+    name = options.get("name")
+    if not isinstance(name, str) or not name:
+        raise ValueError("INVALID_JOB_NAME")
+    command = string_list(options.get("command"), "INVALID_JOB_COMMAND")
+    if not command:
+        raise ValueError("INVALID_JOB_COMMAND")
+    plugin = options.get("plugin")
+    if not isinstance(plugin, str) or not (base_dir / plugin).is_dir():
+        raise ValueError("INVALID_JOB_PLUGIN")
+    cpus = positive_int(options.get("cpus", 1), "INVALID_JOB_CPUS")
+    if cpus > max_cpus:
+        raise ValueError("INVALID_JOB_CPUS")
+    retries = options.get("retries", DEFAULT_RETRIES)
+    if isinstance(retries, bool) or not isinstance(retries, int) or retries < 0:
+        raise ValueError("INVALID_JOB_RETRIES")
+    env = options.get("env", {})
+    if not isinstance(env, dict) or not all(isinstance(value, str) for value in env.values()):
+        raise ValueError("INVALID_JOB_ENV")
+    return Job(
+        name=name,
+        plugin_dir=(base_dir / plugin).resolve(),
+        command=command,
+        cpus=cpus,
+        memory_mb=positive(options.get("memory_mb"), "INVALID_JOB_MEMORY", allow_none=True),
+        network=bool(options.get("network", False)),
+        after=string_list(options.get("after", []), "INVALID_JOB_AFTER"),
+        env=env,
+        retries=retries,
+        backoff_seconds=positive(options.get("backoff_seconds", DEFAULT_BACKOFF_SECONDS), "INVALID_JOB_BACKOFF"),
+        timeout_seconds=positive(options.get("timeout_seconds"), "INVALID_JOB_TIMEOUT", allow_none=True),
+    )
+
+
+def check_dependencies(jobs: tuple[Job, ...]) -> None:
+    names = {job.name for job in jobs}
+    if len(names) != len(jobs):
+        raise ValueError("DUPLICATE_JOB")
+    after = {job.name: job.after for job in jobs}
+    for job in jobs:
+        if any(name not in names for name in job.after):
+            raise ValueError("UNKNOWN_DEPENDENCY")
+
+    # Kahn's algorithm, whatever is left once nothing can be removed is part of a cycle
+    remaining = dict(after)
+    while remaining:
+        ready = [name for name, deps in remaining.items() if not any(dep in remaining for dep in deps)]
+        if not ready:
+            raise ValueError("DEPENDENCY_CYCLE")
+        for name in ready:
+            del remaining[name]
+
+
+def load_config(path: str | Path, report_dir: Optional[str | Path] = None) -> Config:
+    path = Path(path)
+    raw = json.loads(path.read_text())
+    if not isinstance(raw, dict) or not isinstance(raw.get("jobs"), list) or not raw["jobs"]:
+        raise ValueError("INVALID_CONFIG")
+    base_dir = path.parent.resolve()
+    max_cpus = positive_int(raw.get("max_cpus", os.cpu_count() or 1), "INVALID_MAX_CPUS")
+    defaults = raw.get("defaults", {})
+    if not isinstance(defaults, dict) or "name" in defaults:
+        raise ValueError("INVALID_CONFIG")
+
+    jobs = tuple(parse_job(job, defaults, base_dir, max_cpus) for job in raw["jobs"])
+    check_dependencies(jobs)
+    memory_mb = positive(raw.get("memory_mb"), "INVALID_MEMORY", allow_none=True)
+    if memory_mb is not None and any(job.memory_mb is None or job.memory_mb > memory_mb for job in jobs):
+        # With a total budget every job has to say how much of it it needs
+        raise ValueError("INVALID_JOB_MEMORY")
+    return Config(
+        jobs=jobs,
+        max_cpus=max_cpus,
+        memory_mb=memory_mb,
+        network_concurrency=positive_int(raw.get("network_concurrency", 2), "INVALID_NETWORK_CONCURRENCY"),
+        report_dir=Path(report_dir) if report_dir else base_dir / raw.get("report_dir", "reports"),
+        runner=string_list(raw.get("runner", list(DEFAULT_RUNNER)), "INVALID_RUNNER"),
+    )
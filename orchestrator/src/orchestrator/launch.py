@@ -0,0 +1,20 @@
+import os
+import sys
+
+# python launch.py <core,core,...> -- <command...>
+# Pins itself to the job's cores and becomes the job's command, the affinity is inherited by everything it starts
+
+
+def main():
+    args = sys.argv[1:]
+    if len(args) < 3 or args[1] != "--":
+        sys.exit("usage: python launch.py <cores> -- <command...>")
+    cores = {int(core) for core in args[0].split(",") if core}
+    command = args[2:]
+    if cores and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cores)
+    os.execvp(command[0], command)  # noqa: S606
+
+
+if __name__ == "__main__":
+    main()
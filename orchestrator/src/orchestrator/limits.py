@@ -0,0 +1,69 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+from orchestrator.config import Config, Job
+
+MB = 1024 * 1024
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def available_cores(max_cpus: int) -> Optional[list[int]]:
+    # The cores this process may run on, for jobs to be pinned to. None where affinity isn't supported (macOS) or
+    # max_cpus is more than there are, the cores are then only counted
+    if not hasattr(os, "sched_getaffinity"):
+        return None
+    cores = sorted(os.sched_getaffinity(0))
+    return cores[:max_cpus] if len(cores) >= max_cpus else None
+
+
+# What the running jobs have reserved out of the configured limits. Only touched by the scheduler thread
+class Resources:
+    def __init__(self, config: Config):
+        cores = available_cores(config.max_cpus)
+        self.pin = cores is not None
+        self.free_cores = cores if cores is not None else list(range(config.max_cpus))
+        self.free_memory_mb = config.memory_mb
+        self.free_network = config.network_concurrency
+
+    def fits(self, job: Job) -> bool:
+        if job.cpus > len(self.free_cores):
+            return False
+        if self.free_memory_mb is not None and (job.memory_mb or 0) > self.free_memory_mb:
+            return False
+        return not job.network or self.free_network > 0
+
+    def acquire(self, job: Job) -> list[int]:
+        if not self.fits(job):
+            raise ValueError("RESOURCES_UNAVAILABLE")
+        cores, self.free_cores = self.free_cores[: job.cpus], self.free_cores[job.cpus :]
+        if self.free_memory_mb is not None:
+            self.free_memory_mb -= job.memory_mb or 0
+        if job.network:
+            self.free_network -= 1
+        return cores
+
+    def release(self, job: Job, cores: list[int]) -> None:
+        self.free_cores = sorted(self.free_cores + cores)
+        if self.free_memory_mb is not None:
+            self.free_memory_mb += job.memory_mb or 0
+        if job.network:
+            self.free_network += 1
+
+
+def process_group_rss(pgid: int) -> Optional[int]:
+    # Resident memory of every process in the group, a job is `uv run` plus the plugin plus any worker processes it
+    # starts. Linux only, None elsewhere and the memory limit is then only used for scheduling
+    proc = Path("/proc")
+    if not proc.is_dir():
+        return None
+    total = 0
+    for stat in proc.glob("[0-9]*/stat"):
+        try:
+            # The command name can hold spaces and parentheses, the fields after the last ")" can't
+            fields = stat.read_bytes().rsplit(b")", 1)[1].split()
+        except (OSError, IndexError):
+            continue
+        if int(fields[2]) == pgid:
+            total += int(fields[21]) * PAGE_SIZE
+    return total
@@ -0,0 +1,81 @@
+import json
+from collections import Counter
+from dataclasses import asdict
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from orchestrator.config import Config
+from orchestrator.run import FAILED, SKIPPED, SUCCEEDED, JobState
+
+REPORT_PREFIX = "orchestrator_report_"
+
+
+def previous_seconds(report_dir: Path) -> dict[str, float]:
+    # Seconds the last successful attempt of every job took in the newest report, used to start the longest jobs first
+    reports = sorted(report_dir.glob(f"{REPORT_PREFIX}*.json"))
+    if not reports:
+        return {}
+    try:
+        jobs = json.loads(reports[-1].read_text())["jobs"]
+        return {
+            name: job["attempts"][-1]["seconds"]
+            for name, job in jobs.items()
+            if job["status"] == SUCCEEDED and job["attempts"]
+        }
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+
+def build_report(config: Config, states: dict[str, JobState], started: datetime, ended: datetime) -> dict[str, Any]:
+    jobs = {
+        name: {
+            "plugin": state.job.plugin_dir.name,
+            "command": list(state.job.command),
+            "status": state.status,
+            "error": state.error,
+            "log": str(state.log_path),
+            "seconds": round(sum(attempt.seconds for attempt in state.attempts), 3),
+            "attempts": [asdict(attempt) for attempt in state.attempts],
+        }
+        for name, state in states.items()
+    }
+    wall_seconds = (ended - started).total_seconds()
+    return {
+        "started_at": started.isoformat(),
+        "ended_at": ended.isoformat(),
+        "wall_seconds": round(wall_seconds, 3),
+        # What running the jobs one after the other would have taken, give or take the backoffs
+        "job_seconds": round(sum(job["seconds"] for job in jobs.values()), 3),
+        "longest_job_seconds": max((job["seconds"] for job in jobs.values()), default=0.0),
+        "limits": {
+            "max_cpus": config.max_cpus,
+            "memory_mb": config.memory_mb,
+            "network_concurrency": config.network_concurrency,
+        },
+        "statuses": dict(Counter(job["status"] for job in jobs.values())),
+        "jobs": jobs,
+    }
+
+
+def write_report(report: dict[str, Any], report_dir: Path, started: datetime) -> Path:
+    path = report_dir / f"{REPORT_PREFIX}{started.strftime('%Y%m%dT%H%M%S')}.json"
+    path.write_text(json.dumps(report, indent=2) + "\n")
+    return path
+
+
+def format_report(report: dict[str, Any]) -> str:
+    lines = [f"  {'job':<30} {'status':<10} {'attempts':>8} {'seconds':>9} {'peak rss':>10}  error"]
+    for name, job in report["jobs"].items():
+        peaks = [attempt["peak_rss_bytes"] or 0 for attempt in job["attempts"]]
+        peak = f"{max(peaks) / 1024 / 1024:.0f} MB" if any(peaks) else "-"
+        error = job["error"] or ""
+        lines.append(
+            f"  {name:<30} {job['status']:<10} {len(job['attempts']):>8} {job['seconds']:>9.1f} {peak:>10}  {error}".rstrip()
+        )
+    lines.append(
+        f"{report['wall_seconds']:.1f}s wall time for {report['job_seconds']:.1f}s of jobs "
+        f"(longest {report['longest_job_seconds']:.1f}s), "
+        f"{report['statuses'].get(FAILED, 0)} failed, {report['statuses'].get(SKIPPED, 0)} skipped"
+    )
+    return "\n".join(lines)
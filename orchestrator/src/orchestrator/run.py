@@ -0,0 +1,224 @@
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+from contextlib import suppress
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from orchestrator.config import Config, Job
+from orchestrator.limits import MB, Resources, process_group_rss
+
+# Run as a script so the job doesn't depend on how the orchestrator is installed
+LAUNCH = Path(__file__).with_name("launch.py")
+POLL_SECONDS = 0.5
+# Time a job gets to exit after SIGTERM before it's killed
+GRACE_SECONDS = 10.0
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+# Read by the plugins' numeric libraries, so a job doesn't start a thread per core of the machine
+THREAD_ENV = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS", "NUMBA_NUM_THREADS")
+
+
+@dataclass
+class Attempt:
+    started_at: str
+    cores: list[int]
+    seconds: float = 0.0
+    exit_code: Optional[int] = None
+    error: Optional[str] = None
+    peak_rss_bytes: Optional[int] = None
+
+
+@dataclass
+class JobState:
+    job: Job
+    log_path: Path
+    status: str = PENDING
+    error: Optional[str] = None
+    attempts: list[Attempt] = field(default_factory=list)
+    not_before: float = 0.0
+
+
+def job_env(job: Job) -> dict[str, str]:
+    env = dict(os.environ)
+    # The orchestrator's own environment, `uv run` should use the plugin's
+    env.pop("VIRTUAL_ENV", None)
+    for name in THREAD_ENV:
+        env.setdefault(name, str(job.cpus))
+    env.update(job.env)
+    return env
+
+
+def stop_group(process: subprocess.Popen[bytes]) -> None:
+    try:
+        os.killpg(process.pid, signal.SIGTERM)
+        process.wait(GRACE_SECONDS)
+    except subprocess.TimeoutExpired:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    except ProcessLookupError:
+        process.wait()
+
+
+# Runs the job in a process group of its own, so its memory can be added up and the whole group stopped when it goes
+# over its memory limit, its timeout or the orchestrator is stopped
+def run_attempt(job: Job, cores: list[int], runner: tuple[str, ...], log_path: Path, stop: threading.Event) -> Attempt:
+    attempt = Attempt(started_at=datetime.now(timezone.utc).isoformat(), cores=cores)
+    # No cores leaves the job unpinned
+    command = [sys.executable, str(LAUNCH), ",".join(map(str, cores)), "--", *runner, *job.command]
+    limit = job.memory_mb * MB if job.memory_mb is not None else None
+    started = time.monotonic()
+    with open(log_path, "ab") as log:
+        log.write(f"\n=== {attempt.started_at} {' '.join(job.command)}\n".encode())
+        log.flush()
+        try:
+            process = subprocess.Popen(  # noqa: S603
+                command,
+                cwd=job.plugin_dir,
+                env=job_env(job),
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=subprocess.STDOUT,
+                start_new_session=True,
+            )
+        except OSError as error:
+            attempt.error = f"LAUNCH_FAILED: {error}"
+            return attempt
+
+        while True:
+            try:
+                attempt.exit_code = process.wait(POLL_SECONDS)
+                break
+            except subprocess.TimeoutExpired:
+                pass
+            rss = process_group_rss(process.pid)
+            if rss is not None:
+                attempt.peak_rss_bytes = max(attempt.peak_rss_bytes or 0, rss)
+            if stop.is_set():
+                attempt.error = "CANCELLED"
+            elif job.timeout_seconds is not None and time.monotonic() - started > job.timeout_seconds:
+                attempt.error = "TIMEOUT"
+            elif limit is not None and rss is not None and rss > limit:
+                attempt.error = "MEMORY_LIMIT_EXCEEDED"
+            if attempt.error is not None:
+                stop_group(process)
+                attempt.exit_code = process.returncode
+                break
+
+    attempt.seconds = round(time.monotonic() - started, 3)
+    if attempt.error is None and attempt.exit_code != 0:
+        attempt.error = f"EXIT_CODE_{attempt.exit_code}"
+    return attempt
+
+
+def backoff_seconds(job: Job, attempts: int) -> float:
+    return job.backoff_seconds * 2 ** (attempts - 1)
+
+
+# Starts every job whose dependencies succeeded as soon as its cores, memory and network slot are free, the ones that
+# took the longest last time first so they don't end up alone at the end. A failed attempt gives the resources back
+# and is retried after its backoff, a job that runs out of retries fails and skips everything after it
+class Scheduler:
+    def __init__(self, config: Config, log_dir: Path, previous_seconds: Optional[dict[str, float]] = None):
+        self.config = config
+        self.resources = Resources(config)
+        self.stop = threading.Event()
+        self.done: queue.Queue[tuple[str, list[int], Attempt]] = queue.Queue()
+        previous_seconds = previous_seconds or {}
+        order = sorted(range(len(config.jobs)), key=lambda i: -previous_seconds.get(config.jobs[i].name, 0.0))
+        self.states = {
+            config.jobs[i].name: JobState(config.jobs[i], log_dir / f"{config.jobs[i].name}.log") for i in order
+        }
+        self.running = 0
+
+    def skip_blocked(self) -> None:
+        # Repeated until nothing changes, a skipped job can block others
+        changed = True
+        while changed:
+            changed = False
+            for state in self.states.values():
+                if state.status != PENDING:
+                    continue
+                blocked = [name for name in state.job.after if self.states[name].status in (FAILED, SKIPPED)]
+                if blocked or self.stop.is_set():
+                    state.status = SKIPPED
+                    state.error = "CANCELLED" if self.stop.is_set() else f"DEPENDENCY_FAILED: {', '.join(blocked)}"
+                    changed = True
+
+    def start_ready(self) -> None:
+        now = time.monotonic()
+        for state in self.states.values():
+            if state.status != PENDING or state.not_before > now:
+                continue
+            if any(self.states[name].status != SUCCEEDED for name in state.job.after):
+                continue
+            if not self.resources.fits(state.job):
+                continue
+            cores = self.resources.acquire(state.job)
+            state.status = RUNNING
+            self.running += 1
+            print(f"Starting {state.job.name} (attempt {len(state.attempts) + 1}) on cores {cores}")
+            threading.Thread(target=self.run_job, args=(state, cores), name=f"job-{state.job.name}").start()
+
+    def run_job(self, state: JobState, cores: list[int]) -> None:
+        try:
+            pinned = cores if self.resources.pin else []
+            attempt = run_attempt(state.job, pinned, self.config.runner, state.log_path, self.stop)
+        except Exception as error:
+            attempt = Attempt(started_at=datetime.now(timezone.utc).isoformat(), cores=cores, error=repr(error))
+        self.done.put((state.job.name, cores, attempt))
+
+    def finish(self, name: str, cores: list[int], attempt: Attempt) -> None:
+        state = self.states[name]
+        self.running -= 1
+        self.resources.release(state.job, cores)
+        state.attempts.append(attempt)
+        if attempt.error is None:
+            state.status = SUCCEEDED
+            print(f"{name} succeeded in {attempt.seconds}s")
+            return
+        retry = len(state.attempts) <= state.job.retries and not self.stop.is_set()
+        if retry:
+            state.status = PENDING
+            delay = backoff_seconds(state.job, len(state.attempts))
+            state.not_before = time.monotonic() + delay
+            print(f"{name} failed ({attempt.error}), retrying in {delay}s. Log: {state.log_path}")
+        else:
+            state.status = FAILED
+            state.error = attempt.error
+            print(f"{name} failed ({attempt.error}). Log: {state.log_path}")
+
+    def run(self) -> dict[str, JobState]:
+        handler = None
+        if threading.current_thread() is threading.main_thread():
+            handler = signal.signal(signal.SIGTERM, lambda *_: self.stop.set())
+        try:
+            while True:
+                self.skip_blocked()
+                if not self.stop.is_set():
+                    self.start_ready()
+                if self.running == 0 and all(state.status != PENDING for state in self.states.values()):
+                    return self.states
+                # Also woken up every now and then to notice SIGTERM and the end of a backoff
+                with suppress(queue.Empty):
+                    self.finish(*self.done.get(timeout=POLL_SECONDS))
+        except KeyboardInterrupt:
+            self.stop.set()
+            while self.running:
+                self.finish(*self.done.get())
+            self.skip_blocked()
+            return self.states
+        finally:
+            if handler is not None:
+                signal.signal(signal.SIGTERM, handler)
@@ -0,0 +1,83 @@
+import json
+import sys
+import time
+
+import pytest
+
+from orchestrator.config import load_config
+from orchestrator.run import FAILED, SKIPPED, SUCCEEDED, Scheduler
+
+
+def python(code):
+    return [sys.executable, "-c", code]
+
+
+def run(tmp_path, jobs, **limits):
+    (tmp_path / "plugin").mkdir(exist_ok=True)
+    config_path = tmp_path / "config.json"
+    config = {"runner": [], "defaults": {"plugin": "plugin", "backoff_seconds": 0.1}, "jobs": jobs, **limits}
+    config_path.write_text(json.dumps(config))
+    config = load_config(config_path)
+    config.report_dir.mkdir()
+    return Scheduler(config, config.report_dir).run()
+
+
+def test_jobs_run_concurrently_within_the_cpu_limit(tmp_path):
+    sleep = python("import time; time.sleep(1)")
+    started = time.monotonic()
+    states = run(tmp_path, [{"name": str(i), "command": sleep} for i in range(4)], max_cpus=2)
+    wall_seconds = time.monotonic() - started
+
+    assert all(state.status == SUCCEEDED for state in states.values())
+    assert 2 <= wall_seconds < 3.5
+
+
+def test_network_jobs_are_limited(tmp_path):
+    sleep = python("import time; time.sleep(0.5)")
+    started = time.monotonic()
+    run(tmp_path, [{"name": str(i), "command": sleep, "network": True} for i in range(3)], network_concurrency=1)
+
+    assert time.monotonic() - started >= 1.5
+
+
+def test_failed_attempts_are_retried(tmp_path):
+    marker = tmp_path / "plugin" / "failed_once"
+    code = f"import pathlib, sys; p = pathlib.Path({str(marker)!r}); sys.exit(0 if p.exists() else p.touch() or 3)"
+    states = run(tmp_path, [{"name": "flaky", "command": python(code), "retries": 1}])
+
+    assert states["flaky"].status == SUCCEEDED
+    assert [attempt.error for attempt in states["flaky"].attempts] == ["EXIT_CODE_3", None]
+
+
+def test_a_failed_job_skips_the_jobs_after_it(tmp_path):
+    states = run(
+        tmp_path,
+        [
+            {"name": "extract", "command": python("raise SystemExit(1)"), "retries": 0},
+            {"name": "transform", "command": python("pass"), "after": ["extract"]},
+            {"name": "load", "command": python("pass"), "after": ["transform"]},
+            {"name": "other", "command": python("pass")},
+        ],
+    )
+
+    assert states["extract"].status == FAILED
+    assert states["transform"].status == SKIPPED
+    assert states["load"].status == SKIPPED
+    assert states["other"].status == SUCCEEDED
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="Memory is only measured on Linux")
+def test_a_job_over_its_memory_limit_is_stopped(tmp_path):
+    code = "import time; data = bytearray(200 * 1024 * 1024); time.sleep(30)"
+    states = run(tmp_path, [{"name": "big", "command": python(code), "memory_mb": 50, "retries": 0}])
+
+    assert states["big"].status == FAILED
+    assert states["big"].attempts[0].error == "MEMORY_LIMIT_EXCEEDED"
+    assert states["big"].attempts[0].seconds < 10
+
+
+def test_dependency_cycles_are_rejected(tmp_path):
+    with pytest.raises(ValueError, match="DEPENDENCY_CYCLE"):
+        run(
+            tmp_path, [{"name": "a", "command": ["a"], "after": ["b"]}, {"name": "b", "command": ["b"], "after": ["a"]}]
+        )
@@ -0,0 +1,73 @@
+"""
+Deterministic synthetic OwnTracks Recorder API responses (gzipped JSON, like the extractor writes) for the transform
+benchmark. Every location turns into a location and a deviceStatus canon record.
+
+    uv run python benchmarks/synthetic.py --rows 100000 --out_dir /tmp/owntracks_in
+"""
+
+import argparse
+import gzip
+import json
+import random
+from pathlib import Path
+from typing import Any
+
+START = 1_704_067_200
+LOCATIONS_PER_FILE = 5_000
+TRIGGERS = ("p", "c", "t", "u")
+CONNECTIONS = ("w", "m", "o")
+
+
+def location(i: int, lat: float, lon: float, rng: random.Random) -> dict[str, Any]:
+    return {
+        "_type": "location",
+        "_id": f"{i:08x}",
+        "tst": START + i * 30,
+        "created_at": START + i * 30 + rng.randint(0, 5),
+        "lat": round(lat, 6),
+        "lon": round(lon, 6),
+        "acc": rng.randint(3, 50),
+        "vac": rng.randint(1, 10),
+        "alt": rng.randint(0, 200),
+        "vel": rng.randint(0, 60),
+        "batt": rng.randint(5, 100),
+        "bs": rng.randint(1, 3),
+        "conn": rng.choice(CONNECTIONS),
+        "t": rng.choice(TRIGGERS),
+        "tid": "ph",
+        "topic": "owntracks/user/phone",
+        "tzname": "America/Toronto",
+    }
+
+
+def generate(out_dir: Path, rows: int, seed: int = 0) -> list[Path]:
+    rng = random.Random(seed)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    count = max(1, rows // 2)
+    lat, lon = 45.5, -73.6
+    paths = []
+    for start in range(0, count, LOCATIONS_PER_FILE):
+        data = []
+        for i in range(start, min(start + LOCATIONS_PER_FILE, count)):
+            lat += rng.uniform(-0.001, 0.001)
+            lon += rng.uniform(-0.001, 0.001)
+            data.append(location(i, lat, lon, rng))
+        path = out_dir / f"owntracks_{start // LOCATIONS_PER_FILE:04d}.json.gz"
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump({"count": len(data), "data": data, "status": 200, "version": "0.9.9"}, f)
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10_000, help="Approximate canon records the responses turn into")
+    parser.add_argument("--out_dir", required=True, type=Path)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    for path in generate(args.out_dir, args.rows, args.seed):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
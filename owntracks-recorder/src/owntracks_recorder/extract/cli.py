@@ -1,22 +1,20 @@
 import argparse
 import os
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import NamedTuple
 
 from dotenv import load_dotenv
-from pydantic.dataclasses import dataclass
 
-from owntracks_recorder.extract.run import ExtractionParams, run_extract
-
-load_dotenv()
+from owntracks_recorder.profiling import add_profile_args, profiled
 
 
 @dataclass
 class EnvVars:
-    user: str = os.environ["OWNTRACKS_USER"]
-    device: str = os.environ["OWNTRACKS_DEVICE"]
-    server_url: str = os.environ["OWNTRACKS_URL"]
+    user: str = field(default_factory=lambda: os.environ["OWNTRACKS_USER"])
+    device: str = field(default_factory=lambda: os.environ["OWNTRACKS_DEVICE"])
+    server_url: str = field(default_factory=lambda: os.environ["OWNTRACKS_URL"])
 
 
 class ExtractorArgs(NamedTuple):
@@ -25,7 +23,6 @@ class ExtractorArgs(NamedTuple):
 
 
 def extract():
-    env = EnvVars()
     parser = argparse.ArgumentParser()
 
     parser.add_argument(
@@ -37,17 +34,24 @@ def extract():
 
     parser.add_argument("--out_dir", required=True, type=Path, help="Output directory path")
 
+    add_profile_args(parser)
     args = parser.parse_args()
+    env = EnvVars()
+    # httpx is only needed once the arguments and env vars are known to be fine
+    from owntracks_recorder.extract.run import ExtractionParams, run_extract
+
     print("Start date:", args.start_date)
     print("Output dir:", args.out_dir)
     print(f"Env vars: {env}")
     params = ExtractionParams(
         user=env.user, device=env.device, server_url=env.server_url, start_date=args.start_date, out_dir=args.out_dir
     )
-    run_extract(params)
+    with profiled(args.profile, args.out_dir, "extract", args.profile_top):
+        run_extract(params)
 
 
 def main():
+    load_dotenv()
     extract()
 
 
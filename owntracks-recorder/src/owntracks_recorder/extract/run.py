@@ -1,8 +1,10 @@
 import gzip
 import uuid
+from collections.abc import Iterator
 from dataclasses import dataclass
 from datetime import date, datetime, timedelta, timezone
 from pathlib import Path
+from typing import NamedTuple
 
 import httpx
 
@@ -24,6 +26,14 @@ class ExtractionParams:
     out_dir: Path
 
 
+class Window(NamedTuple):
+    start: datetime
+    end: datetime
+    version: str
+    file_name: str
+    response: httpx.Response
+
+
 def timestamp(time: datetime) -> str:
     return str(int(time.timestamp()))
 
@@ -51,14 +61,25 @@ def run_extract(params: ExtractionParams):
 
 
 def write_results(client: httpx.Client, params: ExtractionParams) -> datetime | None:
+    extract_start = datetime.now(timezone.utc)
+    last_request_date: datetime | None = None
+    for window in fetch_windows(client, params):
+        with gzip.open(params.out_dir / f"{window.file_name}.json.gz", "wb") as out:
+            for chunk in window.response.iter_bytes():
+                out.write(chunk)
+        write_window_meta(params.out_dir, window, extract_start)
+        last_request_date = window.end
+    return last_request_date
+
+
+# The response is only open until the next window is requested
+def fetch_windows(client: httpx.Client, params: ExtractionParams) -> Iterator[Window]:
     api_params = {
         "user": params.user,
         "device": params.device,
     }
 
     curr_date = params.start_date
-    extract_start = datetime.now(timezone.utc)
-    last_request_date: datetime | None = None
     # Only do X days at a time
     days_left = 50
 
@@ -77,36 +98,29 @@ def write_results(client: httpx.Client, params: ExtractionParams) -> datetime |
         print(f"Fetching data from {headers['X-Limit-From']} to {headers['X-Limit-To']}")
 
         file_name = f"{PLUGIN_NAME}_{timestamp(curr_date)}_{timestamp(next_date)}_{str(uuid.uuid4()).split('-')[0]}"
-        raw_file_name = f"{file_name}.json.gz"
-        raw_path = params.out_dir / raw_file_name
 
         version_response = client.get("/api/0/version")
         version = version_response.json()["version"]
 
-        with (
-            client.stream(
-                "GET",
-                "/api/0/locations",
-                params=api_params,
-                headers=headers,
-            ) as http_stream,
-            gzip.open(raw_path, "wb") as out,
-        ):
-            for chunk in http_stream.iter_bytes():
-                out.write(chunk)
+        with client.stream(
+            "GET",
+            "/api/0/locations",
+            params=api_params,
+            headers=headers,
+        ) as http_stream:
+            yield Window(curr_date, next_date, version, file_name, http_stream)
 
-        write_meta_file(
-            out_dir=params.out_dir,
-            window_start=curr_date,
-            window_end=next_date,
-            service_version=version,
-            extract_start=extract_start,
-            file_name=file_name,
-        )
-
-        last_request_date = next_date
         curr_date = next_date
         if days_left == 0:
             break
 
-    return last_request_date
+
+def write_window_meta(out_dir: Path, window: Window, extract_start: datetime) -> Path:
+    return write_meta_file(
+        out_dir=out_dir,
+        window_start=window.start,
+        window_end=window.end,
+        service_version=window.version,
+        extract_start=extract_start,
+        file_name=window.file_name,
+    )
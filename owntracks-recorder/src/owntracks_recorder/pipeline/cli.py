@@ -0,0 +1,69 @@
+import argparse
+from datetime import datetime, timezone
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+from owntracks_recorder.extract.cli import EnvVars
+from owntracks_recorder.profiling import add_profile_args, profiled
+from owntracks_recorder.transform.canon_writer import add_canon_args, canon_options
+from owntracks_recorder.transform.dedup import add_dedup_args
+from owntracks_recorder.transform.memory import add_memory_args, memory_options
+
+
+def run():
+    parser = argparse.ArgumentParser()
+
+    parser.add_argument(
+        "--start_date",
+        required=True,
+        type=lambda value: datetime.fromtimestamp(float(value), tz=timezone.utc),
+        help="Start date in POSIX timestamp (UTC)",
+    )
+    parser.add_argument("--raw_dir", required=True, type=Path, help="Directory the raw files are written to")
+    parser.add_argument("--out_dir", required=True, type=Path, help="Output directory path")
+    add_canon_args(parser)
+    parser.add_argument(
+        "--columnar",
+        action="store_true",
+        help="Also write heartRate, location and deviceStatus records to Parquet files next to the canon file",
+    )
+    add_memory_args(parser)
+    add_dedup_args(parser)
+    add_profile_args(parser)
+    args = parser.parse_args()
+    env = EnvVars()
+    from owntracks_recorder.extract.run import ExtractionParams
+    from owntracks_recorder.pipeline.run import run_pipeline
+    from owntracks_recorder.transform.schemas import get_schemas
+
+    schemas = get_schemas()
+
+    print("Start date:", args.start_date)
+    print(f"Raw Dir: {args.raw_dir}")
+    print(f"Out Dir: {args.out_dir}")
+    print(f"Env vars: {env}")
+    params = ExtractionParams(
+        user=env.user, device=env.device, server_url=env.server_url, start_date=args.start_date, out_dir=args.raw_dir
+    )
+    with profiled(args.profile, args.out_dir, "run", args.profile_top):
+        run_pipeline(
+            params,
+            out_dir=args.out_dir,
+            schemas=schemas,
+            canon=canon_options(args),
+            columnar=args.columnar,
+            memory=memory_options(args),
+            dedup=args.dedup,
+        )
+
+    print("Done!")
+
+
+def main():
+    load_dotenv()
+    run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import gzip
+import json
+from datetime import datetime, timezone
+from functools import partial
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from owntracks_recorder.extract.run import ExtractionParams, FailedToExtract, Window, fetch_windows, write_window_meta
+from owntracks_recorder.pipeline.raw import RawWriter
+from owntracks_recorder.transform.api import parseApiResponse
+from owntracks_recorder.transform.canon_writer import CanonOptions, RecordSink
+from owntracks_recorder.transform.memory import MemoryOptions
+from owntracks_recorder.transform.meta import TransformRunMetadata
+from owntracks_recorder.transform.run import run_transform, transform_response
+from owntracks_recorder.transform.schemas import Schemas
+
+
+# Extract and transform in one go: every window is mapped straight from the response while the raw file the extract
+# would have written is compressed and written next to it, so there's nothing to read back from disk
+def run_pipeline(
+    params: ExtractionParams,
+    out_dir: Path,
+    schemas: Schemas,
+    canon: Optional[CanonOptions] = None,
+    columnar: bool = False,
+    memory: Optional[MemoryOptions] = None,
+    dedup: bool = False,
+) -> datetime:
+    windows: list[Window] = []
+    with httpx.Client(base_url=params.server_url, timeout=30.0) as client:
+        run_transform(
+            device=params.device,
+            out_dir=out_dir,
+            in_dir=params.out_dir,
+            schemas=schemas,
+            canon=canon,
+            columnar=columnar,
+            memory=memory,
+            dedup=dedup,
+            source=partial(transform_windows, client, params, windows),
+        )
+
+    if not windows:
+        raise FailedToExtract("NO_REQUEST_VALUE")
+    return windows[-1].end
+
+
+def transform_windows(
+    client: httpx.Client,
+    params: ExtractionParams,
+    windows: list[Window],
+    writer: RecordSink,
+    metadata: TransformRunMetadata,
+    schemas: Schemas,
+) -> None:
+    extract_start = datetime.now(timezone.utc)
+    with RawWriter() as raw:
+        for window in fetch_windows(client, params):
+            name = f"{window.file_name}.json.gz"
+            print(f"Loading response: {name}")
+            with metadata.timers.timer("read", file=name):
+                body = window.response.read()
+                data = json.loads(body)
+            raw.submit(write_window, params.out_dir, window, body, extract_start)
+            metadata.add_file_processed(Path(name))
+            response = parseApiResponse(name, data, metadata)
+            transform_response(name, response, writer, metadata, schemas, device=params.device, write_device=True)
+            windows.append(window)
+
+
+def write_window(out_dir: Path, window: Window, body: bytes, extract_start: datetime) -> None:
+    with gzip.open(out_dir / f"{window.file_name}.json.gz", "wb") as out:
+        out.write(body)
+    write_window_meta(out_dir, window, extract_start)
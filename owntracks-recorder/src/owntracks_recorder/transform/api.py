@@ -108,14 +108,21 @@ class OwntracksLocationApiResponse(BaseModel):
     model_config = {"extra": "forbid"}
 
 
-# TODO: Probably want to yield each api response and not load everything in memory
-def getApiResponses(in_dir: Path, metadata: TransformRunMetadata):
-    responses: list[OwntracksLocationApiResponse] = []
-    for path in in_dir.iterdir():
-        if path.is_file() and path.suffix == ".gz":
-            print(f"Loading file: {path.name}")
-            metadata.add_file_processed(path)
-            with gzip.open(path, "rt", encoding="utf-8") as f:
-                data = json.load(f)
-                responses.append(OwntracksLocationApiResponse(**data))
-    return responses
+def response_files(in_dir: Path) -> list[Path]:
+    # Sorted so the records come out in the same order every run, with or without --workers
+    return sorted(path for path in in_dir.iterdir() if path.is_file() and path.suffix == ".gz")
+
+
+def getApiResponse(path: Path, metadata: TransformRunMetadata) -> OwntracksLocationApiResponse:
+    print(f"Loading file: {path.name}")
+    metadata.add_file_processed(path)
+    with metadata.timers.timer("read", file=path.name), gzip.open(path, "rt", encoding="utf-8") as f:
+        data = json.load(f)
+    return parseApiResponse(path.name, data, metadata)
+
+
+def parseApiResponse(name: str, data: dict, metadata: TransformRunMetadata) -> OwntracksLocationApiResponse:
+    with metadata.timers.timer("parse", file=name) as timer:
+        response = OwntracksLocationApiResponse(**data)
+        timer.rows += len(response.data)
+    return response
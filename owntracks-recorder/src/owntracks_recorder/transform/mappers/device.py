@@ -11,10 +11,11 @@ def transform_device(params: TransformerParams):
         "source": "owntracks",
         "version": "1",
     })
-    try:
-        jsonschema.validate(instance=transformed_device, schema=params.schemas.device)
-    except jsonschema.ValidationError as e:
-        print(f"Device transformation validation error: {e.message}")
-        raise
+    if params.schemas.device is not None:
+        try:
+            params.schemas.device.validate(transformed_device)
+        except jsonschema.ValidationError as e:
+            print(f"Device transformation validation error: {e.message}")
+            raise
     params.metadata.record_device()
     return transformed_device
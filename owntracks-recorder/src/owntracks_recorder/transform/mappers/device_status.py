@@ -33,10 +33,11 @@ def transform_device_status(params: TransformerParams):
     if conn_status := get_conn_status(location):
         transformed_device_status["connectionStatus"] = conn_status
 
-    try:
-        jsonschema.validate(instance=transformed_device_status, schema=params.schemas.device_status)
-    except jsonschema.ValidationError as e:
-        print(f"Device status validation error: {e.message}")
-        raise
+    if params.schemas.device_status is not None:
+        try:
+            params.schemas.device_status.validate(transformed_device_status)
+        except jsonschema.ValidationError as e:
+            print(f"Device status validation error: {e.message}")
+            raise
     params.metadata.record_device_status(recorded_at)
     return transformed_device_status
@@ -32,10 +32,11 @@ def transform_location(params: TransformerParams):
     if trigger := get_trigger(location):
         transformed_loc["trigger"] = trigger
 
-    try:
-        jsonschema.validate(instance=transformed_loc, schema=params.schemas.location)
-    except jsonschema.ValidationError as e:
-        print(f"Location validation error: {e.message}")
-        raise
+    if params.schemas.location is not None:
+        try:
+            params.schemas.location.validate(transformed_loc)
+        except jsonschema.ValidationError as e:
+            print(f"Location validation error: {e.message}")
+            raise
     params.metadata.record_location(recorded_at)
     return transformed_loc
@@ -1,21 +1,33 @@
-import gzip
 import json
 import os
+import tempfile
 import uuid
 from datetime import datetime, timezone
+from functools import partial
 from pathlib import Path
-
-from jsonlines import jsonlines
+from typing import TYPE_CHECKING, Callable, Optional
 
 from owntracks_recorder.config import PLUGIN_NAME
-from owntracks_recorder.transform.api import getApiResponses
+from owntracks_recorder.transform.api import OwntracksLocationApiResponse, getApiResponse, response_files
+from owntracks_recorder.transform.canon_writer import CanonOptions, RecordSink, canon_writer, remove_outputs
+from owntracks_recorder.transform.checkpoints import CheckpointStore
+from owntracks_recorder.transform.dedup import RecordIndex
 from owntracks_recorder.transform.mappers.device import transform_device
 from owntracks_recorder.transform.mappers.device_status import transform_device_status
 from owntracks_recorder.transform.mappers.location import transform_location
 from owntracks_recorder.transform.mappers.transformer_params import TransformerParams
+from owntracks_recorder.transform.memory import MemoryMonitor, MemoryOptions
 from owntracks_recorder.transform.meta import TransformRunMetadata
+from owntracks_recorder.transform.parallel import merge_canon, merge_metadata, run_parts
 from owntracks_recorder.transform.schemas import Schemas
 
+if TYPE_CHECKING:
+    from owntracks_recorder.transform.columnar import ColumnarWriter
+
+
+# Writes records from somewhere other than the response files in in_dir, the run command streams them from the extract
+Source = Callable[[RecordSink, TransformRunMetadata, Schemas], None]
+
 
 def timestamp(time: datetime) -> str:
     return str(int(time.timestamp()))
@@ -27,36 +39,130 @@ def run_transform(
     out_dir: Path,
     in_dir: Path,
     schemas: Schemas,
+    canon: Optional[CanonOptions] = None,
+    columnar: bool = False,
+    memory: Optional[MemoryOptions] = None,
+    workers: int = 1,
+    incremental: bool = False,
+    # Instead of every input file in in_dir, --watch passes the ones that settled
+    inputs: Optional[list[Path]] = None,
+    dedup: bool = False,
+    source: Optional[Source] = None,
 ):
+    canon = canon or CanonOptions()
     file_name = f"{PLUGIN_NAME}_canon_{timestamp(datetime.now(timezone.utc))}_{str(uuid.uuid4()).split('-')[0]}"
     file_path = os.path.join(out_dir, file_name)
-    canon_file = f"{file_path}.jsonl.gz"
     metadata_file = f"{file_path}.meta.json"
 
-    is_device_saved = False
-    log_every = 10000
-    row_count = 0
-
     metadata = TransformRunMetadata()
     metadata.start()
+    metadata.validation = schemas.validation
+    metadata.timers = schemas.validation.timers
+    metadata.schema_load_timings = schemas.load_timings
+    metadata.codec = canon.to_dict()
+    metadata.memory = MemoryMonitor(memory)
+    checkpoints = CheckpointStore(out_dir, incremental)
+    index = RecordIndex(out_dir, dedup)
+    columnar_writer = open_columnar(file_path) if columnar else None
+    tee = [columnar_writer] if columnar_writer else []
+    files = checkpoints.filter(response_files(Path(in_dir)) if inputs is None else inputs) if source is None else []
 
-    with gzip.open(canon_file, "wt", encoding="utf-8") as gz:
-        writer = jsonlines.Writer(gz)
-        for response in getApiResponses(in_dir, metadata):
-            for location in response.data:
-                row_count += 1
-                params = TransformerParams(device=device, schemas=schemas, metadata=metadata, data=location)
-                if not is_device_saved:
-                    # Currently only support one user/device
-                    writer.write(transform_device(params))
-                    is_device_saved = True
-
-                writer.write(transform_location(params))
-                writer.write(transform_device_status(params))
-
-                if row_count % log_every == 0:
-                    print(
-                        f"Processed {row_count} rows (locations={metadata.counts.get('location')}, device_status={metadata.counts.get('device_status')})"
-                    )
+    try:
+        if workers > 1:
+            with metadata.memory, tempfile.TemporaryDirectory(dir=out_dir, prefix=".parts_") as parts_dir:
+                transform = partial(transform_file, device=device, write_device=False)
+                parts = run_parts(transform, files, Path(parts_dir), workers, canon, memory, schemas)
+                merge_metadata(metadata, parts, workers)
+                # Parts leave the device out, it's written once ahead of them like a run without workers does
+                head = []
+                if metadata.counts["location"]:
+                    # The device record only needs the device name
+                    params = TransformerParams(device=device, schemas=schemas, metadata=metadata, data=None)  # type: ignore[arg-type]
+                    head.append(transform_device(params))
+                writer = merge_canon(metadata, parts, file_path, canon, tee, head, index=index)
+        else:
+            with (
+                metadata.memory,
+                canon_writer(file_path, canon, tee, metadata.timers) as writer,
+                index.writer(writer) as indexed,
+                metadata.memory.writer(indexed) as sink,
+            ):
+                if source is not None:
+                    source(sink, metadata, schemas)
+                for path in files:
+                    transform_file(path, sink, metadata, schemas, device=device, write_device=True)
+        metadata.columnar_files = columnar_writer.files if columnar_writer else {}
+        metadata.shards = writer.manifest()
+        metadata.writer = writer.stats()
+        if schemas.validation_pool is not None:
+            schemas.validation_pool.finish()
+    except BaseException:
+        # Whatever stopped the run, don't leave a complete looking canon file behind
+        remove_outputs(out_dir, file_name)
+        index.close()
+        if schemas.validation_pool is not None:
+            schemas.validation_pool.close()
+        raise
+
+    metadata.checkpoints = checkpoints.to_dict()
+    metadata.dedup = index.to_dict()
+    index.remove_suppressed(metadata.counts)
     with Path(metadata_file).open("w", encoding="utf-8") as f:
         json.dump(metadata.to_dict(), f, indent=2)
+    checkpoints.commit(file_name)
+    index.commit()
+
+
+# One response file, this is also what a --workers process runs for each file. Only one response is held in memory
+def transform_file(
+    path: Path,
+    writer: RecordSink,
+    metadata: TransformRunMetadata,
+    schemas: Schemas,
+    *,
+    device: str,
+    write_device: bool,
+) -> None:
+    response = getApiResponse(path, metadata)
+    transform_response(path.name, response, writer, metadata, schemas, device=device, write_device=write_device)
+
+
+def transform_response(
+    name: str,
+    response: OwntracksLocationApiResponse,
+    writer: RecordSink,
+    metadata: TransformRunMetadata,
+    schemas: Schemas,
+    *,
+    device: str,
+    write_device: bool,
+) -> None:
+    log_every = 10000
+
+    # Mapping time includes the validation done by the mappers, which is also timed on its own as "validate"
+    location_timer = metadata.timers.per_record("map", entity="location", file=name)
+    device_status_timer = metadata.timers.per_record("map", entity="deviceStatus", file=name)
+    for row_count, location in enumerate(response.data, start=1):
+        params = TransformerParams(device=device, schemas=schemas, metadata=metadata, data=location)
+        if write_device and not metadata.counts["device"]:
+            # Currently only support one user/device
+            writer.write(transform_device(params))
+
+        with location_timer():
+            transformed = transform_location(params)
+        writer.write(transformed)
+        with device_status_timer():
+            transformed = transform_device_status(params)
+        writer.write(transformed)
+
+        if row_count % log_every == 0:
+            print(
+                f"Processed {row_count} rows (locations={metadata.counts.get('location')}, device_status={metadata.counts.get('device_status')})"
+            )
+
+
+def open_columnar(file_path: str) -> "ColumnarWriter":
+    # pyarrow is an optional dependency, only needed with --columnar
+    from owntracks_recorder.transform.columnar import ColumnarWriter
+
+    return ColumnarWriter(file_path)
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Optional
+
+if TYPE_CHECKING:
+    import httpx
+
+DEFAULT_TTL_SECONDS = 24 * 60 * 60
+
+
+def schema_cache_dir() -> Path:
+    if cache_dir := os.getenv("SCHEMA_CACHE_DIR"):
+        return Path(cache_dir)
+    return Path(os.getenv("XDG_CACHE_HOME", "~/.cache")).expanduser() / "lomnia" / "schemas"
+
+
+# Within the TTL the cached copy is used as is, after it a conditional request (ETag/Last-Modified) only downloads the
+# schema again if it changed. Offline, or when the server can't be reached, the cached copy is used
+class SchemaCache:
+    def __init__(self, cache_dir: Optional[Path] = None, ttl: float = DEFAULT_TTL_SECONDS, offline: bool = False):
+        self.cache_dir = cache_dir or schema_cache_dir()
+        self.ttl = ttl
+        self.offline = offline
+
+    def needs_request(self, url: str) -> bool:
+        entry = self._read(url)
+        return not self.offline and (entry is None or time.time() - entry["fetched_at"] >= self.ttl)
+
+    def load(self, url: str, client: Optional["httpx.Client"] = None) -> dict[str, Any]:
+        entry = self._read(url)
+
+        if self.offline:
+            if entry is None:
+                raise RuntimeError("SCHEMA_NOT_CACHED")
+            return entry["schema"]
+
+        if entry is not None and time.time() - entry["fetched_at"] < self.ttl:
+            return entry["schema"]
+
+        import httpx
+
+        headers = {}
+        if entry is not None and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry is not None and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        try:
+            response = (client or httpx).get(url, headers=headers)
+            if response.status_code != 304:
+                response.raise_for_status()
+        except httpx.HTTPError as e:
+            if entry is None:
+                raise
+            print(f"Couldn't refresh schema {url} ({e}), using the cached copy")
+            return entry["schema"]
+
+        if response.status_code == 304 and entry is not None:
+            entry["fetched_at"] = time.time()
+            self._write(url, entry)
+            return entry["schema"]
+
+        schema = response.json()
+        self._write(
+            url,
+            {
+                "url": url,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "fetched_at": time.time(),
+                "schema": schema,
+            },
+        )
+        return schema
+
+    def path(self, url: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(url.encode()).hexdigest()[:32]}.json"
+
+    def _read(self, url: str) -> Optional[dict[str, Any]]:
+        path = self.path(url)
+        if not path.exists():
+            return None
+        try:
+            return json.loads(path.read_text(encoding="utf-8"))
+        except json.JSONDecodeError:
+            return None
+
+    def _write(self, url: str, entry: dict[str, Any]) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=self.cache_dir, suffix=".tmp", delete=False, encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(f.name, self.path(url))
@@ -0,0 +1,70 @@
+import argparse
+import signal
+import threading
+import traceback
+from pathlib import Path
+from typing import Callable, Optional
+
+# Size and mtime of an input file
+Stat = tuple[int, int]
+
+
+def add_watch_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Keep running and transform input files as they land in --in_dir, every batch into a new canon file. Implies --incremental",
+    )
+    parser.add_argument(
+        "--watch_interval",
+        type=float,
+        default=2.0,
+        help="Seconds between two looks at --in_dir with --watch. A new or changed file is transformed once it looked the same twice",
+    )
+
+
+def stats(paths: list[Path]) -> dict[Path, Stat]:
+    result = {}
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        result[path] = (stat.st_size, stat.st_mtime_ns)
+    return result
+
+
+# Polls the inputs and calls run (an --incremental transform, so only what's new is read) with the new or changed ones.
+# A file has to look the same on two polls in a row so one that is still being written isn't read half way, the ones
+# that settled are run even while others keep changing. A failed run is reported and the files it had are only tried
+# again once they change. SIGTERM stops it after the current run
+def watch(
+    inputs: Callable[[], list[Path]],
+    run: Callable[[list[Path]], None],
+    interval: float,
+    stop: Optional[threading.Event] = None,
+) -> None:
+    stop = stop or threading.Event()
+    handler = None
+    if threading.current_thread() is threading.main_thread():
+        handler = signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    done: dict[Path, Stat] = {}
+    previous: dict[Path, Stat] = {}
+    print(f"Watching for new input files every {interval}s")
+    try:
+        while not stop.is_set():
+            current = stats(inputs())
+            settled = [path for path, stat in current.items() if done.get(path) != stat and previous.get(path) == stat]
+            if settled:
+                print(f"{len(settled)} new or changed input file(s)")
+                try:
+                    run(settled)
+                except Exception:
+                    traceback.print_exc()
+                done.update((path, current[path]) for path in settled)
+            previous = current
+            stop.wait(interval)
+    finally:
+        if handler is not None:
+            signal.signal(signal.SIGTERM, handler)
@@ -0,0 +1,120 @@
+import gzip
+import io
+import zlib
+
+import jsonlines
+import zstandard
+
+from owntracks_recorder.transform.canon_writer import CanonOptions, CanonWriter, canon_writer, read_canon
+
+RECORDS = [
+    {"id": f"loc_{i}", "entityType": "location", "location": {"lat": 45.5, "lng": -73.5}, "topic": "ç/ü"}
+    for i in range(500)
+]
+
+
+def gzip_members(data: bytes) -> int:
+    members = 0
+    while data:
+        decompressor = zlib.decompressobj(wbits=31)
+        decompressor.decompress(data)
+        data = decompressor.unused_data
+        members += 1
+    return members
+
+
+def test_json_encoder_output_is_the_same_jsonl_as_jsonlines_in_multiple_members(tmp_path):
+    path = tmp_path / "canon.jsonl.gz"
+    options = CanonOptions(compression_level=6, compression_workers=3, block_size=4096, json_encoder="json")
+    with CanonWriter(path, options) as writer:
+        for record in RECORDS:
+            writer.write(record)
+
+    expected = io.StringIO()
+    jsonlines.Writer(expected).write_all(RECORDS)
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert f.read() == expected.getvalue()
+    assert gzip_members(path.read_bytes()) > 1
+
+
+def test_default_output_is_byte_for_byte_what_jsonlines_wrote(tmp_path):
+    path = tmp_path / "canon.jsonl.gz"
+    records = [*RECORDS, {"n": 1.0, "big": 10**20, "nested": [None, True, {"a": "\u2028"}]}]
+    with CanonWriter(path, CanonOptions(block_size=4096)) as writer:
+        for record in records:
+            writer.write(record)
+
+    expected = io.BytesIO()
+    jsonlines.Writer(expected).write_all(records)
+
+    with gzip.open(path, "rb") as f:
+        assert f.read() == expected.getvalue()
+
+
+def test_a_writer_without_records_still_writes_a_valid_file(tmp_path):
+    for codec in ("gzip", "zstd"):
+        options = CanonOptions(codec=codec)
+        path = tmp_path / f"canon{options.extension}"
+        with CanonWriter(path, options):
+            pass
+
+        assert path.stat().st_size > 0
+        assert list(read_canon(path)) == []
+    with gzip.open(tmp_path / "canon.jsonl.gz", "rb") as f:
+        assert f.read() == b""
+
+
+def test_orjson_output_reads_back_as_the_same_records(tmp_path):
+    path = tmp_path / "canon.jsonl.gz"
+    with CanonWriter(path, CanonOptions(block_size=4096, json_encoder="orjson")) as writer:
+        for record in RECORDS:
+            writer.write(record)
+
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        assert list(jsonlines.Reader(f)) == RECORDS
+
+
+def test_same_records_give_the_same_bytes(tmp_path):
+    outputs = []
+    for workers in (1, 4):
+        path = tmp_path / f"canon_{workers}.jsonl.gz"
+        with CanonWriter(path, CanonOptions(compression_workers=workers, block_size=4096)) as writer:
+            for record in RECORDS:
+                writer.write(record)
+        outputs.append(path.read_bytes())
+
+    assert outputs[0] == outputs[1]
+
+
+def test_zstd_output_reads_back_as_the_same_records(tmp_path):
+    options = CanonOptions(codec="zstd", compression_workers=3, block_size=4096)
+    path = tmp_path / f"canon{options.extension}"
+    with CanonWriter(path, options) as writer:
+        for record in RECORDS:
+            writer.write(record)
+
+    with zstandard.open(path, "rt", encoding="utf-8") as f:
+        assert list(jsonlines.Reader(f)) == RECORDS
+    assert path.name == "canon.jsonl.zst"
+    assert options.to_dict() == {"name": "zstd", "level": 3}
+
+
+def test_shards_rotate_per_entity_type(tmp_path):
+    records = [{**record, "entityType": "device" if i % 5 == 0 else "location"} for i, record in enumerate(RECORDS)]
+    options = CanonOptions(shard=True, shard_records=150, compression_workers=2, block_size=4096)
+    with canon_writer(tmp_path / "canon", options) as writer:
+        for record in records:
+            writer.write(record)
+
+    manifest = writer.manifest()
+    assert [(shard["file"], shard["records"]) for shard in manifest] == [
+        ("canon.device.0000.jsonl.gz", 100),
+        ("canon.location.0000.jsonl.gz", 150),
+        ("canon.location.0001.jsonl.gz", 150),
+        ("canon.location.0002.jsonl.gz", 100),
+    ]
+    assert [record for shard in manifest for record in read_canon(tmp_path / shard["file"])] == [
+        *(r for r in records if r["entityType"] == "device"),
+        *(r for r in records if r["entityType"] == "location"),
+    ]
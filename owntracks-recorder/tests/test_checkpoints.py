@@ -0,0 +1,45 @@
+import os
+
+from owntracks_recorder.transform.checkpoints import CheckpointStore
+
+
+def write_inputs(tmp_path):
+    in_dir = tmp_path / "in"
+    in_dir.mkdir()
+    for name in ("a.gz", "b.gz"):
+        (in_dir / name).write_bytes(name.encode())
+    return sorted(in_dir.iterdir())
+
+
+def test_unchanged_inputs_are_skipped_after_a_commit(tmp_path):
+    inputs = write_inputs(tmp_path)
+    first = CheckpointStore(tmp_path)
+    assert first.filter(inputs) == inputs
+    first.commit("canon_1")
+
+    second = CheckpointStore(tmp_path)
+    assert second.filter(inputs) == []
+    assert second.to_dict()["skipped"] == [
+        {"input": "a.gz", "canon": "canon_1"},
+        {"input": "b.gz", "canon": "canon_1"},
+    ]
+
+
+def test_touched_inputs_are_compared_by_content(tmp_path):
+    a, b = write_inputs(tmp_path)
+    store = CheckpointStore(tmp_path)
+    store.filter([a, b])
+    store.commit("canon_1")
+
+    os.utime(a, ns=(0, 0))
+    b.write_bytes(b"changed")
+
+    assert CheckpointStore(tmp_path).filter([a, b]) == [b]
+
+
+def test_nothing_is_stored_without_a_commit(tmp_path):
+    inputs = write_inputs(tmp_path)
+    CheckpointStore(tmp_path).filter(inputs)
+
+    assert CheckpointStore(tmp_path).filter(inputs) == inputs
+    assert CheckpointStore(tmp_path, enabled=False).to_dict() is None
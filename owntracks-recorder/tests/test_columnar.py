@@ -0,0 +1,82 @@
+import json
+
+import pytest
+
+pq = pytest.importorskip("pyarrow.parquet")
+
+from owntracks_recorder.transform import columnar as columnar_module  # noqa: E402
+from owntracks_recorder.transform.canon_writer import CanonOptions, canon_writer  # noqa: E402
+from owntracks_recorder.transform.columnar import ColumnarWriter, verify_columnar  # noqa: E402
+
+DEVICE = {"entityType": "device", "version": "1", "id": "phone", "source": "owntracks"}
+
+
+def location(i):
+    record = {
+        "entityType": "location",
+        "version": "1",
+        "id": f"loc_{i}",
+        "source": "owntracks",
+        "recordedAt": f"2024-01-01T00:{i // 60 % 60:02d}:{i % 60:02d}{'.250000' if i % 3 == 0 else ''}Z",
+        "location": {"lat": 45.5, "lng": -73.5},
+        "accuracy": i,
+        "deviceId": "phone",
+        "timezone": "America/Toronto",
+    }
+    # Optional keys only showing up later on
+    if i > 300:
+        record["trigger"] = "p"
+    return record
+
+
+def device_status(i):
+    return {
+        "entityType": "deviceStatus",
+        "version": "1",
+        "id": f"status_{i}",
+        "source": "owntracks",
+        "recordedAt": f"2024-01-01T00:00:{i % 60:02d}Z",
+        "battery": None if i % 2 else 80,
+        "deviceId": "phone",
+    }
+
+
+def test_columnar_files_round_trip_to_the_canon_records(tmp_path):
+    base = tmp_path / "canon"
+    options = CanonOptions(codec="zstd", shard=True, shard_records=200)
+    columnar = ColumnarWriter(base)
+    with canon_writer(base, options, [columnar]) as writer:
+        writer.write(DEVICE)
+        for i in range(500):
+            writer.write(location(i))
+            writer.write(device_status(i))
+
+    assert columnar.files == {"location": "canon.location.parquet", "deviceStatus": "canon.deviceStatus.parquet"}
+    (tmp_path / "canon.meta.json").write_text(json.dumps({"shards": writer.manifest()}))
+    assert verify_columnar(tmp_path / "canon.meta.json") == {"heartRate": 0, "location": 500, "deviceStatus": 500}
+
+    schema = pq.read_schema(tmp_path / "canon.location.parquet")
+    assert str(schema.field("deviceId").type) == "dictionary<values=string, indices=int32, ordered=0>"
+    assert str(schema.field("recordedAt").type) == "timestamp[us, tz=UTC]"
+
+
+def test_batches_are_written_as_row_groups_as_they_fill(tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar_module, "BATCH_ROWS", 100)
+    base = tmp_path / "canon"
+    columnar = ColumnarWriter(base)
+    with canon_writer(base, CanonOptions(), [columnar]) as writer:
+        for i in range(500):
+            writer.write(location(i))
+            writer.write(device_status(i))
+            # Nothing held back beyond the batch being filled
+            assert all(len(rows) < 100 for rows in columnar.rows.values())
+
+    (tmp_path / "canon.meta.json").write_text(json.dumps({"shards": writer.manifest()}))
+    assert verify_columnar(tmp_path / "canon.meta.json") == {"heartRate": 0, "location": 500, "deviceStatus": 500}
+    # trigger only shows up from row 301, the file is still one file with every column
+    assert pq.ParquetFile(tmp_path / "canon.location.parquet").metadata.num_row_groups == 5
+    assert "trigger" in pq.read_schema(tmp_path / "canon.location.parquet").names
+    assert sorted(path.name for path in tmp_path.iterdir() if "parquet" in path.name) == [
+        "canon.deviceStatus.parquet",
+        "canon.location.parquet",
+    ]
@@ -0,0 +1,56 @@
+import pytest
+
+from owntracks_recorder.transform.dedup import RecordIndex
+
+
+class ListWriter:
+    def __init__(self):
+        self.records = []
+
+    def write(self, record):
+        self.records.append(record)
+
+
+def write(out_dir, records):
+    index = RecordIndex(out_dir)
+    sink = ListWriter()
+    with index.writer(sink) as writer:
+        for record in records:
+            writer.write(record)
+    index.commit()
+    return sink.records, index.to_dict()
+
+
+def location(record_id, lat):
+    return {"id": record_id, "entityType": "location", "lat": lat}
+
+
+def test_only_new_or_changed_records_are_written_again(tmp_path):
+    write(tmp_path, [location("a", 1), location("b", 2)])
+
+    written, report = write(tmp_path, [location("a", 1), location("b", 3), location("c", 4), {"entityType": "x"}])
+
+    assert written == [location("b", 3), location("c", 4), {"entityType": "x"}]
+    assert report["new"] == {"location": 1}
+    assert report["changed"] == {"location": 1}
+    assert report["suppressed"] == {"location": 1}
+
+
+def test_repeats_within_a_run_are_suppressed(tmp_path):
+    written, report = write(tmp_path, [location("a", 1), location("a", 1), location("a", 2)])
+
+    assert written == [location("a", 1), location("a", 2)]
+    assert report["suppressed"] == {"location": 1}
+
+
+def test_a_failed_run_is_rolled_back(tmp_path):
+    index = RecordIndex(tmp_path)
+    with pytest.raises(RuntimeError), index.writer(ListWriter()) as writer:
+        for record in [location("a", 1)] * 600:
+            writer.write(record)
+        raise RuntimeError
+
+    written, _ = write(tmp_path, [location("a", 1)])
+
+    assert written == [location("a", 1)]
+    assert RecordIndex(tmp_path, enabled=False).to_dict() is None
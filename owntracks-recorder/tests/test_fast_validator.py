@@ -0,0 +1,83 @@
+import itertools
+
+import jsonschema
+
+from owntracks_recorder.transform.fast_validator import build_validator, schema_hash
+
+LOCATION_SCHEMA = {
+    "$schema": "http://json-schema.org/draft-07/schema#",
+    "title": "location",
+    "type": "object",
+    "additionalProperties": False,
+    "required": ["id", "entityType", "recordedAt", "location"],
+    "properties": {
+        "id": {"type": "string"},
+        "entityType": {"const": "location"},
+        "recordedAt": {"type": "string", "format": "date-time"},
+        "accuracy": {"type": ["number", "null"], "minimum": 0},
+        "trigger": {"enum": ["ping", "circular", "report_location", "manual"]},
+        "location": {"$ref": "#/definitions/point"},
+    },
+    "definitions": {
+        "point": {
+            "type": "object",
+            "required": ["lat", "lng"],
+            "properties": {
+                "lat": {"type": "number", "minimum": -90, "maximum": 90},
+                "lng": {"type": "number", "minimum": -180, "maximum": 180},
+            },
+        }
+    },
+}
+
+VALID = {
+    "id": "abc",
+    "entityType": "location",
+    "recordedAt": "2024-01-01T00:00:00Z",
+    "accuracy": 5,
+    "trigger": "ping",
+    "location": {"lat": 45.5, "lng": -73.5},
+}
+
+
+def test_generated_validator_agrees_with_jsonschema(tmp_path):
+    is_valid = build_validator(LOCATION_SCHEMA, tmp_path)
+    assert is_valid is not None
+
+    values = [None, True, 0, -1, 1.5, 200, "", "ping", "location", [], {"lat": 1, "lng": 2}, {"lat": 100, "lng": 2}]
+    validator = jsonschema.Draft7Validator(LOCATION_SCHEMA)
+    for key, value in itertools.product([*VALID, "extra"], values):
+        instance = {**VALID, key: value}
+        assert is_valid(instance) == validator.is_valid(instance), instance
+
+
+def test_generated_validator_is_cached_by_schema_hash(tmp_path):
+    build_validator(LOCATION_SCHEMA, tmp_path)
+
+    cached = list(tmp_path.glob("validator_*.py"))
+    assert [p.name for p in cached] == [f"validator_{schema_hash(LOCATION_SCHEMA)}.py"]
+
+    cached[0].write_text("def is_valid(v):\n    return 'cached'\n")
+    assert build_validator(LOCATION_SCHEMA, tmp_path)(VALID) == "cached"
+
+
+def test_unsupported_keywords_fall_back(tmp_path):
+    assert build_validator({"type": "array", "uniqueItems": True}, tmp_path) is None
+
+
+def test_ref_siblings_follow_the_schema_draft(tmp_path):
+    defs = {"s": {"type": "string"}}
+    values = [None, 1, "", "ab", "abcdef"]
+    for schema in (
+        {"$ref": "#/$defs/s", "maxLength": 2, "$defs": defs},
+        {
+            "$schema": "http://json-schema.org/draft-07/schema#",
+            "$ref": "#/definitions/s",
+            "maxLength": 2,
+            "definitions": defs,
+        },
+    ):
+        is_valid = build_validator(schema, tmp_path)
+        validator = jsonschema.validators.validator_for(schema)(schema)
+        for value in values:
+            assert is_valid(value) == validator.is_valid(value), (schema, value)
@@ -0,0 +1,78 @@
+import pytest
+
+from owntracks_recorder.transform.memory import (
+    SPILL,
+    MemoryBudgetExceededError,
+    MemoryMonitor,
+    MemoryOptions,
+    SpillBuffer,
+)
+from owntracks_recorder.transform.timers import StageTimers
+
+
+class ListWriter:
+    def __init__(self, records):
+        self.records = records
+
+    def write(self, record):
+        self.records.append(record)
+
+    def close(self):
+        pass
+
+
+RECORDS = [{"id": f"loc_{i}", "entityType": "location", "accuracy": i} for i in range(100)]
+
+
+def test_buffer_spills_to_disk_once_over_budget():
+    monitor = MemoryMonitor(MemoryOptions(budget_mb=1, action=SPILL))
+    buffer = SpillBuffer(monitor)
+    buffer.extend(RECORDS[:40])
+    monitor.sample()
+    buffer.extend(RECORDS[40:])
+
+    assert monitor.should_spill
+    assert buffer.file is not None
+    assert len(buffer) == 100
+    assert list(buffer) == RECORDS
+    assert monitor.to_dict()["spilled_records"] == 100
+
+
+def test_fail_action_stops_the_run_at_the_next_record():
+    monitor = MemoryMonitor(MemoryOptions(budget_mb=1, interval=0.01))
+    written = []
+    with (
+        pytest.raises(MemoryBudgetExceededError, match="MEMORY_BUDGET_EXCEEDED"),
+        monitor,
+        monitor.writer(ListWriter(written)) as writer,
+    ):
+        while not monitor.over_budget:
+            monitor.stopped.wait(0.01)
+        writer.write(RECORDS[0])
+
+    assert written == []
+    assert monitor.to_dict()["over_budget"]
+
+
+def test_nothing_is_sampled_without_a_budget():
+    with MemoryMonitor() as monitor:
+        assert monitor.thread is None
+        with monitor.writer(ListWriter([])) as writer:
+            assert isinstance(writer, ListWriter)
+
+
+def test_stage_memory_is_reported_for_unsampled_stages():
+    timers = StageTimers()
+    with timers.timer("read"):
+        data = bytearray(8 * 1024 * 1024)
+    with timers.per_record("map")():
+        pass
+
+    stages = timers.to_dict()["stages"]
+    assert stages["read"]["rss_growth_bytes"] >= len(data) // 2
+    assert "rss_growth_bytes" not in stages["map"]
+
+
+def test_invalid_budget_action():
+    with pytest.raises(ValueError, match="INVALID_MEMORY_BUDGET_ACTION"):
+        MemoryOptions(action="swap")
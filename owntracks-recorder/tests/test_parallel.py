@@ -0,0 +1,48 @@
+import pickle
+from datetime import datetime, timezone
+
+from owntracks_recorder.transform.canon_writer import CanonOptions, CanonWriter, read_canon
+from owntracks_recorder.transform.memory import MemoryBudgetExceededError
+from owntracks_recorder.transform.meta import TransformRunMetadata
+from owntracks_recorder.transform.parallel import Part, merge_canon, merge_metadata, part_options
+from owntracks_recorder.transform.validation_pool import InvalidRecordsError
+
+OPTIONS = CanonOptions(compression_workers=1, write_queue_size=0)
+
+
+def write_part(tmp_path, index, records, day):
+    metadata = TransformRunMetadata()
+    with CanonWriter(tmp_path / f"part_{index}.jsonl.gz", part_options(OPTIONS)) as writer:
+        for record in records:
+            writer.write(record)
+            metadata.record_location(datetime(2024, 1, day, tzinfo=timezone.utc))
+    metadata.files_processed.append(f"input_{index}.gz")
+    metadata.shards = writer.manifest()
+    return Part(f"input_{index}.gz", writer.path, metadata, None)
+
+
+def test_parts_are_concatenated_in_input_order(tmp_path):
+    first = [{"id": f"a{i}", "entityType": "location"} for i in range(3)]
+    second = [{"id": f"b{i}", "entityType": "location"} for i in range(2)]
+    parts = [write_part(tmp_path, 0, first, 2), write_part(tmp_path, 1, second, 1)]
+    metadata = TransformRunMetadata()
+
+    merge_metadata(metadata, parts, workers=2)
+    head = [{"id": "phone", "entityType": "device"}]
+    merged = merge_canon(metadata, parts, tmp_path / "canon", OPTIONS, head=head)
+
+    assert list(read_canon(merged.path)) == head + first + second
+    assert merged.manifest()[0]["records"] == 6
+    assert metadata.files_processed == ["input_0.gz", "input_1.gz"]
+    assert metadata.counts["location"] == 5
+    assert metadata.windows.to_dict()["location"]["start"].startswith("2024-01-01")
+    assert [part["records"] for part in metadata.parallel["parts"]] == [3, 2]
+
+
+def test_errors_raised_in_workers_survive_pickling():
+    error = pickle.loads(pickle.dumps(InvalidRecordsError([("location", "a", "bad")])))  # noqa: S301
+    assert error.failures == [("location", "a", "bad")]
+    assert str(error) == "INVALID_RECORDS: 1"
+
+    error = pickle.loads(pickle.dumps(MemoryBudgetExceededError(3 * 2**20, 2**20)))  # noqa: S301
+    assert (error.rss, error.budget) == (3 * 2**20, 2**20)
@@ -0,0 +1,86 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+from functools import partial
+
+import httpx
+import pytest
+
+from owntracks_recorder.extract.run import ExtractionParams
+from owntracks_recorder.pipeline.run import transform_windows
+from owntracks_recorder.transform.canon_writer import read_canon
+from owntracks_recorder.transform.run import run_transform
+from owntracks_recorder.transform.schemas import get_schemas
+
+
+def respond(request):
+    if request.url.path == "/api/0/version":
+        return httpx.Response(200, json={"version": "1.0"})
+    tst = int(datetime.fromisoformat(request.headers["X-Limit-From"]).timestamp()) + 60
+    location = {"_type": "location", "lat": 1.5, "lon": 2.5, "tst": tst}
+    return httpx.Response(200, json={"count": 1, "data": [location], "status": 200, "version": "1.0"})
+
+
+def canon_records(out_dir):
+    (path,) = [path for path in out_dir.iterdir() if "_canon_" in path.name and ".meta" not in path.suffixes]
+    return list(read_canon(path))
+
+
+def test_streamed_windows_match_transforming_the_raw_files(tmp_path, monkeypatch):
+    monkeypatch.setenv("SKIP_SCHEMA_CHECK", "1")
+    raw_dir, streamed_dir, transformed_dir = tmp_path / "raw", tmp_path / "streamed", tmp_path / "transformed"
+    for path in (raw_dir, streamed_dir, transformed_dir):
+        path.mkdir()
+    params = ExtractionParams(
+        user="user",
+        device="phone",
+        server_url="http://owntracks",
+        start_date=datetime.now(timezone.utc) - timedelta(days=1, hours=12),
+        out_dir=raw_dir,
+    )
+    windows = []
+    with httpx.Client(base_url=params.server_url, transport=httpx.MockTransport(respond)) as client:
+        source = partial(transform_windows, client, params, windows)
+        run_transform(device="phone", out_dir=streamed_dir, in_dir=raw_dir, schemas=get_schemas(), source=source)
+
+    assert len(windows) == 2
+    for window in windows:
+        with gzip.open(raw_dir / f"{window.file_name}.json.gz") as f:
+            assert json.load(f)["count"] == 1
+        assert (raw_dir / f"{window.file_name}.meta.json").exists()
+
+    run_transform(device="phone", out_dir=transformed_dir, in_dir=raw_dir, schemas=get_schemas())
+    streamed = canon_records(streamed_dir)
+    assert len(streamed) == 5
+    assert streamed == canon_records(transformed_dir)
+
+
+def test_a_run_that_fails_half_way_leaves_no_canon_file(tmp_path, monkeypatch):
+    monkeypatch.setenv("SKIP_SCHEMA_CHECK", "1")
+
+    def source(sink, metadata, schemas):
+        sink.write({"id": "a", "entityType": "location"})
+        raise RuntimeError("EXTRACT_FAILED")
+
+    with pytest.raises(RuntimeError, match="EXTRACT_FAILED"):
+        run_transform(device="phone", out_dir=tmp_path, in_dir=tmp_path, schemas=get_schemas(), source=source)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_dedup_counts_only_the_records_written(tmp_path, monkeypatch):
+    monkeypatch.setenv("SKIP_SCHEMA_CHECK", "1")
+
+    def source(sink, metadata, schemas):
+        for record_id in ("a", "b", "a"):
+            metadata.record_location(datetime(2024, 1, 1, tzinfo=timezone.utc))
+            sink.write({"id": record_id, "entityType": "location"})
+
+    run_transform(device="phone", out_dir=tmp_path, in_dir=tmp_path, schemas=get_schemas(), dedup=True, source=source)
+
+    (meta_path,) = tmp_path.glob("*.meta.json")
+    meta = json.loads(meta_path.read_text())
+    locations = [record["id"] for record in canon_records(tmp_path) if record["entityType"] == "location"]
+    assert locations == ["a", "b"]
+    assert meta["counts"]["location"] == 2
+    assert meta["dedup"]["suppressed"] == {"location": 1}
@@ -0,0 +1,78 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+import pytest
+
+from owntracks_recorder.transform.schema_cache import SchemaCache
+
+SCHEMA = {"type": "object", "required": ["id"]}
+ETAG = '"v1"'
+REQUESTS: list[dict[str, str]] = []
+
+
+class SchemaHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        REQUESTS.append(dict(self.headers))
+        if self.headers.get("If-None-Match") == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        body = json.dumps(SCHEMA).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("ETag", ETAG)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def schema_url():
+    REQUESTS.clear()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SchemaHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}/location.schema.json"
+    server.shutdown()
+    server.server_close()
+
+
+def test_fetches_once_and_serves_from_cache_within_ttl(tmp_path, schema_url):
+    cache = SchemaCache(tmp_path, ttl=3600)
+
+    assert cache.load(schema_url) == SCHEMA
+    assert cache.load(schema_url) == SCHEMA
+    assert len(REQUESTS) == 1
+    assert json.loads(cache.path(schema_url).read_text())["etag"] == ETAG
+
+
+def test_revalidates_with_etag_after_ttl(tmp_path, schema_url):
+    SchemaCache(tmp_path, ttl=3600).load(schema_url)
+
+    assert SchemaCache(tmp_path, ttl=0).load(schema_url) == SCHEMA
+    assert len(REQUESTS) == 2
+    assert REQUESTS[1]["If-None-Match"] == ETAG
+
+
+def test_offline_never_hits_the_network(tmp_path, schema_url):
+    with pytest.raises(RuntimeError, match="SCHEMA_NOT_CACHED"):
+        SchemaCache(tmp_path, offline=True).load(schema_url)
+
+    SchemaCache(tmp_path).load(schema_url)
+    assert SchemaCache(tmp_path, ttl=0, offline=True).load(schema_url) == SCHEMA
+    assert len(REQUESTS) == 1
+
+
+def test_stale_cache_is_used_when_the_server_is_down(tmp_path):
+    url = "http://127.0.0.1:9/location.schema.json"
+    with pytest.raises(httpx.HTTPError):
+        SchemaCache(tmp_path).load(url)
+
+    cache = SchemaCache(tmp_path, ttl=0)
+    cache._write(url, {"url": url, "etag": ETAG, "last_modified": None, "fetched_at": 0, "schema": SCHEMA})
+    assert cache.load(url) == SCHEMA
@@ -0,0 +1,74 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jsonschema
+import pytest
+
+from owntracks_recorder.transform.schema_cache import SchemaCache
+from owntracks_recorder.transform.schemas import get_schemas, load_schemas
+
+IN_FLIGHT = {"now": 0, "max": 0}
+LOCK = threading.Lock()
+
+
+class SlowSchemaHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        with LOCK:
+            IN_FLIGHT["now"] += 1
+            IN_FLIGHT["max"] = max(IN_FLIGHT["max"], IN_FLIGHT["now"])
+        time.sleep(0.2)
+        with LOCK:
+            IN_FLIGHT["now"] -= 1
+        body = json.dumps({"title": self.path}).encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_schemas_are_loaded_concurrently_and_timed(tmp_path):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowSchemaHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    local = tmp_path / "device.schema.json"
+    local.write_text(json.dumps({"title": "local"}))
+
+    try:
+        schemas, timings = load_schemas(
+            {
+                "location": (None, f"{base}/location"),
+                "device": (str(local), f"{base}/device"),
+                "deviceStatus": (None, f"{base}/deviceStatus"),
+            },
+            SchemaCache(tmp_path / "cache"),
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert schemas == {
+        "location": {"title": "/location"},
+        "device": {"title": "local"},
+        "deviceStatus": {"title": "/deviceStatus"},
+    }
+    assert set(timings) == {"location", "device", "deviceStatus"}
+    assert IN_FLIGHT["max"] == 2
+
+
+def test_workers_parts_use_the_loaded_schemas_without_a_validation_pool(monkeypatch):
+    monkeypatch.setenv("VALIDATION_WORKERS", "2")
+    loaded = {"location": {"type": "object", "required": ["lat"]}, "device": None, "deviceStatus": None}
+
+    schemas = get_schemas(loaded)
+
+    assert schemas.validation_pool is None
+    assert schemas.loaded is loaded
+    assert schemas.device is None
+    schemas.location.validate({"lat": 1})
+    with pytest.raises(jsonschema.ValidationError):
+        schemas.location.validate({})
@@ -0,0 +1,39 @@
+from owntracks_recorder.transform.timers import StageTimers, timed
+
+
+def test_timers_are_totalled_per_stage_entity_and_file():
+    timers = StageTimers()
+    for file in ("a.json.gz", "b.json.gz"):
+        with timers.timer("parse", file=file)(rows=10):
+            pass
+        location_timer = timers.per_record("map", entity="location", file=file)
+        for _ in range(100):
+            with location_timer():
+                pass
+
+    result = timers.to_dict()
+    assert result["stages"]["parse"]["rows"] == 20
+    assert result["stages"]["map"]["rows"] == 200
+    assert result["entities"] == {"location": {"map": result["stages"]["map"]}}
+    assert set(result["files"]) == {"a.json.gz", "b.json.gz"}
+    assert result["files"]["a.json.gz"]["map"]["rows"] == 100
+
+
+def test_sampled_timers_are_scaled_to_every_call():
+    timers = StageTimers()
+    timer = timers.per_record("map", entity="location")
+    for _ in range(160):
+        with timer():
+            pass
+
+    assert timer.calls == 160
+    assert timer.timed == 10
+    assert timer.scale == 16
+
+
+def test_timed_counts_the_items_pulled():
+    timers = StageTimers()
+    timer = timers.timer("read")
+    assert list(timed(iter(range(5)), timer)) == [0, 1, 2, 3, 4]
+    assert timer.rows == 5
+    assert timer.calls == 6
@@ -0,0 +1,45 @@
+import jsonschema
+import pytest
+
+from owntracks_recorder.transform.validation import ValidationReport
+
+SCHEMA = {
+    "type": "object",
+    "required": ["id", "accuracy"],
+    "properties": {"id": {"type": "string"}, "accuracy": {"type": "number", "minimum": 0}},
+}
+
+
+def strict_validate(instance):
+    jsonschema.validate(instance=instance, schema=SCHEMA)
+
+
+def test_sample_validates_first_records_then_every_kth():
+    report = ValidationReport("sample", sample_first=3, sample_every=4)
+    validate = report.validator("location", SCHEMA, strict_validate)
+
+    for _ in range(11):
+        validate({"id": "a", "accuracy": 1})
+
+    assert report.to_dict()["entities"]["location"] == {"records": 11, "full": 5, "structural": 0, "skipped": 6}
+
+
+def test_structural_falls_back_to_full_validation_for_the_error(tmp_path, monkeypatch):
+    monkeypatch.setenv("VALIDATOR_CACHE_DIR", str(tmp_path))
+    report = ValidationReport("structural")
+    validate = report.validator("location", SCHEMA, strict_validate)
+
+    # Shape is fine, the structural check doesn't look at minimum
+    validate({"id": "a", "accuracy": -1})
+    with pytest.raises(jsonschema.ValidationError):
+        validate({"id": "a"})
+
+    assert report.to_dict() == {
+        "mode": "structural",
+        "entities": {"location": {"records": 2, "full": 1, "structural": 1, "skipped": 0}},
+    }
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError, match="INVALID_VALIDATION_MODE"):
+        ValidationReport("partial")
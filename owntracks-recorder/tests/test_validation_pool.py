@@ -0,0 +1,33 @@
+import pytest
+
+from owntracks_recorder.transform.validation_pool import InvalidRecordsError, ValidationPool
+
+SCHEMAS = {
+    "location": {
+        "type": "object",
+        "required": ["id", "accuracy"],
+        "properties": {"id": {"type": "string"}, "accuracy": {"type": "number", "minimum": 0}},
+    }
+}
+
+
+def test_valid_records_pass(tmp_path, monkeypatch):
+    monkeypatch.setenv("VALIDATOR_CACHE_DIR", str(tmp_path))
+    pool = ValidationPool(SCHEMAS, workers=2, batch_size=10)
+    for i in range(95):
+        pool.submit("location", {"id": str(i), "accuracy": i})
+    pool.finish()
+
+
+def test_first_invalid_batch_is_reported_with_record_ids(tmp_path, monkeypatch):
+    monkeypatch.setenv("VALIDATOR_CACHE_DIR", str(tmp_path))
+    pool = ValidationPool(SCHEMAS, workers=2, batch_size=10)
+    with pytest.raises(InvalidRecordsError) as e:
+        for i in range(95):
+            pool.submit("location", {"id": str(i), "accuracy": -1 if i in (12, 15, 80) else i})
+        pool.finish()
+
+    assert [(entity, record_id) for entity, record_id, _ in e.value.failures] == [
+        ("location", "12"),
+        ("location", "15"),
+    ]
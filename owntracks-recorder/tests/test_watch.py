@@ -0,0 +1,57 @@
+import threading
+
+from owntracks_recorder.transform.watch import watch
+
+
+def test_inputs_are_run_once_they_settle_and_again_when_they_change(tmp_path):
+    path = tmp_path / "a.json.gz"
+    stop = threading.Event()
+    runs = []
+    # What lands in the folder before each poll
+    steps = [
+        lambda: path.write_bytes(b"a"),
+        lambda: path.write_bytes(b"ab"),
+        None,
+        None,
+        lambda: path.write_bytes(b"abc"),
+        None,
+        None,
+    ]
+
+    def inputs():
+        if not steps:
+            stop.set()
+            return []
+        step = steps.pop(0)
+        if step is not None:
+            step()
+        return sorted(tmp_path.iterdir())
+
+    def run(paths):
+        assert paths == [path]
+        runs.append(path.read_bytes())
+        if len(runs) == 1:
+            raise RuntimeError
+
+    watch(inputs, run, 0, stop)
+
+    assert runs == [b"ab", b"abc"]
+
+
+def test_settled_inputs_are_run_while_new_ones_keep_landing(tmp_path):
+    stop = threading.Event()
+    runs = []
+    polls = iter(range(5))
+
+    def inputs():
+        poll = next(polls, None)
+        if poll is None:
+            stop.set()
+            return []
+        # A new file on every poll, the folder as a whole never looks the same twice
+        (tmp_path / f"{poll}.json.gz").write_bytes(b"x")
+        return sorted(tmp_path.iterdir())
+
+    watch(inputs, lambda paths: runs.append([path.name for path in paths]), 0, stop)
+
+    assert runs == [["0.json.gz"], ["1.json.gz"], ["2.json.gz"], ["3.json.gz"]]
@@ -0,0 +1,18 @@
+from datetime import datetime, timezone
+
+from owntracks_recorder.transform.meta import TransformRunMetadata
+
+
+def test_windows_are_tracked_per_entity_from_datetimes_and_epochs():
+    metadata = TransformRunMetadata()
+    metadata.record_location(datetime(2024, 1, 2, tzinfo=timezone.utc))
+    metadata.record_location(1704067200)
+    metadata.record_device_status(datetime(2024, 1, 3))
+
+    result = metadata.to_dict()
+    assert result["window_start"] == "2024-01-01T00:00:00+00:00"
+    assert result["window_end"] == "2024-01-03T00:00:00+00:00"
+    assert result["windows"] == {
+        "device_status": {"start": "2024-01-03T00:00:00+00:00", "end": "2024-01-03T00:00:00+00:00"},
+        "location": {"start": "2024-01-01T00:00:00+00:00", "end": "2024-01-02T00:00:00+00:00"},
+    }
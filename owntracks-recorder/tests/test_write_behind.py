@@ -0,0 +1,43 @@
+import pytest
+
+from owntracks_recorder.transform.canon_writer import CanonOptions, canon_writer, read_canon
+from owntracks_recorder.transform.write_behind import WriteBehindWriter
+
+RECORDS = [{"id": f"loc_{i}", "entityType": "location", "accuracy": i} for i in range(2500)]
+
+
+class FailingWriter:
+    def __init__(self):
+        self.closed = False
+
+    def write(self, record):
+        if record["accuracy"] == 1200:
+            raise ValueError("DISK_FULL")
+
+    def close(self):
+        self.closed = True
+
+
+def test_records_are_written_in_order_with_queue_stats(tmp_path):
+    options = CanonOptions(write_queue_size=2, write_batch_size=100, compression_workers=1)
+    with canon_writer(tmp_path / "canon", options) as writer:
+        for record in RECORDS:
+            writer.write(record)
+
+    assert isinstance(writer, WriteBehindWriter)
+    assert list(read_canon(tmp_path / "canon.jsonl.gz")) == RECORDS
+    stats = writer.stats()
+    assert stats["records"] == 2500
+    assert stats["batches"] == 25
+    assert stats["max_queue_depth"] <= 2
+
+
+def test_writer_thread_errors_surface_without_blocking(tmp_path):
+    inner = FailingWriter()
+    writer = WriteBehindWriter(inner, queue_size=1, batch_size=10)
+    with pytest.raises(ValueError, match="DISK_FULL"), writer:
+        for record in RECORDS:
+            writer.write(record)
+
+    assert inner.closed
+    assert not writer.thread.is_alive()